@@ -17,6 +17,7 @@ import time
 from pathlib import Path
 from datetime import datetime
 from glob import glob
+from concurrent.futures import ThreadPoolExecutor
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
@@ -27,19 +28,34 @@ from rich.align import Align
 from sandcastle_pkg.cli import SalesforceCLI
 from sandcastle_pkg.utils import (
     load_insertable_fields,
-    clear_migration_csvs
+    clear_migration_store,
+    flush_migration_store,
+    prefetch_all_records,
+    stream_prefetched_records,
+    prefetch_reference_existence,
+    build_insertable_index,
+    clear_picklist_cache,
+    set_picklist_disk_cache,
+    prefetch_picklists_for_objects,
+    soql_in_list
 )
 from sandcastle_pkg.phase1 import (
     delete_existing_records,
     create_dummy_records,
     create_account_phase1,
     create_contact_phase1,
-    create_opportunity_phase1,
+    create_opportunities_phase1_batch,
+    partition_pending,
+    MigrationState,
     create_quote_phase1,
     create_quote_line_item_phase1,
     create_order_phase1,
     create_order_item_phase1,
-    create_case_phase1
+    create_case_phase1,
+    set_phase1_verbose,
+    flush_phase1_output,
+    build_schema_cache,
+    report_failed_creates
 )
 from sandcastle_pkg.phase2 import update_lookups_phase2
 
@@ -113,7 +129,7 @@ def create_accounts_phase1(config, account_fields, sf_cli_source, sf_cli_target,
     if len(root_account_ids) > 50:
         logging.warning(f"  Warning: {len(root_account_ids)} root accounts may cause slow queries. Consider reducing.")
 
-    ids_str = "','".join(root_account_ids)
+    ids_list = soql_in_list(root_account_ids)
     
     # Build field list for query (account_fields is a dict: field_name -> field_info)
     field_names = [name for name in account_fields.keys() if name not in ['Id']]
@@ -130,9 +146,9 @@ def create_accounts_phase1(config, account_fields, sf_cli_source, sf_cli_target,
             account_lookup_fields.append(field_name)
     
     # Build OR conditions for each Account lookup field
-    where_conditions = [f"Id IN ('{ids_str}')"]
+    where_conditions = [f"Id IN {ids_list}"]
     for field_name in account_lookup_fields:
-        where_conditions.append(f"{field_name} IN ('{ids_str}')")
+        where_conditions.append(f"{field_name} IN {ids_list}")
     
     where_clause = " OR ".join(where_conditions)
     
@@ -158,6 +174,9 @@ def create_accounts_phase1(config, account_fields, sf_cli_source, sf_cli_target,
     
     logging.info(f"  Fetched {len(all_account_records)} account record(s) in one query")
     
+    # Check every OwnerId and lookup value against the sandbox in a few IN queries, not one per account
+    prefetch_reference_existence(sf_cli_target, all_account_records.values(), account_fields)
+    
     # Step 3: Process root accounts first
     logging.info(f"  Creating {len(root_account_ids)} root account(s)")
     total_accounts = len(all_account_records)
@@ -186,23 +205,40 @@ def create_accounts_phase1(config, account_fields, sf_cli_source, sf_cli_target,
     return created_accounts
 
 
+def run_phase1_parallel(create_one, prod_ids, config):
+    """
+    Call create_one(prod_id) for every ID, with up to config['phase1_parallelism']
+    (default 8) calls in flight. The calls are independent and network-bound.
+    """
+    prod_ids = list(dict.fromkeys(prod_ids))
+    if not prod_ids:
+        return
+    max_workers = max(1, min(config.get('phase1_parallelism', 8), len(prod_ids)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(create_one, prod_ids))
+
+
 def run_pre_migration_setup(config, sf_cli_source, sf_cli_target, script_dir):
     """Run all pre-migration setup tasks"""
     # Step 1: Delete existing records
     delete_existing_records(sf_cli_target, 
-                           argparse.Namespace(no_delete=not config.get("delete_existing_records", False)),
+                           argparse.Namespace(no_delete=not config.get("delete_existing_records", False),
+                                              force_recheck=config.get("force_recheck", False)),
                            config.get("target_sandbox_alias"))
     
     # Step 2: Clear migration CSVs
     logging.info("\n--- Clearing Migration CSVs ---")
-    clear_migration_csvs(script_dir)
+    clear_migration_store(script_dir)
     logging.info("✓ Migration CSVs cleared\n")
     
     # Step 3: Create dummy records
     dummy_records = create_dummy_records(sf_cli_target, config)
     
-    # Step 4: Pre-fetch picklist values for validation (function not implemented)
-    # Skipped: prefetch_picklist_values does not exist
+    # Step 4: Pre-fetch picklist values for validation, describing the objects concurrently
+    logging.info("\n--- Pre-fetching Picklist Values ---")
+    picklists = prefetch_picklists_for_objects(sf_cli_target, list(MigrationState.OBJECT_ATTRS),
+                                               max_workers=config.get('phase1_parallelism', 8))
+    logging.info(f"✓ Pre-fetched picklist values for {len(picklists)} object(s)\n")
     
     # Step 5: Load field metadata for all objects
     logging.info("\n--- Loading Field Metadata ---")
@@ -231,6 +267,8 @@ def main():
     parser.add_argument('-t', '--target-alias', help='Target sandbox alias')
     parser.add_argument('--no-delete', action='store_true', 
                        help='Skip deletion of existing records')
+    parser.add_argument('--force-recheck', action='store_true',
+                       help='Re-run the sandbox safety check and portal user scan, and re-describe picklists, even if already done')
     parser.add_argument('--config', default=str(Path.home() / 'Sandcastle.json'),
                        help='Path to config file (default: ~/Sandcastle.json)')
     parser.add_argument('--version', action='version', 
@@ -274,6 +312,11 @@ def main():
     # Load config
     with open(config_path, 'r') as f:
         config = json.load(f)
+    set_picklist_disk_cache(config.get('picklist_disk_cache', False))
+    if args.force_recheck:
+        config['force_recheck'] = True
+        # Describe picklists again rather than reuse values saved by earlier runs
+        clear_picklist_cache()
 
     # Validate required config keys
     required_keys = ['Accounts']
@@ -302,7 +345,7 @@ def main():
         return 1
 
     # Initialize CLI
-    sf_cli_source = SalesforceCLI(target_org=source_org_alias)
+    sf_cli_source = SalesforceCLI(target_org=source_org_alias, cache_records=True)
     sf_cli_target = SalesforceCLI(target_org=target_org_alias)
 
     console.rule("[bold cyan]TWO-PHASE DATA MIGRATION", style="cyan")
@@ -358,76 +401,112 @@ def main():
         console.print()
         console.rule("[bold cyan]PHASE 1: CREATING RECORDS WITH DUMMY LOOKUPS", style="cyan")
         console.print()
+        set_phase1_verbose(config.get('verbose_phase1', True))
 
-        # Initialize dictionaries to track created records
-        created_accounts = {}
-        created_contacts = {}
-        created_opportunities = {}
-        created_quotes = {}
-        created_qlis = {}
-        created_orders = {}
-        created_order_items = {}
-        created_cases = {}
-        created_account_relationships = {}
-        created_products = {}
-        created_pbes = {}
-        
         # Create accounts (root + related)
         created_accounts = create_accounts_phase1(config, account_fields, sf_cli_source, 
                                                   sf_cli_target, dummy_records, script_dir)
         
+        # One set of created-record maps shared by every Phase 1 create call and by Phase 2,
+        # plus the Quote/Order/Case/line-item field metadata, loaded once for the run
+        state = MigrationState(created_accounts=created_accounts,
+                               schema_cache=build_schema_cache(script_dir))
+        created_contacts = state.created_contacts
+        created_opportunities = state.created_opportunities
+        created_quotes = state.created_quotes
+        created_orders = state.created_orders
+        created_cases = state.created_cases
+        
         # Create other objects
         if config.get("contact_limit", 0) != 0:
+            contacts_by_account = {}
             for prod_account_id in config["Accounts"]:
                 if prod_account_id in created_accounts:
-                    sandbox_account_id = created_accounts[prod_account_id]
                     # Query contacts for this account
                     contact_limit = config.get("contact_limit", 10)
                     limit_clause = "" if contact_limit == -1 else f"LIMIT {contact_limit}"
                     contacts_query = f"SELECT Id FROM Contact WHERE AccountId = '{prod_account_id}' {limit_clause}"
-                    contacts = sf_cli_source.query_records(contacts_query) or []
-                    
-                    logging.info(f"\n--- Phase 1: Contacts for Account {prod_account_id[:8]}... ({len(contacts)}) ---")
-                    for idx, contact_rec in enumerate(contacts, 1):
-                        prod_id = contact_rec['Id']
-                        create_contact_phase1(prod_id, created_contacts, contact_fields, 
-                                            sf_cli_source, sf_cli_target, dummy_records, 
-                                            script_dir, created_accounts)
+                    contacts_by_account[prod_account_id] = sf_cli_source.query_records(contacts_query) or []
+            
+            # Fetch every contact record up front instead of one get_record per contact
+            prefetched_contacts = prefetch_all_records(
+                'Contact', [rec['Id'] for contacts in contacts_by_account.values() for rec in contacts],
+                contact_fields, sf_cli_source
+            )
+            prefetch_reference_existence(sf_cli_target, prefetched_contacts.values(), contact_fields)
+            
+            for prod_account_id, contacts in contacts_by_account.items():
+                logging.info(f"\n--- Phase 1: Contacts for Account {prod_account_id[:8]}... ({len(contacts)}) ---")
+            
+            run_phase1_parallel(
+                lambda prod_id: create_contact_phase1(prod_id, created_contacts, contact_fields,
+                                                      sf_cli_source, sf_cli_target, dummy_records,
+                                                      script_dir, created_accounts,
+                                                      prefetched_record=prefetched_contacts.get(prod_id)),
+                [rec['Id'] for contacts in contacts_by_account.values() for rec in contacts], config
+            )
         
         if config.get("opportunity_limit", 0) != 0:
+            opps_by_account = {}
             for prod_account_id in config["Accounts"]:
                 if prod_account_id in created_accounts:
                     opp_limit = config.get("opportunity_limit", 10)
                     limit_clause = "" if opp_limit == -1 else f"LIMIT {opp_limit}"
                     opps_query = f"SELECT Id FROM Opportunity WHERE AccountId = '{prod_account_id}' {limit_clause}"
-                    opps = sf_cli_source.query_records(opps_query) or []
-                    
-                    logging.info(f"\n--- Phase 1: Opportunities for Account {prod_account_id[:8]}... ({len(opps)}) ---")
-                    for idx, opp_rec in enumerate(opps, 1):
-                        prod_id = opp_rec['Id']
-                        create_opportunity_phase1(prod_id, created_opportunities, opportunity_fields, 
-                                                sf_cli_source, sf_cli_target, dummy_records, 
-                                                script_dir, config, created_accounts, created_contacts)
+                    opps_by_account[prod_account_id] = sf_cli_source.query_records(opps_query) or []
+            
+            # Only Opportunities not created yet need fetching and creating
+            pending_opp_ids = partition_pending(
+                [rec['Id'] for opps in opps_by_account.values() for rec in opps], created_opportunities
+            )
+            
+            for prod_account_id, opps in opps_by_account.items():
+                logging.info(f"\n--- Phase 1: Opportunities for Account {prod_account_id[:8]}... ({len(opps)}) ---")
+            
+            # Lookup targets for Opportunity creation, built once and shared by every record;
+            # the dicts keep filling in place, so the mapping stays current
+            opportunity_mappings = state.mappings_for('Account', 'Contact', 'Opportunity')
+            
+            opportunity_index = build_insertable_index(opportunity_fields, sf_cli_target, 'Opportunity')
+            
+            # Stream opportunity records from the source in chunks of 200: the next chunk is
+            # fetched in the background while the current one is created in one batched request.
+            for chunk_ids, prefetched_opps in stream_prefetched_records('Opportunity', pending_opp_ids,
+                                                                        opportunity_fields, sf_cli_source):
+                create_opportunities_phase1_batch(chunk_ids, created_opportunities, opportunity_fields,
+                                                  sf_cli_source, sf_cli_target, dummy_records, script_dir, config,
+                                                  created_mappings=opportunity_mappings,
+                                                  prefetched_records=prefetched_opps,
+                                                  insertable_index=opportunity_index)
         
         # Create Quotes and QuoteLineItems
         if config.get("quote_limit", 0) != 0 and created_opportunities:
             logging.info(f"\n--- Phase 1: Quotes & QuoteLineItems ---")
+            quote_ids = []
             for prod_opp_id in list(created_opportunities.keys()):
                 quote_limit = config.get("quote_limit", 10)
                 limit_clause = "" if quote_limit == -1 else f"LIMIT {quote_limit}"
                 quotes_query = f"SELECT Id FROM Quote WHERE OpportunityId = '{prod_opp_id}' {limit_clause}"
                 quotes = sf_cli_source.query_records(quotes_query) or []
-                
-                for quote_rec in quotes:
-                    prod_id = quote_rec['Id']
-                    created_qlis_for_quote = create_quote_phase1(prod_id, created_quotes, 
-                                                                 sf_cli_source, sf_cli_target, 
-                                                                 dummy_records, script_dir, 
-                                                                 created_accounts, created_contacts,
-                                                                 created_opportunities)
+                quote_ids.extend(quote_rec['Id'] for quote_rec in quotes)
+            
+            # One Id IN query per 200 Quotes instead of a get_record call per Quote
+            prefetched_quotes = sf_cli_source.get_records_bulk('Quote', quote_ids)
+            prefetch_reference_existence(sf_cli_target, prefetched_quotes.values(), quote_fields)
+            
+            run_phase1_parallel(
+                lambda prod_id: create_quote_phase1(prod_id, created_quotes,
+                                                    sf_cli_source, sf_cli_target,
+                                                    dummy_records, script_dir,
+                                                    created_accounts, created_contacts,
+                                                    created_opportunities, state=state,
+                                                    prefetched_record=prefetched_quotes.get(prod_id)),
+                quote_ids, config
+            )
         
         # Create Orders and OrderItems
         if config.get("order_limit", 0) != 0:
+            order_ids = []
             for prod_account_id in config["Accounts"]:
                 if prod_account_id in created_accounts:
                     order_limit = config.get("order_limit", 10)
@@ -436,15 +515,23 @@ def main():
                     orders = sf_cli_source.query_records(orders_query) or []
                     
                     logging.info(f"\n--- Phase 1: Orders & OrderItems for Account {prod_account_id[:8]}... ({len(orders)}) ---")
-                    for order_rec in orders:
-                        prod_id = order_rec['Id']
-                        created_order_items_for_order = create_order_phase1(prod_id, created_orders, 
-                                                                            sf_cli_source, sf_cli_target, 
-                                                                            dummy_records, script_dir, 
-                                                                            created_accounts, created_contacts)
+                    order_ids.extend(order_rec['Id'] for order_rec in orders)
+            
+            prefetched_orders = sf_cli_source.get_records_bulk('Order', order_ids)
+            prefetch_reference_existence(sf_cli_target, prefetched_orders.values(), order_fields)
+            
+            run_phase1_parallel(
+                lambda prod_id: create_order_phase1(prod_id, created_orders,
+                                                    sf_cli_source, sf_cli_target,
+                                                    dummy_records, script_dir,
+                                                    created_accounts, created_contacts, state=state,
+                                                    prefetched_record=prefetched_orders.get(prod_id)),
+                order_ids, config
+            )
         
         # Create Cases
         if config.get("case_limit", 0) != 0:
+            case_ids = []
             for prod_account_id in config["Accounts"]:
                 if prod_account_id in created_accounts:
                     case_limit = config.get("case_limit", 10)
@@ -453,30 +540,34 @@ def main():
                     cases = sf_cli_source.query_records(cases_query) or []
                     
                     logging.info(f"\n--- Phase 1: Cases for Account {prod_account_id[:8]}... ({len(cases)}) ---")
-                    for idx, case_rec in enumerate(cases, 1):
-                        prod_id = case_rec['Id']
-                        create_case_phase1(prod_id, created_cases, sf_cli_source, sf_cli_target, 
-                                         dummy_records, script_dir, created_accounts, created_contacts)
+                    case_ids.extend(case_rec['Id'] for case_rec in cases)
+            
+            prefetched_cases = sf_cli_source.get_records_bulk('Case', case_ids)
+            prefetch_reference_existence(sf_cli_target, prefetched_cases.values(), case_fields)
+            
+            run_phase1_parallel(
+                lambda prod_id: create_case_phase1(prod_id, created_cases, sf_cli_source, sf_cli_target,
+                                                   dummy_records, script_dir, created_accounts, created_contacts,
+                                                   state=state, prefetched_record=prefetched_cases.get(prod_id)),
+                case_ids, config
+            )
         
         # ========== PHASE 2: UPDATE LOOKUPS ==========
+        # Phase 2 works from the migration CSVs, so cached source records are no longer needed
+        sf_cli_source.clear_record_cache()
+        # Push any migration rows still buffered in Phase 1 to disk
+        flush_migration_store()
+        # One summary line per object type for records Phase 1 could not create
+        report_failed_creates()
+        # Let queued Phase 1 output finish rendering before Phase 2 starts printing
+        flush_phase1_output()
+        
         console = Console()
         console.print()
         console.rule("[bold cyan]PHASE 2: UPDATING LOOKUPS WITH ACTUAL RELATIONSHIPS", style="cyan")
         console.print()
         
-        created_mappings = {
-            'Account': created_accounts,
-            'Contact': created_contacts,
-            'Opportunity': created_opportunities,
-            'Quote': created_quotes,
-            'QuoteLineItem': created_qlis,
-            'Order': created_orders,
-            'OrderItem': created_order_items,
-            'Case': created_cases,
-            'Product2': created_products,
-            'PricebookEntry': created_pbes,
-            'AccountRelationship': created_account_relationships
-        }
+        created_mappings = state.mappings
         
         # Update each object type
         update_lookups_phase2(sf_cli_source, sf_cli_target, script_dir, account_fields, created_mappings, 'Account', dummy_records)
@@ -515,13 +606,13 @@ def main():
             ('Contacts', len(created_contacts)),
             ('Opportunities', len(created_opportunities)),
             ('Quotes', len(created_quotes)),
-            ('Quote Line Items', len(created_qlis)),
+            ('Quote Line Items', len(state.created_qlis)),
             ('Orders', len(created_orders)),
-            ('Order Items', len(created_order_items)),
+            ('Order Items', len(state.created_order_items)),
             ('Cases', len(created_cases)),
-            ('Account Relationships', len(created_account_relationships)),
-            ('Products (reused)', len(created_products)),
-            ('Pricebook Entries (reused)', len(created_pbes)),
+            ('Account Relationships', len(state.created_account_relationships)),
+            ('Products (reused)', len(state.created_products)),
+            ('Pricebook Entries (reused)', len(state.created_pbes)),
         ]
         
         total = sum(count for _, count in summary_data)
@@ -1,5 +1,6 @@
 """Salesforce CLI wrapper and integrations."""
 
 from .salesforce_cli import SalesforceCLI
+from .bulk_api import BulkApiClient
 
-__all__ = ['SalesforceCLI']
+__all__ = ['SalesforceCLI', 'BulkApiClient']
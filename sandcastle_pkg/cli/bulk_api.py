@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Bulk API 2.0 REST Client
+
+Author: Ken Brill
+Version: 1.1.8
+Date: December 24, 2025
+License: MIT License
+
+Submits Bulk API 2.0 ingest jobs straight to the org's REST endpoints, using
+the session the sf CLI already holds (from 'sf org display'). Each job then
+costs a few HTTP requests on a kept-alive connection instead of starting the
+Node-based CLI, which re-authenticates on every call. Standard library only.
+"""
+
+import csv
+import http.client
+import io
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+# Bulk API 2.0 job states that end polling
+JOB_FINAL_STATES = ('JobComplete', 'Failed', 'Aborted')
+
+
+class BulkApiClient:
+    """
+    Minimal Bulk API 2.0 ingest client.
+
+    Connections are kept alive and held per thread, so concurrent jobs (e.g. the
+    chunked updates in bulk_update_records) never share one. An expired session
+    is refreshed once through refresh_session, which returns (instance_url,
+    access_token).
+
+    Usage:
+        client = sf_cli_target.bulk_api()
+        job = client.run_job('Contact', 'update', csv_bytes)
+    """
+
+    def __init__(self, instance_url: str, access_token: str, api_version: str = '59.0',
+                 refresh_session: Optional[Callable[[], tuple]] = None, timeout: float = 120):
+        self.api_version = api_version
+        self.timeout = timeout
+        self._refresh_session = refresh_session
+        self._local = threading.local()
+        self._set_session(instance_url, access_token)
+
+    def _set_session(self, instance_url, access_token):
+        self.instance_url = instance_url.rstrip('/')
+        self._host = urlsplit(self.instance_url).netloc
+        self._access_token = access_token
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPSConnection(self._host, timeout=self.timeout)
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _request(self, method: str, path: str, body=None, content_type: str = 'application/json',
+                 accept: str = 'application/json') -> bytes:
+        """Send one request, reconnecting once on a dropped keep-alive and refreshing once on 401."""
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode('utf-8')
+        refreshed = False
+        reconnected = False
+        while True:
+            headers = {
+                'Authorization': f'Bearer {self._access_token}',
+                'Content-Type': content_type,
+                'Accept': accept,
+            }
+            try:
+                conn = self._connection()
+                conn.request(method, f'/services/data/v{self.api_version}{path}', body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, ConnectionError) as e:
+                self._drop_connection()
+                if reconnected:
+                    raise RuntimeError(f"Bulk API request failed: {method} {path}: {e}") from e
+                reconnected = True
+                continue
+
+            if response.status == 401 and not refreshed and self._refresh_session:
+                refreshed = True
+                self._set_session(*self._refresh_session())
+                continue
+            if response.status >= 400:
+                raise RuntimeError(f"Bulk API {method} {path} failed ({response.status}): "
+                                   f"{data.decode('utf-8', 'replace')[:500]}")
+            return data
+
+    def create_job(self, sobject: str, operation: str, external_id: Optional[str] = None) -> str:
+        """Open an ingest job; returns its ID."""
+        job_spec = {'object': sobject, 'operation': operation, 'contentType': 'CSV', 'lineEnding': 'CRLF'}
+        if external_id:
+            job_spec['externalIdFieldName'] = external_id
+        return json.loads(self._request('POST', '/jobs/ingest', job_spec))['id']
+
+    def upload_job_data(self, job_id: str, csv_bytes: bytes) -> None:
+        """Upload the job's CSV (CRLF line endings, header row first)."""
+        self._request('PUT', f'/jobs/ingest/{job_id}/batches', csv_bytes, content_type='text/csv')
+
+    def close_job(self, job_id: str) -> None:
+        """Mark the upload complete so Salesforce starts processing."""
+        self._request('PATCH', f'/jobs/ingest/{job_id}', {'state': 'UploadComplete'})
+
+    def abort_job(self, job_id: str) -> None:
+        self._request('PATCH', f'/jobs/ingest/{job_id}', {'state': 'Aborted'})
+
+    def get_job(self, job_id: str) -> Dict[str, Any]:
+        return json.loads(self._request('GET', f'/jobs/ingest/{job_id}'))
+
+    def wait_for_job(self, job_id: str, timeout: float = 600, poll_interval: float = 2) -> Dict[str, Any]:
+        """
+        Poll until the job reaches a final state; returns the job info.
+        The interval backs off to 10s for long jobs. Raises RuntimeError on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get_job(job_id)
+            if job.get('state') in JOB_FINAL_STATES:
+                return job
+            if time.monotonic() >= deadline:
+                raise RuntimeError(f"Bulk job {job_id} still {job.get('state')} after {timeout:.0f}s")
+            time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 1.5, 10)
+
+    def successful_results_csv(self, job_id: str) -> bytes:
+        """The job's success file as raw CSV (sf__Id, sf__Created and the uploaded columns)."""
+        return self._request('GET', f'/jobs/ingest/{job_id}/successfulResults/', accept='text/csv')
+
+    def successful_results(self, job_id: str) -> List[Dict[str, str]]:
+        """Rows of the job's success file."""
+        data = self.successful_results_csv(job_id)
+        return list(csv.DictReader(io.StringIO(data.decode('utf-8'), newline='')))
+
+    def submit_job(self, sobject: str, operation: str, csv_bytes: bytes, external_id: Optional[str] = None) -> str:
+        """
+        Create, upload and close one job without waiting for it; returns its ID.
+        A job that fails before it is closed is aborted, so nothing was applied.
+        """
+        job_id = self.create_job(sobject, operation, external_id)
+        try:
+            self.upload_job_data(job_id, csv_bytes)
+            self.close_job(job_id)
+        except Exception:
+            try:
+                self.abort_job(job_id)
+            except Exception:
+                pass
+            raise
+        return job_id
+
+    def run_job(self, sobject: str, operation: str, csv_bytes: bytes, external_id: Optional[str] = None,
+                timeout: float = 600) -> Dict[str, Any]:
+        """Submit one job and wait for it; returns the final job info."""
+        job_id = self.submit_job(sobject, operation, csv_bytes, external_id)
+        return self.wait_for_job(job_id, timeout=timeout)
@@ -10,48 +10,119 @@ License: MIT License
 
 import subprocess
 import json
+import copy
+import functools
 import tempfile
 import csv
 import os
+import threading
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterator
+
+from sandcastle_pkg.cli.bulk_api import BulkApiClient
+
+# Largest exclusion set written into a SOQL NOT IN clause (larger sets are filtered client-side)
+MAX_SOQL_EXCLUDED_IDS = 800
+
+# Up to this many IDs, delete_records issues one delete per record; above it a
+# single Bulk API job is cheaper than the per-call CLI start-up cost
+BULK_DELETE_THRESHOLD = 5
 
 # Query log file path
 QUERY_LOG_FILE = Path(__file__).parent / "logs" / "queries.csv"
 
+# Environment shared by every `sf` subprocess, built once at import time.
+# Each CLI call is a fresh process, so skip the per-process work that does not
+# affect results (update/version checks, telemetry, release notes, log file).
+# Values already set by the user take precedence.
+SF_CLI_ENV = os.environ.copy()
+for _key, _value in (
+    ('SF_AUTOUPDATE_DISABLE', 'true'),
+    ('SF_SKIP_NEW_VERSION_CHECK', 'true'),
+    ('SF_DISABLE_TELEMETRY', 'true'),
+    ('SF_HIDE_RELEASE_NOTES', 'true'),
+    ('SF_DISABLE_LOG_FILE', 'true'),
+):
+    SF_CLI_ENV.setdefault(_key, _value)
+
+# The query log directory and header are set up once per run, not per query;
+# the lock also keeps rows from concurrent threads from interleaving
+_query_log_lock = threading.Lock()
+_query_log_ready = False
+
 def log_query(query: str, org_alias: str = "", cached: bool = False):
     """Log a SOQL query to CSV for duplicate detection and caching analysis"""
+    global _query_log_ready
     try:
-        QUERY_LOG_FILE.parent.mkdir(exist_ok=True)
-        file_exists = QUERY_LOG_FILE.exists()
-        
-        with open(QUERY_LOG_FILE, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            if not file_exists:
-                writer.writerow(['Timestamp', 'Org', 'Cached', 'Query'])
-            writer.writerow([datetime.now().isoformat(), org_alias, 'YES' if cached else 'NO', query])
+        with _query_log_lock:
+            if not _query_log_ready:
+                QUERY_LOG_FILE.parent.mkdir(exist_ok=True)
+                file_exists = QUERY_LOG_FILE.exists()
+            
+            with open(QUERY_LOG_FILE, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                if not _query_log_ready and not file_exists:
+                    writer.writerow(['Timestamp', 'Org', 'Cached', 'Query'])
+                writer.writerow([datetime.now().isoformat(), org_alias, 'YES' if cached else 'NO', query])
+            _query_log_ready = True
     except Exception:
         # Don't let logging failures break the migration
         pass
 
 class SalesforceCLI:
-    def __init__(self, target_org: Optional[str] = None):
+    def __init__(self, target_org: Optional[str] = None, cache_records: bool = False):
         """
         Initializes the SalesforceCLI wrapper, optionally targeting a specific Salesforce org.
+        With cache_records=True, get_record results are cached by (sobject, id); use it
+        for the read-only source org so records revisited across phases are fetched once.
         """
         self.target_org = target_org
         self._org_info_cache: Dict[str, Any] = {} # Cache org info per target_org
         self._query_cache: Dict[str, Optional[List[Dict[str, Any]]]] = {} # Cache for query results
+        self._get_record_cached = functools.lru_cache(maxsize=50_000)(self._fetch_record) if cache_records else None
+        self._record_type_id_cache: Dict[tuple, Optional[str]] = {}  # (sobject, DeveloperName) -> Id
+        self._record_types_loaded = False
+        self._bulk_api = None  # BulkApiClient once built; False if the session is unavailable
+        self._bulk_api_lock = threading.Lock()
+
+    def _read_session(self) -> tuple:
+        """(instanceUrl, accessToken, apiVersion) of the CLI's session for this org, read fresh."""
+        info = (self._execute_sf_command(['org', 'display']) or {}).get('result') or {}
+        if not info.get('instanceUrl') or not info.get('accessToken'):
+            raise RuntimeError("sf org display returned no instance URL / access token")
+        return info['instanceUrl'], info['accessToken'], info.get('apiVersion') or '59.0'
+
+    def bulk_api(self):
+        """
+        Bulk API 2.0 REST client for this org, built once from the session the CLI
+        already holds. Returns None when the session cannot be read, so callers
+        fall back to the 'sf data ... bulk' commands.
+        """
+        with self._bulk_api_lock:
+            if self._bulk_api is None:
+                try:
+                    instance_url, access_token, api_version = self._read_session()
+                    self._bulk_api = BulkApiClient(
+                        instance_url, access_token, api_version,
+                        refresh_session=lambda: self._read_session()[:2]
+                    )
+                except Exception as e:
+                    print(f"Bulk API REST client unavailable, using sf CLI bulk commands: {e}")
+                    self._bulk_api = False
+            return self._bulk_api or None
 
     def update_record(self, sobject_type: str, record_id: str, data: Dict[str, Any]) -> bool:
         """
         Updates a record in Salesforce using the CLI.
+        An 'Id' key in data is ignored, so Bulk API payloads can be passed as-is.
         Returns True if successful, False otherwise.
         """
         # Convert data dict to key=value pairs (space-separated, not comma-separated)
         value_pairs = []
         for key, value in data.items():
+            if key == 'Id':
+                continue
             # Handle string values with proper quoting
             if isinstance(value, str):
                 clean_value = value.replace('\n', ' ').replace('\r', '').replace("'", "")
@@ -86,7 +157,8 @@ class SalesforceCLI:
                 capture_output=True,
                 text=True,
                 check=False, # Do not raise CalledProcessError automatically
-                encoding='utf-8'
+                encoding='utf-8',
+                env=SF_CLI_ENV
             )
             
             json_output = {}
@@ -181,7 +253,53 @@ class SalesforceCLI:
     def get_record(self, sobject_type: str, record_id: str) -> Optional[Dict[str, Any]]:
         """
         Gets a single record by its ID using 'sf data get record'.
+        Served from the record cache when caching is enabled; callers get a copy,
+        so mutating the returned dict never changes the cached entry.
+        """
+        if self._get_record_cached is None:
+            return self._fetch_record(sobject_type, record_id)
+        record = self._get_record_cached(sobject_type, record_id)
+        return copy.copy(record) if record else record
+
+    def clear_record_cache(self) -> None:
+        """Drops all cached get_record results (e.g. between Phase 1 and Phase 2)."""
+        if self._get_record_cached is not None:
+            self._get_record_cached.cache_clear()
+
+    def get_records_bulk(self, sobject_type: str, record_ids: List[str], fields: Optional[List[str]] = None,
+                         chunk_size: int = 200) -> Dict[str, Dict[str, Any]]:
+        """
+        Gets many records by ID with one 'Id IN (...)' query per chunk instead of
+        one 'sf data get record' call per record.
+
+        Without fields, every field is selected (FIELDS(ALL), which Salesforce
+        limits to 200 rows per query), matching what get_record returns.
+        Results bypass the query cache, since each chunk is only read once.
+
+        Returns:
+            Dict mapping record ID -> record. IDs that were not found are absent.
         """
+        from sandcastle_pkg.utils.soql import soql_in_list
+        ids = list(dict.fromkeys(record_id for record_id in record_ids if record_id))
+        select = ', '.join(dict.fromkeys(['Id', *fields])) if fields else 'FIELDS(ALL)'
+        if not fields:
+            chunk_size = min(chunk_size, 200)
+
+        records = {}
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            query = f"SELECT {select} FROM {sobject_type} WHERE Id IN {soql_in_list(chunk)} LIMIT {len(chunk)}"
+            log_query(query, self.target_org or 'default', cached=False)
+            result = self._execute_sf_command(['data', 'query', '--query', query])
+            if not result or result.get('status') != 0:
+                print(f"Bulk get failed for {len(chunk)} {sobject_type} records. SF command result: {result}")
+                continue
+            for record in result.get('result', {}).get('records', []):
+                records[record['Id']] = record
+        return records
+
+    def _fetch_record(self, sobject_type: str, record_id: str) -> Optional[Dict[str, Any]]:
+        """Fetches a single record from the org without caching."""
         try:
             command_args = ['data', 'get', 'record', '--sobject', sobject_type, '--record-id', record_id]
             result = self._execute_sf_command(command_args)
@@ -203,9 +321,8 @@ class SalesforceCLI:
         cache_key = (sobject_type, name)
         if cache_key in self._get_record_by_name_cache:
             return self._get_record_by_name_cache[cache_key]
-        # Escape single quotes for SOQL (double them)
-        safe_name = name.replace("'", "''")
-        query = f"SELECT Id, Name FROM {sobject_type} WHERE Name = '{safe_name}' LIMIT 1"
+        from sandcastle_pkg.utils.soql import soql_literal
+        query = f"SELECT Id, Name FROM {sobject_type} WHERE Name = {soql_literal(name)} LIMIT 1"
         try:
             result = self._execute_sf_command(['data', 'query', '--query', query])
             if result and result.get('status') == 0 and result.get('result', {}).get('totalSize', 0) > 0:
@@ -218,46 +335,37 @@ class SalesforceCLI:
             print(f"Error retrieving {sobject_type} record by name '{name}'.")
             raise e
 
-    def get_record_type_info_by_id(self, record_type_id: str) -> Optional[Dict[str, Any]]:
+    def _load_record_types(self) -> None:
         """
-        Gets the DeveloperName for a given RecordType ID, with in-memory caching.
+        Fills the RecordType cache from one query of every RecordType in the org,
+        so each RecordType referenced across objects costs no round-trip of its own.
+        Runs once; RecordTypes it did not return still fall back to their own query.
         """
-        if not hasattr(self, '_record_type_info_by_id_cache'):
-            self._record_type_info_by_id_cache = {}
-        if not record_type_id:
-            return None
-        if record_type_id in self._record_type_info_by_id_cache:
-            return self._record_type_info_by_id_cache[record_type_id]
-        query = f"SELECT DeveloperName FROM RecordType WHERE Id = '{record_type_id}'"
-        try:
-            result = self._execute_sf_command(['data', 'query', '--query', query])
-            if result and result.get('status') == 0 and result.get('result', {}).get('totalSize', 0) > 0:
-                record = result['result']['records'][0]
-                self._record_type_info_by_id_cache[record_type_id] = record
-                return record
-            else:
-                print(f"RecordType info not found for ID '{record_type_id}'.")
-                self._record_type_info_by_id_cache[record_type_id] = None
-                return None
-        except Exception as e:
-            print(f"Error retrieving RecordType info for ID '{record_type_id}'.")
-            raise e
+        if self._record_types_loaded:
+            return
+        self._record_types_loaded = True
+        query = "SELECT Id, DeveloperName, SobjectType FROM RecordType"
+        log_query(query, self.target_org or 'default', cached=False)
+        result = self._execute_sf_command(['data', 'query', '--query', query])
+        if not result or result.get('status') != 0:
+            return
+        for record in result.get('result', {}).get('records', []):
+            self._record_type_id_cache.setdefault((record['SobjectType'], record['DeveloperName']), record['Id'])
 
     def get_record_type_id(self, sobject_type: str, developer_name: str) -> Optional[str]:
         """
         Retrieves the RecordTypeId for a given sObject type and DeveloperName, with in-memory caching.
         """
-        if not hasattr(self, '_record_type_id_cache'):
-            self._record_type_id_cache = {}
         if not developer_name:
             print(f"DeveloperName is missing. Cannot query RecordType Id for {sobject_type}.")
             return None
         cache_key = (sobject_type, developer_name)
+        if cache_key not in self._record_type_id_cache:
+            self._load_record_types()
         if cache_key in self._record_type_id_cache:
             return self._record_type_id_cache[cache_key]
-        # Escape single quotes for SOQL (double them)
-        safe_developer_name = developer_name.replace("'", "''")
-        query = f"SELECT Id FROM RecordType WHERE SobjectType='{sobject_type}' AND DeveloperName='{safe_developer_name}'"
+        from sandcastle_pkg.utils.soql import soql_literal
+        query = f"SELECT Id FROM RecordType WHERE SobjectType={soql_literal(sobject_type)} AND DeveloperName={soql_literal(developer_name)}"
         try:
             result = self._execute_sf_command(['data', 'query', '--query', query])
             if result and result.get('status') == 0 and result.get('result', {}).get('totalSize', 0) > 0:
@@ -317,6 +425,62 @@ class SalesforceCLI:
             print(f"\n--- PROBLEMATIC VALUES STRING ---\n{values_str}\n---------------------------------\n")
             raise e
 
+    def create_records_tree(self, sobject_type: str, records: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """
+        Creates up to 200 records in a single request using the sObject Tree API
+        (sf data import tree). Returns the new IDs in the same order as `records`.
+        The request is all-or-none: raises RuntimeError if any record fails, in
+        which case nothing was created.
+        """
+        if not records:
+            return []
+
+        tree_records = []
+        for index, data in enumerate(records):
+            tree_record = {'attributes': {'type': sobject_type, 'referenceId': f'ref{index}'}}
+            for key, value in data.items():
+                # Match create_record: skip None and empty/hyphen strings (except Name)
+                if value is None:
+                    continue
+                if isinstance(value, str) and (value == '' or value == '-') and key != 'Name':
+                    continue
+                tree_record[key] = value
+            tree_records.append(tree_record)
+
+        ids_by_ref = self.import_tree({sobject_type: tree_records})
+        return [ids_by_ref.get(f'ref{index}') for index in range(len(records))]
+
+    def import_tree(self, records_by_type: Dict[str, List[Dict[str, Any]]]) -> Dict[str, str]:
+        """
+        Imports sObject Tree records in one 'sf data import tree' call, one tree file
+        per top-level object type. Records carry their own
+        {'attributes': {'type', 'referenceId'}} and may nest child records under a
+        relationship name (e.g. 'Contacts': {'records': [...]}), so dependent
+        records are created together with their parent.
+        Each file is all-or-none; raises RuntimeError if any record fails.
+
+        Returns:
+            Dict mapping referenceId -> new record ID
+        """
+        tree_file_paths = []
+        try:
+            for sobject_type, tree_records in records_by_type.items():
+                fd, tree_file_path = tempfile.mkstemp(suffix='.json', prefix=f'{sobject_type}_tree_')
+                tree_file_paths.append(tree_file_path)
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({'records': tree_records}, f)
+            if not tree_file_paths:
+                return {}
+            result = self._execute_sf_command(['data', 'import', 'tree', '--files', *tree_file_paths])
+        finally:
+            for tree_file_path in tree_file_paths:
+                os.remove(tree_file_path)
+
+        ids_by_ref = {}
+        for item in (result or {}).get('result') or []:
+            ids_by_ref[item.get('refId')] = item.get('id')
+        return ids_by_ref
+
     def delete_record(self, sobject_type: str, record_id: str) -> bool:
         """
         Deletes a Salesforce record by its ID.
@@ -329,16 +493,73 @@ class SalesforceCLI:
             print(f"Error deleting {sobject_type} record with ID {record_id}: {e}")
             return False
 
+    def delete_records(self, sobject_type: str, record_ids: List[str], hard_delete: bool = False) -> Dict[str, int]:
+        """
+        Deletes the given records. Up to BULK_DELETE_THRESHOLD records go through
+        delete_record; more go to one Bulk API delete job ('sf data delete bulk')
+        instead of one CLI call per record.
+
+        Args:
+            sobject_type: The Salesforce object type
+            record_ids: IDs to delete
+            hard_delete: Skip the Recycle Bin for bulk jobs. Needs the "Bulk API
+                Hard Delete" permission; without it the job is retried as a
+                regular delete.
+
+        Returns:
+            Dict with 'deleted' and 'failed' counts
+        """
+        ids = list(dict.fromkeys(record_id for record_id in record_ids if record_id))
+        if not ids:
+            return {'deleted': 0, 'failed': 0}
+        if len(ids) <= BULK_DELETE_THRESHOLD:
+            deleted = sum(self.delete_record(sobject_type, record_id) for record_id in ids)
+            return {'deleted': deleted, 'failed': len(ids) - deleted}
+
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, newline='', suffix='.csv') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['Id'])
+            writer.writerows([record_id] for record_id in ids)
+            temp_csv_path = csvfile.name
+        command = ['data', 'delete', 'bulk', '--sobject', sobject_type, '--file', temp_csv_path, '--wait', '10']
+        try:
+            try:
+                result = self._execute_sf_command(command + (['--hard-delete'] if hard_delete else []))
+            except Exception as e:
+                if not hard_delete:
+                    raise
+                print(f"Hard delete of {sobject_type} records failed ({e}); retrying as a regular delete")
+                result = self._execute_sf_command(command)
+        except Exception as e:
+            print(f"Error bulk deleting {len(ids)} {sobject_type} records: {e}")
+            return {'deleted': 0, 'failed': len(ids)}
+        finally:
+            os.remove(temp_csv_path)
+
+        # Newer CLI versions report processed/failed records at the top level, older ones in jobInfo
+        job = (result or {}).get('result') or {}
+        job = job.get('jobInfo', job)
+        failed = int(job.get('numberRecordsFailed', job.get('failedRecords', 0)) or 0)
+        print(f"Bulk deleted {len(ids) - failed} of {len(ids)} {sobject_type} records")
+        return {'deleted': len(ids) - failed, 'failed': failed}
+
     def bulk_delete_records(self, sobject_type: str, excluded_ids: set = None) -> dict:
         """
         Bulk deletes all records of the given sObject type using sf force data bulk delete.
         
         Args:
             sobject_type: The Salesforce object type to delete records from
-            excluded_ids: Set of record IDs to exclude from deletion
+            excluded_ids: Set of record IDs (15 or 18 characters) to exclude from deletion
         """
-        # Step 1: Query all record IDs
+        # Compare on the case-sensitive 15-character ID; the 18-character suffix is only a checksum
+        excluded = frozenset(record_id[:15] for record_id in excluded_ids) if excluded_ids else frozenset()
+
+        # Step 1: Query all record IDs, leaving small exclusion sets out server-side
         query = f"SELECT Id FROM {sobject_type}"
+        if excluded and len(excluded) <= MAX_SOQL_EXCLUDED_IDS:
+            from sandcastle_pkg.utils.soql import soql_in_list
+            query += f" WHERE Id NOT IN {soql_in_list(sorted(excluded))}"
+            print(f"  Excluding {len(excluded)} protected record(s) from deletion")
         result = self._execute_sf_command(['data', 'query', '--query', query, '--json'])
         if not result or result.get('status') != 0:
             return {'success': False, 'message': f"Failed to query {sobject_type} records."}
@@ -346,9 +567,9 @@ class SalesforceCLI:
         records = result['result']['records']
         
         # Filter out excluded IDs
-        if excluded_ids:
+        if excluded and len(excluded) > MAX_SOQL_EXCLUDED_IDS:
             original_count = len(records)
-            records = [rec for rec in records if rec['Id'] not in excluded_ids]
+            records = [rec for rec in records if rec['Id'][:15] not in excluded]
             excluded_count = original_count - len(records)
             if excluded_count > 0:
                 print(f"  Excluding {excluded_count} protected record(s) from deletion")
@@ -358,10 +579,9 @@ class SalesforceCLI:
 
         # Step 2: Write IDs to a temporary CSV file
         with tempfile.NamedTemporaryFile(mode='w', delete=False, newline='', suffix='.csv') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=['Id'])
-            writer.writeheader()
-            for rec in records:
-                writer.writerow({'Id': rec['Id']})
+            writer = csv.writer(csvfile)
+            writer.writerow(('Id',))
+            writer.writerows((rec['Id'],) for rec in records)
             temp_csv_path = csvfile.name
 
         # Step 3: Run the correct bulk delete command
@@ -388,6 +608,7 @@ class SalesforceCLI:
                 text=True, 
                 timeout=660,  # 11 minute timeout
                 cwd=str(logs_dir),
+                env=SF_CLI_ENV,
                 stdout=subprocess.DEVNULL,  # Suppress verbose batch status output
                 stderr=subprocess.PIPE  # Capture errors only
             )
@@ -437,6 +658,26 @@ class SalesforceCLI:
             self._query_cache[query] = [] # Cache empty result for errored queries too
             raise e
 
+    def query_records_iter(self, query: str) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the records of a SOQL query one at a time, for callers that only
+        reduce the rows (e.g. to ID sets). A cached result is reused; otherwise
+        the rows are not added to the query cache and each one is released as
+        soon as it has been yielded.
+        """
+        if query in self._query_cache:
+            log_query(query, self.target_org or 'default', cached=True)
+            yield from self._query_cache[query] or []
+            return
+
+        log_query(query, self.target_org or 'default', cached=False)
+        result = self._execute_sf_command(['data', 'query', '--query', query])
+        records = (result or {}).get('result', {}).get('records') or []
+        del result
+        records.reverse()
+        while records:
+            yield records.pop()
+
     def bulk_delete_all_records(self, sobject_type: str, excluded_ids: set = None) -> bool:
         """
         Bulk deletes all records of a given sObject type using the Salesforce CLI bulk delete command.
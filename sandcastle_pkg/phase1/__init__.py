@@ -4,13 +4,23 @@ from .dummy_records import create_dummy_records
 from .delete_existing_records import delete_existing_records
 from .create_account_phase1 import create_account_phase1
 from .create_contact_phase1 import create_contact_phase1
-from .create_opportunity_phase1 import create_opportunity_phase1
+from .create_opportunity_phase1 import (
+    create_opportunity_phase1,
+    create_opportunities_phase1_batch,
+    partition_pending
+)
+from .migration_state import MigrationState
 from .create_other_objects_phase1 import (
     create_quote_phase1,
     create_quote_line_item_phase1,
     create_order_phase1,
     create_order_item_phase1,
-    create_case_phase1
+    create_case_phase1,
+    set_phase1_verbose,
+    flush_phase1_output,
+    build_schema_cache,
+    report_failed_creates,
+    clear_failed_creates
 )
 
 __all__ = [
@@ -19,9 +29,17 @@ __all__ = [
     'create_account_phase1',
     'create_contact_phase1',
     'create_opportunity_phase1',
+    'create_opportunities_phase1_batch',
+    'partition_pending',
+    'MigrationState',
     'create_quote_phase1',
     'create_quote_line_item_phase1',
     'create_order_phase1',
     'create_order_item_phase1',
-    'create_case_phase1'
+    'create_case_phase1',
+    'set_phase1_verbose',
+    'flush_phase1_output',
+    'build_schema_cache',
+    'report_failed_creates',
+    'clear_failed_creates'
 ]
@@ -10,14 +10,24 @@ License: MIT License
 Phase 1: Creates Account with dummy lookups.
 No dependency resolution - just create and save to CSV.
 """
-import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from rich.console import Console
 from rich.panel import Panel
-from sandcastle_pkg.utils.record_utils import filter_record_data, replace_lookups_with_dummies
-from sandcastle_pkg.utils.csv_utils import write_record_to_csv
+from sandcastle_pkg.utils.record_utils import filter_record_data, replace_lookups_with_dummies, extract_duplicate_id, DUPLICATE_VALUE_MARKER, prefetch_all_records
+from sandcastle_pkg.utils.migration_store import save_migration_record
 
 console = Console()
 
+# Maximum number of dependent Accounts created concurrently for one record
+MAX_DEPENDENT_WORKERS = 4
+
+# Single-writer guard for created_accounts, the migration CSV and the in-flight set
+_created_accounts_lock = threading.Lock()
+
+# Production Account IDs currently being created (breaks dependency cycles)
+_in_flight_accounts = set()
+
 
 def create_account_phase1(prod_account_id, created_accounts, account_insertable_fields_info, 
                           sf_cli_source, sf_cli_target, dummy_records, script_dir, 
@@ -41,10 +51,69 @@ def create_account_phase1(prod_account_id, created_accounts, account_insertable_
         str: Sandbox Account ID or None
     """
     # Skip if already created
-    if prod_account_id in created_accounts:
-        console.print(f"  [dim]Account {prod_account_id} already created as {created_accounts[prod_account_id]}[/dim]")
-        return created_accounts[prod_account_id]
+    if (existing_id := created_accounts.get(prod_account_id)) is not None:
+        console.print(f"  [dim]Account {prod_account_id} already created as {existing_id}[/dim]")
+        return existing_id
+    
+    # Skip if this Account is already being created further up the dependency chain
+    with _created_accounts_lock:
+        # Check again under the lock: another worker may have finished it (and left
+        # _in_flight_accounts) since the unlocked check above
+        if (existing_id := created_accounts.get(prod_account_id)) is not None:
+            return existing_id
+        if prod_account_id in _in_flight_accounts:
+            console.print(f"  [dim]Account {prod_account_id} is already being created, skipping[/dim]")
+            return None
+        _in_flight_accounts.add(prod_account_id)
     
+    try:
+        return _create_account(prod_account_id, created_accounts, account_insertable_fields_info,
+                               sf_cli_source, sf_cli_target, dummy_records, script_dir,
+                               prefetched_record, all_prefetched_accounts, progress_index, total_count)
+    finally:
+        with _created_accounts_lock:
+            _in_flight_accounts.discard(prod_account_id)
+
+
+def _fetch_dependents_parallel(dependent_ids, created_accounts, account_insertable_fields_info,
+                               sf_cli_source, sf_cli_target, dummy_records, script_dir,
+                               all_prefetched_accounts=None):
+    """
+    Create dependent Accounts concurrently. They are independent of each other
+    until the parent record is created, so their fetch/create round-trips overlap.
+    """
+    # Fetch any dependents that were not part of the prefetched set in one query
+    missing_ids = [dependent_id for dependent_id in dependent_ids
+                   if not all_prefetched_accounts or dependent_id not in all_prefetched_accounts]
+    if missing_ids:
+        fetched = prefetch_all_records('Account', missing_ids, account_insertable_fields_info, sf_cli_source)
+        if fetched:
+            all_prefetched_accounts = {**(all_prefetched_accounts or {}), **fetched}
+    
+    def create_dependent(dependent_account_id):
+        # Check if we have this account prefetched
+        dependent_prefetched = None
+        if all_prefetched_accounts and dependent_account_id in all_prefetched_accounts:
+            dependent_prefetched = all_prefetched_accounts[dependent_account_id]
+        return create_account_phase1(dependent_account_id, created_accounts, account_insertable_fields_info,
+                                     sf_cli_source, sf_cli_target, dummy_records, script_dir,
+                                     prefetched_record=dependent_prefetched,
+                                     all_prefetched_accounts=all_prefetched_accounts)
+    
+    if len(dependent_ids) == 1:
+        create_dependent(dependent_ids[0])
+        return
+    
+    with ThreadPoolExecutor(max_workers=min(MAX_DEPENDENT_WORKERS, len(dependent_ids))) as executor:
+        futures = [executor.submit(create_dependent, dependent_id) for dependent_id in dependent_ids]
+        for future in futures:
+            future.result()
+
+
+def _create_account(prod_account_id, created_accounts, account_insertable_fields_info,
+                    sf_cli_source, sf_cli_target, dummy_records, script_dir,
+                    prefetched_record, all_prefetched_accounts, progress_index, total_count):
+    """Create a single Account (and its dependents) once it has been claimed as in-flight."""
     # Display progress counter if available
     if progress_index is not None and total_count is not None:
         console.rule(f"[bold cyan][PHASE 1] [{progress_index} of {total_count}] Creating Account {prod_account_id}")
@@ -65,21 +134,19 @@ def create_account_phase1(prod_account_id, created_accounts, account_insertable_
     original_record = prod_account_record.copy()
     
     # RECURSIVE: Create any Account lookups first (e.g., Primary_Partner__c, ParentId)
+    dependent_ids = []
     for field_name, field_info in account_insertable_fields_info.items():
         if field_info['type'] == 'reference' and field_info['referenceTo'] == 'Account':
             dependent_account_id = original_record.get(field_name)
             if dependent_account_id and not isinstance(dependent_account_id, dict):
-                # Recursively create the dependent Account
-                if dependent_account_id not in created_accounts:
+                if dependent_account_id not in created_accounts and dependent_account_id not in dependent_ids:
                     console.print(f"  [yellow][DEPENDENCY] Account {prod_account_id} needs {field_name} → {dependent_account_id}[/yellow]")
-                    # Check if we have this account prefetched
-                    dependent_prefetched = None
-                    if all_prefetched_accounts and dependent_account_id in all_prefetched_accounts:
-                        dependent_prefetched = all_prefetched_accounts[dependent_account_id]
-                    create_account_phase1(dependent_account_id, created_accounts, account_insertable_fields_info,
-                                        sf_cli_source, sf_cli_target, dummy_records, script_dir,
-                                        prefetched_record=dependent_prefetched,
-                                        all_prefetched_accounts=all_prefetched_accounts)
+                    dependent_ids.append(dependent_account_id)
+    
+    if dependent_ids:
+        _fetch_dependents_parallel(dependent_ids, created_accounts, account_insertable_fields_info,
+                                   sf_cli_source, sf_cli_target, dummy_records, script_dir,
+                                   all_prefetched_accounts)
     
     # Capture processing output
     with console.capture() as capture:
@@ -115,10 +182,11 @@ def create_account_phase1(prod_account_id, created_accounts, account_insertable_
         sandbox_account_id = sf_cli_target.create_record('Account', filtered_data)
         if sandbox_account_id:
             console.print(f"[green]✓ Successfully created Account with ID: {sandbox_account_id}[/green]\n")
-            created_accounts[prod_account_id] = sandbox_account_id
-            
-            # Save to CSV for Phase 2
-            write_record_to_csv('Account', prod_account_id, sandbox_account_id, original_record, script_dir)
+            with _created_accounts_lock:
+                created_accounts[prod_account_id] = sandbox_account_id
+                
+                # Save to CSV for Phase 2
+                save_migration_record('Account', prod_account_id, sandbox_account_id, original_record, script_dir)
             
             return sandbox_account_id
         else:
@@ -130,16 +198,16 @@ def create_account_phase1(prod_account_id, created_accounts, account_insertable_
         console.print(f"[red]✗ Error creating Account {prod_account_id}: {error_msg}[/red]\n")
         
         # Check for duplicate error with existing ID
-        if "duplicate value found" in error_msg and "with id:" in error_msg:
-            match = re.search(r'with id:\s*([a-zA-Z0-9]{15,18})', error_msg)
-            if match:
-                existing_id = match.group(1)
+        if DUPLICATE_VALUE_MARKER in error_msg:
+            existing_id = extract_duplicate_id(error_msg)
+            if existing_id:
                 # Validate it looks like a Salesforce ID (starts with '0')
-                if existing_id.startswith('0'):
+                if existing_id[0] == '0':
                     console.print(f"  [blue]ℹ Found existing Account {existing_id}, using it[/blue]")
-                    created_accounts[prod_account_id] = existing_id
-                    # Save to CSV for Phase 2 updates
-                    write_record_to_csv('Account', prod_account_id, existing_id, original_record, script_dir)
+                    with _created_accounts_lock:
+                        created_accounts[prod_account_id] = existing_id
+                        # Save to CSV for Phase 2 updates
+                        save_migration_record('Account', prod_account_id, existing_id, original_record, script_dir)
                     return existing_id
 
         return None
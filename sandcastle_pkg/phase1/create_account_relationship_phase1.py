@@ -10,10 +10,10 @@ License: MIT License
 Phase 1: Creates AccountRelationship with dummy lookups or real Account IDs if available.
 AccountRelationship connects two Accounts with a relationship type.
 """
-import re
-from sandcastle_pkg.utils.record_utils import filter_record_data, replace_lookups_with_dummies, load_insertable_fields
-from sandcastle_pkg.utils.csv_utils import write_record_to_csv
+from sandcastle_pkg.utils.record_utils import filter_record_data, replace_lookups_with_dummies, extract_duplicate_id, load_insertable_fields
+from sandcastle_pkg.utils.migration_store import save_migration_record
 from sandcastle_pkg.phase1.create_guest_user_contact import ensure_guest_user_contact
+from sandcastle_pkg.phase1.create_account_phase1 import create_account_phase1
 
 # Global flag to track if Person Accounts are enabled
 _person_accounts_enabled = None
@@ -42,7 +42,8 @@ def check_person_accounts_enabled(sf_cli):
 
 
 def create_account_relationship_phase1(prod_relationship_id, created_relationships, relationship_insertable_fields_info,
-                                      sf_cli_source, sf_cli_target, dummy_records, script_dir, created_accounts, created_contacts):
+                                      sf_cli_source, sf_cli_target, dummy_records, script_dir, created_accounts, created_contacts,
+                                      prefetched_record=None):
     """
     Phase 1: Create AccountRelationship with Account lookups.
     Recursively creates referenced accounts if they don't exist yet.
@@ -58,25 +59,25 @@ def create_account_relationship_phase1(prod_relationship_id, created_relationshi
         script_dir: Script directory for CSV storage
         created_accounts: Dictionary of created Account mappings
         created_contacts: Dictionary of created Contact mappings
+        prefetched_record: Optional pre-fetched relationship record (to avoid API call)
         
     Returns:
         str: Sandbox AccountRelationship ID or None
     """
     # Skip if already created
-    if prod_relationship_id in created_relationships:
-        print(f"  AccountRelationship {prod_relationship_id} already created as {created_relationships[prod_relationship_id]}")
-        return created_relationships[prod_relationship_id]
+    if (existing_id := created_relationships.get(prod_relationship_id)) is not None:
+        print(f"  AccountRelationship {prod_relationship_id} already created as {existing_id}")
+        return existing_id
     
     print(f"\n[PHASE 1] Creating AccountRelationship {prod_relationship_id}")
     
-    # Fetch from source
-    prod_relationship_record = sf_cli_source.get_record('AccountRelationship', prod_relationship_id)
+    # Use prefetched record if available, otherwise fetch from source
+    prod_relationship_record = prefetched_record or sf_cli_source.get_record('AccountRelationship', prod_relationship_id)
     if not prod_relationship_record:
         print(f"  ✗ Could not fetch AccountRelationship {prod_relationship_id} from source org")
         return None
     
     # Ensure both AccountFromId and AccountToId exist in sandbox
-    from create_account_phase1 import create_account_phase1
     account_fields = load_insertable_fields('Account', script_dir)
     
     account_from_id = prod_relationship_record.get('AccountFromId')
@@ -145,7 +146,8 @@ def create_account_relationship_phase1(prod_relationship_id, created_relationshi
         created_mappings,
         sf_cli_source,
         sf_cli_target,
-        'AccountRelationship'
+        'AccountRelationship',
+        in_place=True  # original_record above is already a separate copy
     )
     
     # Filter to insertable fields
@@ -168,7 +170,7 @@ def create_account_relationship_phase1(prod_relationship_id, created_relationshi
                 existing_id = existing_rels[0]['Id']
                 print(f"  ℹ AccountRelationship already exists in sandbox: {existing_id}")
                 created_relationships[prod_relationship_id] = existing_id
-                write_record_to_csv('AccountRelationship', prod_relationship_id, existing_id, original_record, script_dir)
+                save_migration_record('AccountRelationship', prod_relationship_id, existing_id, original_record, script_dir)
                 return existing_id
         except Exception as check_error:
             print(f"  [WARN] Could not check for existing relationship: {check_error}")
@@ -181,7 +183,7 @@ def create_account_relationship_phase1(prod_relationship_id, created_relationshi
             created_relationships[prod_relationship_id] = sandbox_relationship_id
             
             # Save to CSV for Phase 2
-            write_record_to_csv('AccountRelationship', prod_relationship_id, sandbox_relationship_id, original_record, script_dir)
+            save_migration_record('AccountRelationship', prod_relationship_id, sandbox_relationship_id, original_record, script_dir)
             
             return sandbox_relationship_id
         else:
@@ -195,14 +197,13 @@ def create_account_relationship_phase1(prod_relationship_id, created_relationshi
         # Check for duplicate error patterns
         if "duplicate value found" in error_msg.lower() or "duplicate" in error_msg.lower():
             # Try to extract existing ID from error message
-            match = re.search(r'with id:\s*([a-zA-Z0-9]{15,18})', error_msg)
-            if match:
-                existing_id = match.group(1)
+            existing_id = extract_duplicate_id(error_msg)
+            if existing_id:
                 # Validate it looks like a Salesforce ID (starts with '0')
-                if existing_id.startswith('0'):
+                if existing_id[0] == '0':
                     print(f"  ℹ Found existing AccountRelationship {existing_id}, using it")
                     created_relationships[prod_relationship_id] = existing_id
-                    write_record_to_csv('AccountRelationship', prod_relationship_id, existing_id, original_record, script_dir)
+                    save_migration_record('AccountRelationship', prod_relationship_id, existing_id, original_record, script_dir)
                     return existing_id
             # If no valid ID extracted from error, try to find existing relationship by querying
             try:
@@ -215,7 +216,7 @@ def create_account_relationship_phase1(prod_relationship_id, created_relationshi
                         existing_id = existing[0]['Id']
                         print(f"  ℹ Found existing AccountRelationship by query: {existing_id}")
                         created_relationships[prod_relationship_id] = existing_id
-                        write_record_to_csv('AccountRelationship', prod_relationship_id, existing_id, original_record, script_dir)
+                        save_migration_record('AccountRelationship', prod_relationship_id, existing_id, original_record, script_dir)
                         return existing_id
             except Exception as query_error:
                 print(f"  Could not query for existing relationship: {query_error}")
@@ -10,17 +10,17 @@ License: MIT License
 Phase 1: Creates Contact with dummy lookups.
 No dependency resolution - just create and save to CSV.
 """
-import re
 from rich.console import Console
 from rich.panel import Panel
-from sandcastle_pkg.utils.record_utils import filter_record_data, replace_lookups_with_dummies
-from sandcastle_pkg.utils.csv_utils import write_record_to_csv
+from sandcastle_pkg.utils.record_utils import filter_record_data, replace_lookups_with_dummies, extract_duplicate_id, DUPLICATE_VALUE_MARKER
+from sandcastle_pkg.utils.migration_store import save_migration_record
 
 console = Console()
 
 
 def create_contact_phase1(prod_contact_id, created_contacts, contact_insertable_fields_info,
-                         sf_cli_source, sf_cli_target, dummy_records, script_dir, created_accounts=None):
+                         sf_cli_source, sf_cli_target, dummy_records, script_dir, created_accounts=None,
+                         prefetched_record=None):
     """
     Phase 1: Create Contact with dummy AccountId, save to CSV for Phase 2 update.
     
@@ -32,19 +32,21 @@ def create_contact_phase1(prod_contact_id, created_contacts, contact_insertable_
         sf_cli_target: Target org CLI
         dummy_records: Dictionary of dummy record IDs by object type
         script_dir: Script directory for CSV storage
+        created_accounts: Dictionary of created Account mappings
+        prefetched_record: Optional pre-fetched contact record (to avoid API call)
         
     Returns:
         str: Sandbox Contact ID or None
     """
     # Skip if already created
-    if prod_contact_id in created_contacts:
-        console.print(f"  [dim]Contact {prod_contact_id} already created as {created_contacts[prod_contact_id]}[/dim]")
-        return created_contacts[prod_contact_id]
+    if (existing_id := created_contacts.get(prod_contact_id)) is not None:
+        console.print(f"  [dim]Contact {prod_contact_id} already created as {existing_id}[/dim]")
+        return existing_id
     
     console.rule(f"[bold cyan][PHASE 1] Creating Contact {prod_contact_id}")
     
-    # Fetch from source
-    prod_contact_record = sf_cli_source.get_record('Contact', prod_contact_id)
+    # Use prefetched record if available, otherwise fetch from source
+    prod_contact_record = prefetched_record or sf_cli_source.get_record('Contact', prod_contact_id)
     if not prod_contact_record:
         console.print(f"[red]✗ Could not fetch Contact {prod_contact_id} from source org[/red]\n")
         return None
@@ -89,7 +91,7 @@ def create_contact_phase1(prod_contact_id, created_contacts, contact_insertable_
             created_contacts[prod_contact_id] = sandbox_contact_id
             
             # Save to CSV for Phase 2
-            write_record_to_csv('Contact', prod_contact_id, sandbox_contact_id, original_record, script_dir)
+            save_migration_record('Contact', prod_contact_id, sandbox_contact_id, original_record, script_dir)
             
             return sandbox_contact_id
         else:
@@ -101,16 +103,15 @@ def create_contact_phase1(prod_contact_id, created_contacts, contact_insertable_
         console.print(f"[red]✗ Error creating Contact {prod_contact_id}: {error_msg}[/red]\n")
         
         # Check for duplicate
-        if "duplicate value found" in error_msg and "with id:" in error_msg:
-            match = re.search(r'with id:\s*([a-zA-Z0-9]{15,18})', error_msg)
-            if match:
-                existing_id = match.group(1)
+        if DUPLICATE_VALUE_MARKER in error_msg:
+            existing_id = extract_duplicate_id(error_msg)
+            if existing_id:
                 # Validate it looks like a Salesforce ID (starts with '0')
-                if existing_id.startswith('0'):
+                if existing_id[0] == '0':
                     console.print(f"  [blue]ℹ Found existing Contact {existing_id}, using it[/blue]")
                     created_contacts[prod_contact_id] = existing_id
                     # Save to CSV for Phase 2
-                    write_record_to_csv('Contact', prod_contact_id, existing_id, original_record, script_dir)
+                    save_migration_record('Contact', prod_contact_id, existing_id, original_record, script_dir)
                     return existing_id
 
         return None
@@ -10,15 +10,51 @@ License: MIT License
 Creates Contact/User pairs for guest portal access required by AccountRelationships.
 Each account involved in AccountRelationships needs at least one Contact with an associated guest User.
 """
-import random
-import string
+import hashlib
+
+from sandcastle_pkg.utils.soql import soql_literal
 
 # Track which accounts already have guest user contacts
 _accounts_with_guest_users = set()
 
-def generate_random_string(length=10):
-    """Generate a random alphanumeric string"""
-    return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
+# Guest portal profile per target org: (profile_id, profile_name) or None
+_guest_profile_cache = {}
+
+def get_portal_id(account_id):
+    """
+    Derive a deterministic portal ID from the sandbox Account ID.
+    Re-running the migration produces the same Contact email and User username,
+    so a resumed run finds the records it already created instead of colliding
+    on randomly generated values.
+    """
+    return hashlib.blake2b(account_id.encode(), digest_size=5).hexdigest()
+
+def _get_guest_profile(sf_cli_target):
+    """Look up the guest portal profile once per target org."""
+    cache_key = sf_cli_target.target_org
+    if cache_key in _guest_profile_cache:
+        return _guest_profile_cache[cache_key]
+    
+    # Get a Profile with 'Overage Customer Portal Manager Standard' license
+    # First try to find the exact profile that was used in the example
+    profile_query = """
+        SELECT Id, Name, UserLicense.Name 
+        FROM Profile 
+        WHERE UserLicense.Name = 'Overage Customer Portal Manager Standard' 
+        LIMIT 1
+    """
+    profile = None
+    profile_result = sf_cli_target.query_records(profile_query)
+    if not profile_result or len(profile_result) == 0:
+        print(f"  [ERROR] Could not find profile with 'Overage Customer Portal Manager Standard' license")
+        # Try alternate query without UserLicense.Name
+        profile_query = "SELECT Id FROM Profile WHERE Name = 'Guest User - Public Portals' LIMIT 1"
+        profile_result = sf_cli_target.query_records(profile_query)
+    if profile_result and len(profile_result) > 0:
+        profile = (profile_result[0]['Id'], profile_result[0].get('Name', 'Unknown'))
+    
+    _guest_profile_cache[cache_key] = profile
+    return profile
 
 def ensure_guest_user_contact(account_id, sf_cli_target, created_contacts, script_dir):
     """
@@ -61,8 +97,8 @@ def ensure_guest_user_contact(account_id, sf_cli_target, created_contacts, scrip
     # Create new guest user contact
     print(f"  [GUEST USER] Creating guest user Contact for Account {account_id}")
     
-    # Generate random data for Sangoma fields
-    portal_id = random.randint(1000, 9999)
+    # Deterministic data for Sangoma fields (stable across re-runs)
+    portal_id = get_portal_id(account_id)
     
     # Get account info for contact name
     try:
@@ -80,9 +116,9 @@ def ensure_guest_user_contact(account_id, sf_cli_target, created_contacts, scrip
         'AccountId': account_id,
         'FirstName': 'Guest',
         'LastName': f'{account_name[:30]} Portal',  # Truncate to avoid length issues
-        'Email': f'guestuser{portal_id}@portal.sandbox.com',
+        'Email': f'guestuser_{portal_id}@portal.sandbox.com',
         'Sangoma_Portal_Access__c': True,
-        'Sangoma_Portal_ID__c': str(portal_id)
+        'Sangoma_Portal_ID__c': portal_id
     }
     
     try:
@@ -98,29 +134,15 @@ def ensure_guest_user_contact(account_id, sf_cli_target, created_contacts, scrip
         _accounts_with_guest_users.add(account_id)
         
         # Create associated User
-        username = f"guestuser{portal_id}@website.sandbox.com"
+        username = f"guestuser_{portal_id}@website.sandbox.com"
         
-        # Get a Profile with 'Overage Customer Portal Manager Standard' license
-        # First try to find the exact profile that was used in the example
-        profile_query = """
-            SELECT Id, Name, UserLicense.Name 
-            FROM Profile 
-            WHERE UserLicense.Name = 'Overage Customer Portal Manager Standard' 
-            LIMIT 1
-        """
         try:
-            profile_result = sf_cli_target.query_records(profile_query)
-            if not profile_result or len(profile_result) == 0:
-                print(f"  [ERROR] Could not find profile with 'Overage Customer Portal Manager Standard' license")
-                # Try alternate query without UserLicense.Name
-                profile_query = "SELECT Id FROM Profile WHERE Name = 'Guest User - Public Portals' LIMIT 1"
-                profile_result = sf_cli_target.query_records(profile_query)
-                if not profile_result or len(profile_result) == 0:
-                    print(f"  [ERROR] Could not find any guest portal profile")
-                    return contact_id  # Return contact ID even if User creation fails
+            profile = _get_guest_profile(sf_cli_target)
+            if not profile:
+                print(f"  [ERROR] Could not find any guest portal profile")
+                return contact_id  # Return contact ID even if User creation fails
             
-            profile_id = profile_result[0]['Id']
-            profile_name = profile_result[0].get('Name', 'Unknown')
+            profile_id, profile_name = profile
             print(f"  [GUEST USER] Using Profile: {profile_name} (ID: {profile_id})")
         except Exception as e:
             print(f"  [ERROR] Error finding guest portal profile: {e}")
@@ -148,8 +170,12 @@ def ensure_guest_user_contact(account_id, sf_cli_target, created_contacts, scrip
             else:
                 print(f"  [WARN] Failed to create User for Contact {contact_id}, but Contact exists")
         except Exception as e:
-            print(f"  [WARN] Error creating User for Contact {contact_id}: {e}")
-            print(f"  [INFO] Contact {contact_id} exists but User creation failed - may need manual creation")
+            # Username is deterministic, so a duplicate usually means a previous run created this User
+            if 'DUPLICATE_USERNAME' in str(e):
+                _report_existing_user(sf_cli_target, username, contact_id)
+            else:
+                print(f"  [WARN] Error creating User for Contact {contact_id}: {e}")
+                print(f"  [INFO] Contact {contact_id} exists but User creation failed - may need manual creation")
         
         return contact_id
         
@@ -157,6 +183,26 @@ def ensure_guest_user_contact(account_id, sf_cli_target, created_contacts, scrip
         print(f"  [ERROR] Failed to create guest user contact: {e}")
         return None
 
+def _report_existing_user(sf_cli_target, username, contact_id):
+    """Report which Contact owns the User that already has this guest username."""
+    try:
+        users = sf_cli_target.query_records(
+            f"SELECT Id, ContactId FROM User WHERE Username = {soql_literal(username)} LIMIT 1"
+        ) or []
+    except Exception as e:
+        users = []
+        print(f"  [WARN] Could not look up existing User {username}: {e}")
+    if not users:
+        print(f"  [WARN] Username {username} is taken (possibly in another org) - "
+              f"Contact {contact_id} has no guest User")
+        return
+    user_id, owner_contact_id = users[0]['Id'], users[0].get('ContactId')
+    if owner_contact_id and owner_contact_id[:15] == contact_id[:15]:
+        print(f"  [GUEST USER] User {user_id} already exists for Contact {contact_id}")
+    else:
+        print(f"  [WARN] User {user_id} ({username}) belongs to Contact {owner_contact_id}, not {contact_id} - "
+              f"Contact {contact_id} has no guest User and may need manual creation")
+
 def clear_guest_user_cache():
     """Clear the cache of accounts with guest users (call at start of migration)"""
     global _accounts_with_guest_users
@@ -10,17 +10,49 @@ License: MIT License
 Phase 1: Creates Opportunity with dummy lookups.
 Uses bypass RecordType to avoid Flow validation, saves actual RecordType for Phase 2.
 """
-import re
-from rich.console import Console
-from rich.panel import Panel
-from sandcastle_pkg.utils.record_utils import filter_record_data, replace_lookups_with_dummies
-from sandcastle_pkg.utils.csv_utils import write_record_to_csv
+import functools
+import logging
+import threading
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from sandcastle_pkg.utils.record_utils import (
+    filter_record_data, replace_lookups_with_dummies, extract_duplicate_id, DUPLICATE_VALUE_MARKER,
+    build_insertable_index, quiet_details, prefetch_reference_existence
+)
+from sandcastle_pkg.utils.migration_store import save_migration_record
 
-console = Console()
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=None)
+def _console():
+    """Rich console, created on first use instead of at import time."""
+    from rich.console import Console
+    return Console()
+
+
+def _status(verbose, message):
+    """Per-record progress line: rendered by Rich when verbose, else logged at DEBUG."""
+    if verbose:
+        _console().print(message)
+    else:
+        logger.debug(message)
+
+
+# Maximum records per sObject Tree request
+OPPORTUNITY_BATCH_SIZE = 200
+
+# Default number of Opportunities processed concurrently (config: phase1_parallelism)
+DEFAULT_PHASE1_PARALLELISM = 8
+
+# Single-writer guard for created_opportunities and the Opportunity Phase 2 handoff
+_opportunities_lock = threading.Lock()
 
 
 def create_opportunity_phase1(prod_opp_id, created_opportunities, opportunity_insertable_fields_info,
-                             sf_cli_source, sf_cli_target, dummy_records, script_dir, config, created_accounts=None, created_contacts=None):
+                             sf_cli_source, sf_cli_target, dummy_records, script_dir, config, created_accounts=None, created_contacts=None,
+                             prefetched_record=None, insertable_index=None,
+                             bypass_record_type_id=None, created_mappings=None):
     """
     Phase 1: Create Opportunity with dummy lookups and bypass RecordType.
     Saves actual RecordType for Phase 2 restoration.
@@ -34,34 +66,195 @@ def create_opportunity_phase1(prod_opp_id, created_opportunities, opportunity_in
         dummy_records: Dictionary of dummy record IDs by object type
         script_dir: Script directory for CSV storage
         config: Configuration dict with opportunity_bypass_record_type_id
+        created_accounts: Dictionary of created Account mappings
+        created_contacts: Dictionary of created Contact mappings
+        prefetched_record: Optional pre-fetched opportunity record (to avoid API call)
+        insertable_index: Optional InsertableIndex for Opportunity (built once per run)
+        bypass_record_type_id: Bypass RecordType ID resolved by the caller
+                               (defaults to config['opportunity_bypass_record_type_id'])
+        created_mappings: Optional created_* mapping built once by the caller
+                          (used instead of created_accounts/created_contacts)
         
     Returns:
         str: Sandbox Opportunity ID or None
     """
-    # Skip if already created
-    if prod_opp_id in created_opportunities:
-        console.print(f"  [dim]Opportunity {prod_opp_id} already created as {created_opportunities[prod_opp_id]}[/dim]")
-        return created_opportunities[prod_opp_id]
+    # created_opportunities must be a plain dict: the lookups and assignments below
+    # rely on its semantics, and a defaultdict would insert entries on reads elsewhere
+    assert type(created_opportunities) is dict, "created_opportunities must be a plain dict"
+    
+    # Skip if already created (drivers normally filter with partition_pending first;
+    # this still guards direct callers and concurrent duplicates)
+    with _opportunities_lock:
+        existing_opp_id = created_opportunities.get(prod_opp_id)
+    verbose = config.get('verbose_phase1', True)
+    if existing_opp_id:
+        _status(verbose, f"  [dim]Opportunity {prod_opp_id} already created as {existing_opp_id}[/dim]")
+        return existing_opp_id
+    
+    if bypass_record_type_id is None:
+        bypass_record_type_id = config.get('opportunity_bypass_record_type_id')
+    if created_mappings is None:
+        created_mappings = _build_created_mappings(created_opportunities, created_accounts, created_contacts)
+    
+    prepared = _prepare_opportunity(prod_opp_id, opportunity_insertable_fields_info,
+                                    sf_cli_source, sf_cli_target, dummy_records, created_mappings,
+                                    bypass_record_type_id, verbose,
+                                    prefetched_record, insertable_index)
+    if not prepared:
+        return None
+    
+    original_record, filtered_data = prepared
+    return _create_prepared_opportunity(prod_opp_id, original_record, filtered_data,
+                                        created_opportunities, sf_cli_target, script_dir, verbose)
+
+
+def partition_pending(prod_opp_ids, created_opportunities):
+    """
+    Return the IDs (deduplicated, in order) that are not in created_opportunities yet.
+    Drivers filter with this before calling into Phase 1, so a resumed run does not
+    pay a function call, fetch or prefetch for every record that is already done.
+    """
+    return [prod_opp_id for prod_opp_id in dict.fromkeys(prod_opp_ids) if prod_opp_id not in created_opportunities]
+
+
+def _run_parallel(func, prod_opp_ids, config):
+    """Run func(prod_opp_id) over the IDs with a bounded thread pool; returns {id: result} for truthy results."""
+    results = {}
+    if not prod_opp_ids:
+        return results
+    
+    max_workers = max(1, min(config.get('phase1_parallelism', DEFAULT_PHASE1_PARALLELISM), len(prod_opp_ids)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(func, prod_opp_id): prod_opp_id for prod_opp_id in prod_opp_ids}
+        for future in as_completed(futures):
+            result = future.result()
+            if result:
+                results[futures[future]] = result
+    return results
+
+
+def create_opportunities_phase1_batch(prod_opp_ids, created_opportunities, opportunity_insertable_fields_info,
+                                      sf_cli_source, sf_cli_target, dummy_records, script_dir, config,
+                                      created_mappings=None, prefetched_records=None,
+                                      insertable_index=None):
+    """
+    Phase 1: Create many Opportunities using one sObject Tree request per 200 records
+    instead of one create call per record.
     
-    console.rule(f"[bold cyan][PHASE 1] Creating Opportunity {prod_opp_id}")
+    A tree request is all-or-none, so when a batch fails its records are retried
+    one at a time through the single-record path (which recovers duplicates).
     
-    # Fetch from source
-    prod_opp_record = sf_cli_source.get_record('Opportunity', prod_opp_id)
+    Args:
+        prod_opp_ids: Production Opportunity IDs to create
+        created_mappings: created_* dictionaries by object type ('Account', 'Contact',
+                          'Opportunity'), built once by the driver and shared by every record
+        prefetched_records: Optional dict of pre-fetched opportunity records by production ID
+        (remaining arguments as for create_opportunity_phase1)
+        
+    Returns:
+        dict: Production ID -> sandbox ID for the Opportunities created (or reused) by this call;
+              IDs already in created_opportunities are skipped
+    """
+    assert type(created_opportunities) is dict, "created_opportunities must be a plain dict"
+    prefetched_records = prefetched_records or {}
+    if insertable_index is None:
+        insertable_index = build_insertable_index(opportunity_insertable_fields_info, sf_cli_target, 'Opportunity')
+    # Resolved once for the whole run rather than per record
+    bypass_record_type_id = config.get('opportunity_bypass_record_type_id')
+    verbose = config.get('verbose_phase1', True)
+    if created_mappings is None:
+        created_mappings = _build_created_mappings(created_opportunities)
+    results = {}
+    
+    # Build (prod_id, original_record, filtered_data) for every Opportunity not yet created.
+    # Preparation makes its own source/target calls, so run it concurrently.
+    to_prepare = partition_pending(prod_opp_ids, created_opportunities)
+    prefetch_reference_existence(sf_cli_target, [prefetched_records[prod_opp_id] for prod_opp_id in to_prepare
+                                                 if prod_opp_id in prefetched_records],
+                                 opportunity_insertable_fields_info)
+    
+    prepared_by_id = _run_parallel(
+        lambda prod_opp_id: _prepare_opportunity(prod_opp_id, opportunity_insertable_fields_info,
+                                                 sf_cli_source, sf_cli_target, dummy_records, created_mappings,
+                                                 bypass_record_type_id, verbose,
+                                                 prefetched_records.get(prod_opp_id), insertable_index),
+        to_prepare, config
+    )
+    pending = [(prod_opp_id,) + prepared_by_id[prod_opp_id] for prod_opp_id in to_prepare if prod_opp_id in prepared_by_id]
+    
+    for start in range(0, len(pending), OPPORTUNITY_BATCH_SIZE):
+        batch = pending[start:start + OPPORTUNITY_BATCH_SIZE]
+        try:
+            sandbox_ids = sf_cli_target.create_records_tree('Opportunity', [item[2] for item in batch])
+        except Exception as e:
+            _console().print(f"[yellow]⚠ Batch create of {len(batch)} Opportunities failed, creating individually: {e}[/yellow]\n")
+            sandbox_ids = [None] * len(batch)
+        
+        retry = {}
+        for (prod_opp_id, original_record, filtered_data), sandbox_opp_id in zip(batch, sandbox_ids):
+            if sandbox_opp_id:
+                _status(verbose, f"[green]✓ Successfully created Opportunity {prod_opp_id} with ID: {sandbox_opp_id}[/green]")
+                with _opportunities_lock:
+                    created_opportunities[prod_opp_id] = sandbox_opp_id
+                    # Save for Phase 2 (with original RecordTypeId preserved)
+                    save_migration_record('Opportunity', prod_opp_id, sandbox_opp_id, original_record, script_dir)
+                results[prod_opp_id] = sandbox_opp_id
+            else:
+                retry[prod_opp_id] = (original_record, filtered_data)
+        
+        # Records from a failed batch are created one at a time, concurrently
+        results.update(_run_parallel(
+            lambda prod_opp_id: _create_prepared_opportunity(prod_opp_id, *retry[prod_opp_id],
+                                                             created_opportunities, sf_cli_target, script_dir,
+                                                             verbose),
+            list(retry), config
+        ))
+    
+    return results
+
+
+def _build_created_mappings(created_opportunities, created_accounts=None, created_contacts=None):
+    """
+    Read-only view of the created_* dictionaries used for lookup replacement.
+    The underlying dicts keep being filled in place, so one view serves a whole run.
+    """
+    return MappingProxyType({
+        'Account': created_accounts if created_accounts is not None else {},
+        'Contact': created_contacts if created_contacts is not None else {},
+        'Opportunity': created_opportunities
+    })
+
+
+def _prepare_opportunity(prod_opp_id, opportunity_insertable_fields_info,
+                         sf_cli_source, sf_cli_target, dummy_records, created_mappings,
+                         bypass_record_type_id, verbose, prefetched_record=None,
+                         insertable_index=None):
+    """
+    Fetch an Opportunity and build its Phase 1 payload.
+    
+    Returns:
+        tuple: (original_record, filtered_data) or None if the record could not be fetched
+    """
+    if verbose:
+        _console().rule(f"[bold cyan][PHASE 1] Creating Opportunity {prod_opp_id}")
+    else:
+        logger.debug(f"[PHASE 1] Creating Opportunity {prod_opp_id}")
+    
+    # Use prefetched record if available, otherwise fetch from source
+    prod_opp_record = prefetched_record or sf_cli_source.get_record('Opportunity', prod_opp_id)
     if not prod_opp_record:
-        console.print(f"[red]✗ Could not fetch Opportunity {prod_opp_id} from source org[/red]\n")
+        _console().print(f"[red]✗ Could not fetch Opportunity {prod_opp_id} from source org[/red]\n")
         return None
     
-    # Save original record for CSV (including original RecordTypeId)
-    original_record = prod_opp_record.copy()
+    # Save original record for CSV (including original RecordTypeId).
+    # No copy needed: replace_lookups_with_dummies works on its own copy and
+    # filter_record_data builds a new dict, so prod_opp_record is never mutated.
+    original_record = prod_opp_record
     
-    # Capture processing output
-    with console.capture() as capture:
+    # Capture processing output for the details panel. When verbose_phase1 is off,
+    # skip Rich rendering entirely and send the details to the debug log instead.
+    with (_console().capture() if verbose else quiet_details()) as capture:
         # Replace lookups with dummy IDs or real IDs if available
-        created_mappings = {
-            'Account': created_accounts or {},
-            'Contact': created_contacts or {},
-            'Opportunity': created_opportunities
-        }
         record_with_dummies = replace_lookups_with_dummies(
             prod_opp_record,
             opportunity_insertable_fields_info,
@@ -72,57 +265,72 @@ def create_opportunity_phase1(prod_opp_id, created_opportunities, opportunity_in
             'Opportunity'
         )
         
-        # Get bypass RecordType from config (if available)
+        # Apply bypass RecordType (resolved from config by the caller, if configured)
         # this lets us get past the flow: Opportunity - On create set stage depending on Tracking checkpoint
-        bypass_record_type_id = config.get('opportunity_bypass_record_type_id')
         if bypass_record_type_id:
             record_with_dummies['RecordTypeId'] = bypass_record_type_id
-            console.print(f"  [yellow][BYPASS] Using bypass RecordType: {bypass_record_type_id}[/yellow]")
+            if verbose:
+                _console().print(f"  [yellow][BYPASS] Using bypass RecordType: {bypass_record_type_id}[/yellow]")
         
         # Filter to insertable fields and validate picklists
         filtered_data = filter_record_data(
             record_with_dummies,
             opportunity_insertable_fields_info,
             sf_cli_target,
-            'Opportunity'
+            'Opportunity',
+            index=insertable_index
         )
         filtered_data.pop('Id', None)
     
     # Display captured output in panel
-    captured_text = capture.get().strip()
-    if captured_text:
-        console.print(Panel(captured_text, title="[dim]Processing Details[/dim]", border_style="dim", padding=(0, 1)))
+    if verbose:
+        captured_text = capture.get().strip()
+        if captured_text:
+            from rich.panel import Panel
+            _console().print(Panel(captured_text, title="[dim]Processing Details[/dim]", border_style="dim", padding=(0, 1)))
     
+    return original_record, filtered_data
+
+
+def _create_prepared_opportunity(prod_opp_id, original_record, filtered_data,
+                                 created_opportunities, sf_cli_target, script_dir, verbose=True):
+    """
+    Create a single prepared Opportunity, reusing an existing record on duplicate errors.
+    
+    Returns:
+        str: Sandbox Opportunity ID or None
+    """
     # Create in sandbox
     try:
         sandbox_opp_id = sf_cli_target.create_record('Opportunity', filtered_data)
         if sandbox_opp_id:
-            console.print(f"[green]✓ Successfully created Opportunity with ID: {sandbox_opp_id}[/green]\n")
-            created_opportunities[prod_opp_id] = sandbox_opp_id
-            
-            # Save to CSV for Phase 2 (with original RecordTypeId preserved)
-            write_record_to_csv('Opportunity', prod_opp_id, sandbox_opp_id, original_record, script_dir)
+            _status(verbose, f"[green]✓ Successfully created Opportunity with ID: {sandbox_opp_id}[/green]\n")
+            with _opportunities_lock:
+                created_opportunities[prod_opp_id] = sandbox_opp_id
+                
+                # Save for Phase 2 (with original RecordTypeId preserved)
+                save_migration_record('Opportunity', prod_opp_id, sandbox_opp_id, original_record, script_dir)
             
             return sandbox_opp_id
         else:
-            console.print(f"[red]✗ Failed to create Opportunity {prod_opp_id}[/red]\n")
+            _console().print(f"[red]✗ Failed to create Opportunity {prod_opp_id}[/red]\n")
             return None
             
     except Exception as e:
         error_msg = str(e)
-        console.print(f"[red]✗ Error creating Opportunity {prod_opp_id}: {error_msg}[/red]\n")
+        _console().print(f"[red]✗ Error creating Opportunity {prod_opp_id}: {error_msg}[/red]\n")
         
         # Check for duplicate
-        if "duplicate value found" in error_msg and "with id:" in error_msg:
-            match = re.search(r'with id:\s*([a-zA-Z0-9]{15,18})', error_msg)
-            if match:
-                existing_id = match.group(1)
+        if DUPLICATE_VALUE_MARKER in error_msg:
+            existing_id = extract_duplicate_id(error_msg)
+            if existing_id:
                 # Validate it looks like a Salesforce ID (starts with '0')
-                if existing_id.startswith('0'):
-                    console.print(f"  [blue]ℹ Found existing Opportunity {existing_id}, using it[/blue]")
-                    created_opportunities[prod_opp_id] = existing_id
-                    # Save to CSV for Phase 2
-                    write_record_to_csv('Opportunity', prod_opp_id, existing_id, original_record, script_dir)
+                if existing_id[0] == '0':
+                    _console().print(f"  [blue]ℹ Found existing Opportunity {existing_id}, using it[/blue]")
+                    with _opportunities_lock:
+                        created_opportunities[prod_opp_id] = existing_id
+                        # Save for Phase 2
+                        save_migration_record('Opportunity', prod_opp_id, existing_id, original_record, script_dir)
                     return existing_id
 
         return None
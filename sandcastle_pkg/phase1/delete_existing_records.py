@@ -7,12 +7,30 @@ Version: 1.1.8
 Date: December 24, 2025
 License: MIT License
 """
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
 
 console = Console()
 
+# Deletion order as dependency levels: every object is deleted before the objects it
+# references (AccountRelationship before Account), and objects in one level are independent
+DELETION_LEVELS = (
+    ('Case', 'OrderItem', 'QuoteLineItem'),
+    ('Order', 'Quote'),
+    ('Opportunity',),
+    ('Contact', 'AccountRelationship'),
+    ('Account',),
+)
+
+ORGANIZATION_QUERY = "SELECT IsSandbox, Name, OrganizationType FROM Organization LIMIT 1"
+PORTAL_USERS_QUERY = "SELECT Id, Username, ContactId, Contact.AccountId FROM User WHERE ContactId != null"
+
+# Portal usernames listed in the scan summary (the rest are only counted)
+PORTAL_USER_SAMPLE_SIZE = 5
+
+# Concurrent bulk delete jobs per level (kept low to stay clear of API limits)
+MAX_DELETE_WORKERS = 4
+
 def delete_existing_records(sf_cli_target, args, target_org_alias):
     """
     Deletes all demo data records from the target org, unless --no-delete is specified.
@@ -23,8 +41,108 @@ def delete_existing_records(sf_cli_target, args, target_org_alias):
     console.rule("[bold yellow]🔒 SAFETY CHECK: Verifying Target Org", style="yellow")
     console.print()
     
+    force_recheck = getattr(args, 'force_recheck', False)
+    sandbox_verified = getattr(sf_cli_target, '_is_sandbox_verified', None) is True and not force_recheck
+    portal_users_known = getattr(sf_cli_target, '_portal_user_records', None) is not None and not force_recheck
+    
+    # Run the portal user query alongside the Organization query instead of after it.
+    # It is read-only, so starting it before the org is confirmed as a sandbox is safe;
+    # its result is only used once the safety check has passed.
+    portal_scan = None
+    if not args.no_delete and not sandbox_verified and not portal_users_known:
+        if force_recheck:
+            sf_cli_target._query_cache.pop(PORTAL_USERS_QUERY, None)
+            sf_cli_target._portal_user_records = None
+        portal_scan = _start_background_query(sf_cli_target, PORTAL_USERS_QUERY)
+    
+    if sandbox_verified:
+        console.print(f"[green]✅ Safety check passed earlier in this run: {sf_cli_target._org_name} "
+                      f"(Type: {sf_cli_target._org_type}) is a sandbox[/green]\n")
+    else:
+        _verify_sandbox(sf_cli_target, force_recheck)
+    
+    if args.no_delete:
+        console.print("[yellow]⏭ Skipping deletion of existing demo records (--no-delete flag)[/yellow]\n")
+        return
+
+    console.rule("[bold red]🗑️  DELETING EXISTING DEMO DATA", style="red")
+    console.print(f"\n[yellow]⚠ This will delete all demo data from: [bold white]{target_org_alias}[/bold white][/yellow]")
+    console.print("[dim]Objects: Cases, OrderItems, Orders, QuoteLineItems, Quotes, Opportunities, Contacts, Accounts, AccountRelationships[/dim]")
+    console.print("[dim]This operation cannot be undone. To skip, use --no-delete flag.[/dim]\n")
+
+    # Step 1: Identify Accounts/Contacts with portal users (they cannot be deleted)
+    console.print("[cyan]🔍 Checking for portal users...[/cyan]")
+    if portal_scan is not None:
+        try:
+            portal_scan.result()
+        except Exception:
+            # query_records caches [] for a failed query; drop it so the scan below retries and reports
+            sf_cli_target._query_cache.pop(PORTAL_USERS_QUERY, None)
+    # A background scan already bypassed any earlier result
+    portal_contact_ids, portal_account_ids = _find_portal_user_records(
+        sf_cli_target, force_recheck and portal_scan is None
+    )
+
+    # Step 2: Delete records in proper order (excluding portal-protected records)
+    # Deletion levels: Case/OrderItem/QuoteLineItem, Order/Quote, Opportunity, Contact/AccountRelationship, Account
+    # AccountRelationship must be deleted before Accounts since it references them
+    console.rule("[bold red]Deletion Progress", style="red")
+    console.print()
+    
+    # Empty exclusion sets are stored as None so lookups below need no extra check
+    excluded_by_object = {'Contact': portal_contact_ids or None, 'Account': portal_account_ids or None}
+    
+    def delete_object(obj):
+        return sf_cli_target.bulk_delete_all_records(obj, excluded_by_object.get(obj))
+    
+    # Objects within a level do not reference each other, so each level's bulk
+    # deletes run concurrently; the next level starts once the whole level is done.
+    # Status lines are printed from this thread as each delete finishes.
+    for level in DELETION_LEVELS:
+        for obj in level:
+            excluded_ids = excluded_by_object.get(obj)
+            suffix = f" (excluding {len(excluded_ids)} with portal users)" if excluded_ids else ""
+            console.print(f"[cyan]🗑️  Deleting all {obj} records{suffix}...[/cyan]")
+        
+        failed = []
+        with ThreadPoolExecutor(max_workers=min(MAX_DELETE_WORKERS, len(level))) as executor:
+            futures = {executor.submit(delete_object, obj): obj for obj in level}
+            for future in as_completed(futures):
+                obj = futures[future]
+                try:
+                    deleted = future.result()
+                except Exception as e:
+                    console.print(f"[red]✗ Error deleting {obj} records: {e}[/red]")
+                    deleted = False
+                if deleted:
+                    console.print(f"[green]✓ Deleted {obj} records successfully[/green]")
+                else:
+                    failed.append(obj)
+        
+        if failed:
+            failed_names = ', '.join(obj for obj in level if obj in failed)
+            console.print(f"[red]✗ Failed to delete existing {failed_names} records. Aborting.[/red]\n")
+            raise RuntimeError(f"Failed to delete existing {failed_names} records.")
+    
+    console.print()
+    console.print("[green]✅ All demo data deletion complete[/green]\n")
+
+
+def _start_background_query(sf_cli_target, query):
+    """Run sf_cli_target.query_records(query) on a worker thread; returns its Future."""
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        return executor.submit(sf_cli_target.query_records, query)
+    finally:
+        executor.shutdown(wait=False)
+
+
+def _verify_sandbox(sf_cli_target, force_recheck=False):
+    """Abort with RuntimeError unless the target org is a sandbox; remember a pass on sf_cli_target."""
+    if force_recheck:
+        sf_cli_target._query_cache.pop(ORGANIZATION_QUERY, None)
     try:
-        org_info = sf_cli_target.query_records("SELECT IsSandbox, Name, OrganizationType FROM Organization LIMIT 1")
+        org_info = sf_cli_target.query_records(ORGANIZATION_QUERY)
         if not org_info or len(org_info) == 0:
             console.print("[red]❌ SAFETY CHECK FAILED: Could not retrieve Organization information[/red]")
             raise RuntimeError("SAFETY CHECK FAILED: Could not retrieve Organization information")
@@ -34,31 +152,44 @@ def delete_existing_records(sf_cli_target, args, target_org_alias):
         org_name = org.get('Name', 'Unknown')
         org_type = org.get('OrganizationType', 'Unknown')
         
-        # Display org info in a table
-        info_table = Table(show_header=False, border_style="yellow", padding=(0, 1))
-        info_table.add_column("Property", style="cyan")
-        info_table.add_column("Value", style="white")
-        info_table.add_row("Org Name", org_name)
-        info_table.add_row("Org Type", org_type)
-        info_table.add_row("Is Sandbox", "✅ Yes" if is_sandbox else "❌ No")
-        console.print(info_table)
+        # Display org info in a table on a terminal; logs and CI output get one plain line
+        if console.is_terminal:
+            from rich.table import Table
+            info_table = Table(show_header=False, border_style="yellow", padding=(0, 1))
+            info_table.add_column("Property", style="cyan")
+            info_table.add_column("Value", style="white")
+            info_table.add_row("Org Name", org_name)
+            info_table.add_row("Org Type", org_type)
+            info_table.add_row("Is Sandbox", "✅ Yes" if is_sandbox else "❌ No")
+            console.print(info_table)
+        else:
+            console.print(f"Org: {org_name} | Type: {org_type} | Sandbox: {'Yes' if is_sandbox else 'No'}")
         console.print()
         
         if not is_sandbox:
-            error_panel = Panel(
-                f"[bold red]Target org '{org_name}' (Type: {org_type}) is NOT a sandbox![/bold red]\n\n"
-                f"This function is designed to delete data ONLY from sandbox environments.\n"
-                f"Deletion has been BLOCKED to protect production data.",
-                title="[bold red]❌ CRITICAL ERROR: PRODUCTION ORG DETECTED[/bold red]",
-                border_style="red",
-                padding=(1, 2)
-            )
-            console.print(error_panel)
+            message = (f"[bold red]Target org '{org_name}' (Type: {org_type}) is NOT a sandbox![/bold red]\n\n"
+                       f"This function is designed to delete data ONLY from sandbox environments.\n"
+                       f"Deletion has been BLOCKED to protect production data.")
+            if console.is_terminal:
+                from rich.panel import Panel
+                console.print(Panel(
+                    message,
+                    title="[bold red]❌ CRITICAL ERROR: PRODUCTION ORG DETECTED[/bold red]",
+                    border_style="red",
+                    padding=(1, 2)
+                ))
+            else:
+                console.print(f"[bold red]❌ CRITICAL ERROR: PRODUCTION ORG DETECTED[/bold red]\n{message}")
             console.print()
             raise RuntimeError("SAFETY ABORT: Attempted deletion on production org. Operation blocked.")
         
         console.print("[green]✅ Safety check passed: Confirmed sandbox environment[/green]\n")
         
+        # The org type cannot change during a run, so later calls skip the query
+        sf_cli_target._is_sandbox_verified = True
+        sf_cli_target._org_name = org_name
+        sf_cli_target._org_type = org_type
+        
     except RuntimeError:
         # Re-raise RuntimeError (our safety block)
         raise
@@ -66,81 +197,60 @@ def delete_existing_records(sf_cli_target, args, target_org_alias):
         console.print(f"[red]❌ SAFETY CHECK FAILED: Could not verify org type: {e}[/red]")
         console.print("[yellow]Aborting deletion as a safety precaution.[/yellow]\n")
         raise RuntimeError(f"Could not verify target org is a sandbox: {e}")
-    
-    if args.no_delete:
-        console.print("[yellow]⏭ Skipping deletion of existing demo records (--no-delete flag)[/yellow]\n")
-        return
 
-    console.rule("[bold red]🗑️  DELETING EXISTING DEMO DATA", style="red")
-    console.print(f"\n[yellow]⚠ This will delete all demo data from: [bold white]{target_org_alias}[/bold white][/yellow]")
-    console.print("[dim]Objects: Cases, OrderItems, Orders, QuoteLineItems, Quotes, Opportunities, Contacts, Accounts, AccountRelationships[/dim]")
-    console.print("[dim]This operation cannot be undone. To skip, use --no-delete flag.[/dim]\n")
 
-    # Step 1: Identify Accounts/Contacts with portal users (they cannot be deleted)
-    console.print("[cyan]🔍 Checking for portal users...[/cyan]")
+def _find_portal_user_records(sf_cli_target, force_recheck=False):
+    """
+    Contacts and Accounts that have portal users (they cannot be deleted).
+    The result is remembered on sf_cli_target for the rest of the run only:
+    every run queries again, so a new portal user is never deleted.
+    
+    Returns:
+        tuple: (portal_contact_ids, portal_account_ids) as frozensets of 15-character IDs
+    """
+    cached = getattr(sf_cli_target, '_portal_user_records', None)
+    if cached is not None and not force_recheck:
+        portal_contact_ids, portal_account_ids = cached
+        console.print(f"[dim]Using portal users found by an earlier scan: {len(portal_contact_ids)} Contact(s), "
+                      f"{len(portal_account_ids)} Account(s)[/dim]\n")
+        return cached
+    
     portal_account_ids = set()
     portal_contact_ids = set()
+    if force_recheck:
+        sf_cli_target._query_cache.pop(PORTAL_USERS_QUERY, None)
     try:
-        # Query for portal users to find their associated Contacts and Accounts
-        portal_users_query = "SELECT Id, Username, ContactId, Contact.AccountId FROM User WHERE ContactId != null"
-        portal_users = sf_cli_target.query_records(portal_users_query)
+        # Reduce portal users to their Contact and Account IDs in a single pass over the rows
+        portal_user_count = 0
+        sampled_users = []
+        for user in sf_cli_target.query_records_iter(PORTAL_USERS_QUERY):
+            portal_user_count += 1
+            if len(sampled_users) < PORTAL_USER_SAMPLE_SIZE:
+                sampled_users.append(user.get('Username', user['Id']))
+            contact_id = user.get('ContactId')
+            if contact_id:
+                portal_contact_ids.add(contact_id[:15])
+            # AccountId comes from the nested Contact, which is normally present
+            try:
+                account_id = user['Contact']['AccountId']
+            except (KeyError, TypeError):
+                account_id = None
+            if account_id:
+                portal_account_ids.add(account_id[:15])
+        # Only the ID sets are kept; drop the User rows a background prefetch may have cached
+        sf_cli_target._query_cache.pop(PORTAL_USERS_QUERY, None)
         
-        if portal_users and len(portal_users) > 0:
-            console.print(f"[yellow]⚠ Found {len(portal_users)} portal user(s)[/yellow]")
-            for user in portal_users:
-                contact_id = user.get('ContactId')
-                if contact_id:
-                    portal_contact_ids.add(contact_id)
-                # Try to get AccountId from nested Contact
-                contact_data = user.get('Contact')
-                if contact_data and isinstance(contact_data, dict):
-                    account_id = contact_data.get('AccountId')
-                    if account_id:
-                        portal_account_ids.add(account_id)
-                console.print(f"  [dim]Portal user: {user.get('Username', user['Id'])} (Contact: {contact_id})[/dim]")
-            
+        if portal_user_count:
+            console.print(f"[yellow]⚠ Found {portal_user_count} portal user(s)[/yellow]")
+            more = "..." if portal_user_count > len(sampled_users) else ""
+            console.print(f"  [dim]Portal users: {', '.join(sampled_users)}{more}[/dim]")
             console.print(f"[yellow]⚠ Found {len(portal_contact_ids)} Contact(s) and {len(portal_account_ids)} Account(s) with portal users[/yellow]")
             console.print(f"[yellow]⚠ These records CANNOT be deleted and will be REUSED during migration[/yellow]\n")
         else:
             console.print("[green]✓ No portal users found[/green]\n")
+        sf_cli_target._portal_user_records = (frozenset(portal_contact_ids), frozenset(portal_account_ids))
     except Exception as e:
         console.print(f"[yellow]⚠ Warning: Could not query portal users: {e}[/yellow]")
         console.print("[dim]Continuing with deletion...[/dim]\n")
-
-    # Step 2: Delete records in proper order (excluding portal-protected records)
-    # Deletion order: Case, OrderItem, Order, QuoteLineItem, Quote, Opportunity, Contact, AccountRelationship, Account
-    # AccountRelationship must be deleted before Accounts since it references them
-    console.rule("[bold red]Deletion Progress", style="red")
-    console.print()
-    
-    object_order = [
-        'Case',
-        'OrderItem',
-        'Order',
-        'QuoteLineItem',
-        'Quote',
-        'Opportunity',
-        'Contact',
-        'AccountRelationship',  # Delete before Account
-        'Account',
-    ]
     
-    for obj in object_order:
-        # Pass excluded IDs for Contacts and Accounts with portal users
-        excluded_ids = None
-        if obj == 'Contact' and portal_contact_ids:
-            excluded_ids = portal_contact_ids
-            console.print(f"[cyan]🗑️  Deleting all {obj} records (excluding {len(excluded_ids)} with portal users)...[/cyan]")
-        elif obj == 'Account' and portal_account_ids:
-            excluded_ids = portal_account_ids
-            console.print(f"[cyan]🗑️  Deleting all {obj} records (excluding {len(excluded_ids)} with portal users)...[/cyan]")
-        else:
-            console.print(f"[cyan]🗑️  Deleting all {obj} records...[/cyan]")
-        
-        if not sf_cli_target.bulk_delete_all_records(obj, excluded_ids):
-            console.print(f"[red]✗ Failed to delete existing {obj} records. Aborting.[/red]\n")
-            raise RuntimeError(f"Failed to delete existing {obj} records.")
-        console.print(f"[green]✓ Deleted {obj} records successfully[/green]")
-    
-    console.print()
-    console.print("[green]✅ All demo data deletion complete[/green]\n")
+    return frozenset(portal_contact_ids), frozenset(portal_account_ids)
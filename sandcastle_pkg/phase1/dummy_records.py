@@ -10,7 +10,120 @@ License: MIT License
 Utility to create and manage dummy records for two-phase migration.
 Dummy records are used to satisfy required lookup fields during Phase 1 creation.
 """
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
+from rich.console import Console
+
+console = Console()
+
+# Dummy object type -> (sObject Tree referenceId, label)
+DUMMY_TREE_REFS = {
+    'Account': ('NoAccount', 'NO ACCOUNT'),
+    'Contact': ('NoContact', 'NO CONTACT'),
+    'Opportunity': ('NoOpportunity', 'NO OPPORTUNITY'),
+    'Quote': ('NoQuote', 'NO QUOTE'),
+    'Order': ('NoOrder', 'NO ORDER'),
+    'Case': ('NoCase', 'NO CASE'),
+}
+
+# (sobject, WHERE clause) pairs that find dummies an earlier run left in the target.
+# Dependent dummies only count when they hang off the NO ACCOUNT / NO OPPORTUNITY dummies.
+DUMMY_LOOKUP_QUERIES = (
+    ("Account", "Name = 'NO ACCOUNT'"),
+    ("Contact", "Name = 'NO CONTACT' AND Account.Name = 'NO ACCOUNT'"),
+    ("Opportunity", "Name = 'NO OPPORTUNITY' AND Account.Name = 'NO ACCOUNT'"),
+    ("Quote", "Name = 'NO QUOTE' AND Opportunity.Name = 'NO OPPORTUNITY'"),
+    ("Order", "Account.Name = 'NO ACCOUNT'"),
+    ("Case", "Subject = 'NO CASE'"),
+)
+
+# (sobject, WHERE clause) pairs that find the dummies removed at the end of a migration
+# Different objects use different fields for identification
+DUMMY_CLEANUP_QUERIES = (
+    ("Contact", "Name = 'NO CONTACT'"),        # Name is formula field = FirstName + LastName
+    ("Opportunity", "Name = 'NO OPPORTUNITY'"),
+    # Quotes go with their Opportunity, so NO QUOTE under NO OPPORTUNITY needs no delete of its own
+    ("Quote", "Name = 'NO QUOTE' AND Opportunity.Name != 'NO OPPORTUNITY'"),
+    ("Case", "Subject = 'NO CASE'"),           # Case uses Subject, not Name
+    ("Order", "Account.Name = 'NO ACCOUNT'"),  # Order has no Name field - find by its Account
+)
+
+
+def _tree_record(sobject_type, fields, **children):
+    """One sObject Tree record, with child records nested under their relationship names."""
+    record = {'attributes': {'type': sobject_type, 'referenceId': DUMMY_TREE_REFS[sobject_type][0]}, **fields}
+    for relationship, child_records in children.items():
+        record[relationship] = {'records': child_records}
+    return record
+
+
+def _dummy_record_trees(existing=None):
+    """
+    The dummy records missing from existing ({object_type: id}) as sObject Trees.
+
+    NO CONTACT, NO OPPORTUNITY (with NO QUOTE) and NO ORDER are children of
+    NO ACCOUNT, so they get its Id without a round-trip. When NO ACCOUNT already
+    exists they are top-level records pointing at it instead. NO CASE has no parent.
+    """
+    existing = existing or {}
+    close_date = (date.today() + timedelta(days=30)).isoformat()
+    effective_date = date.today().isoformat()
+    opportunity_fields = {'Name': 'NO OPPORTUNITY', 'StageName': 'Prospecting', 'CloseDate': close_date}
+    order_fields = {'EffectiveDate': effective_date, 'Status': 'Draft'}
+    
+    trees = {}
+    if 'Account' not in existing:
+        trees['Account'] = [_tree_record(
+            'Account', {'Name': 'NO ACCOUNT'},
+            Contacts=[_tree_record('Contact', {'LastName': 'NO CONTACT'})],
+            Opportunities=[_tree_record(
+                'Opportunity', opportunity_fields,
+                Quotes=[_tree_record('Quote', {'Name': 'NO QUOTE'})]
+            )],
+            Orders=[_tree_record('Order', order_fields)]
+        )]
+    else:
+        account_id = existing['Account']
+        if 'Contact' not in existing:
+            trees['Contact'] = [_tree_record('Contact', {'LastName': 'NO CONTACT', 'AccountId': account_id})]
+        if 'Opportunity' not in existing:
+            trees['Opportunity'] = [_tree_record(
+                'Opportunity', {**opportunity_fields, 'AccountId': account_id},
+                Quotes=[_tree_record('Quote', {'Name': 'NO QUOTE'})]
+            )]
+        elif 'Quote' not in existing:
+            trees['Quote'] = [_tree_record('Quote', {'Name': 'NO QUOTE', 'OpportunityId': existing['Opportunity']})]
+        if 'Order' not in existing:
+            trees['Order'] = [_tree_record('Order', {**order_fields, 'AccountId': account_id})]
+    if 'Case' not in existing:
+        trees['Case'] = [_tree_record('Case', {'Subject': 'NO CASE'})]
+    return trees
+
+
+def _find_existing_dummies(sf_cli_target):
+    """
+    IDs of dummies left in the target by an earlier run ({object_type: id}).
+    NO ACCOUNT is kept between migrations, and --no-delete runs can leave the rest.
+    """
+    def query_dummy_id(sobject, where_clause):
+        query = f"SELECT Id FROM {sobject} WHERE {where_clause} ORDER BY CreatedDate LIMIT 1"
+        records = sf_cli_target.query_records(query) or []
+        return records[0]['Id'] if records else None
+
+    existing = {}
+    with ThreadPoolExecutor(max_workers=len(DUMMY_LOOKUP_QUERIES)) as executor:
+        futures = [(sobject, executor.submit(query_dummy_id, sobject, where_clause))
+                   for sobject, where_clause in DUMMY_LOOKUP_QUERIES]
+        for sobject, future in futures:
+            try:
+                record_id = future.result()
+            except Exception:
+                # Treat a failed lookup as missing; the dummy is simply created again
+                record_id = None
+            if record_id:
+                existing[sobject] = record_id
+    return existing
+
 
 def create_dummy_records(sf_cli_target, config=None):
     """
@@ -18,6 +131,9 @@ def create_dummy_records(sf_cli_target, config=None):
     Returns a dictionary mapping object types to their dummy record IDs.
     Note: User is not included as dummy - all User lookups use production IDs.
     
+    Dummies left by an earlier run are reused. The missing ones are created with
+    one sObject Tree import; if that fails they are created one at a time instead.
+    
     Args:
         sf_cli_target: SalesforceCLI instance for the target sandbox
         config: Optional config dictionary
@@ -25,102 +141,154 @@ def create_dummy_records(sf_cli_target, config=None):
     Returns:
         dict: {object_type: dummy_record_id}
     """
-    dummy_records = {}
-    
-    print("\n--- Creating Dummy Records for Phase 1 ---")
-    print("Note: User lookups are not replaced with dummies - production User IDs are used directly")
+    # Status lines are collected and written once at the end (or when creation fails)
+    # rather than one print, and one write/flush, per step
+    log_lines = [
+        "\n--- Creating Dummy Records for Phase 1 ---",
+        "Note: User lookups are not replaced with dummies - production User IDs are used directly",
+    ]
+    log = log_lines.append
     
+    try:
+        # Reuse dummies an earlier run left behind instead of creating duplicates
+        dummy_records = _find_existing_dummies(sf_cli_target)
+        for object_type, record_id in dummy_records.items():
+            log(f"  ✓ {DUMMY_TREE_REFS[object_type][1]} already exists: {record_id}")
+        reused_count = len(dummy_records)
+        
+        trees = _dummy_record_trees(dummy_records)
+        ids_by_ref = {}
+        if trees:
+            try:
+                ids_by_ref = sf_cli_target.import_tree(trees)
+            except Exception as e:
+                log(f"  ⚠ Creating dummy records in one request failed, creating them individually: {e}")
+                # Each tree file is all-or-none, but the files are not: those sent before
+                # the failure are committed, so look the dummies up again before re-creating any
+                for object_type, record_id in _find_existing_dummies(sf_cli_target).items():
+                    if object_type not in dummy_records:
+                        dummy_records[object_type] = record_id
+                        log(f"  ✓ {DUMMY_TREE_REFS[object_type][1]} created: {record_id}")
+        
+        for object_type, (reference_id, label) in DUMMY_TREE_REFS.items():
+            if ids_by_ref.get(reference_id):
+                dummy_records[object_type] = ids_by_ref[reference_id]
+                log(f"  ✓ {label} created: {dummy_records[object_type]}")
+        
+        # Create whichever dummies are still missing, one record at a time
+        if any(object_type not in dummy_records for object_type in DUMMY_TREE_REFS if object_type != 'Case'):
+            _create_account_dummies(sf_cli_target, dummy_records, log)
+        if 'Case' not in dummy_records:
+            _create_no_case(sf_cli_target, dummy_records, log)
+        
+        # Note: Product2, Pricebook2, and PricebookEntry are NOT created as dummies
+        # These have complex dependencies and already exist in sandbox
+        # Phase 1 will remove these lookups, Phase 2 will restore them
+        
+        log(f"\n✓ Created {len(dummy_records) - reused_count} dummy records, reused {reused_count}")
+    finally:
+        print("\n".join(log_lines), flush=True)
+    return dummy_records
+
+
+def _create_account_dummies(sf_cli_target, dummy_records, log=print):
+    """
+    Create NO ACCOUNT and its dependent dummies with one create_record call each,
+    skipping any that dummy_records already holds.
+    """
     # Create NO ACCOUNT
-    print("Creating NO ACCOUNT dummy record...")
-    no_account_data = {'Name': 'NO ACCOUNT'}
-    no_account_id = sf_cli_target.create_record('Account', no_account_data)
-    if no_account_id:
-        dummy_records['Account'] = no_account_id
-        print(f"  ✓ NO ACCOUNT created: {no_account_id}")
-    else:
-        print("  ✗ Failed to create NO ACCOUNT")
-        raise RuntimeError("Failed to create required dummy Account record")
+    if 'Account' not in dummy_records:
+        log("Creating NO ACCOUNT dummy record...")
+        no_account_data = {'Name': 'NO ACCOUNT'}
+        no_account_id = sf_cli_target.create_record('Account', no_account_data)
+        if no_account_id:
+            dummy_records['Account'] = no_account_id
+            log(f"  ✓ NO ACCOUNT created: {no_account_id}")
+        else:
+            log("  ✗ Failed to create NO ACCOUNT")
+            raise RuntimeError("Failed to create required dummy Account record")
+    no_account_id = dummy_records['Account']
     
     # Create NO CONTACT (requires AccountId)
-    print("Creating NO CONTACT dummy record...")
-    no_contact_data = {
-        'LastName': 'NO CONTACT',
-        'AccountId': no_account_id
-    }
-    no_contact_id = sf_cli_target.create_record('Contact', no_contact_data)
-    if no_contact_id:
-        dummy_records['Contact'] = no_contact_id
-        print(f"  ✓ NO CONTACT created: {no_contact_id}")
-    else:
-        print("  ✗ Failed to create NO CONTACT")
-        raise RuntimeError("Failed to create required dummy Contact record")
+    if 'Contact' not in dummy_records:
+        log("Creating NO CONTACT dummy record...")
+        no_contact_data = {
+            'LastName': 'NO CONTACT',
+            'AccountId': no_account_id
+        }
+        no_contact_id = sf_cli_target.create_record('Contact', no_contact_data)
+        if no_contact_id:
+            dummy_records['Contact'] = no_contact_id
+            log(f"  ✓ NO CONTACT created: {no_contact_id}")
+        else:
+            log("  ✗ Failed to create NO CONTACT")
+            raise RuntimeError("Failed to create required dummy Contact record")
     
     # Create NO OPPORTUNITY (requires AccountId, Name, StageName, CloseDate)
-    print("Creating NO OPPORTUNITY dummy record...")
-    close_date = (date.today() + timedelta(days=30)).isoformat()
-    no_opp_data = {
-        'Name': 'NO OPPORTUNITY',
-        'AccountId': no_account_id,
-        'StageName': 'Prospecting',
-        'CloseDate': close_date
-    }
-    no_opp_id = sf_cli_target.create_record('Opportunity', no_opp_data)
-    if no_opp_id:
-        dummy_records['Opportunity'] = no_opp_id
-        print(f"  ✓ NO OPPORTUNITY created: {no_opp_id}")
-    else:
-        print("  ✗ Failed to create NO OPPORTUNITY")
-        raise RuntimeError("Failed to create required dummy Opportunity record")
+    if 'Opportunity' not in dummy_records:
+        log("Creating NO OPPORTUNITY dummy record...")
+        close_date = (date.today() + timedelta(days=30)).isoformat()
+        no_opp_data = {
+            'Name': 'NO OPPORTUNITY',
+            'AccountId': no_account_id,
+            'StageName': 'Prospecting',
+            'CloseDate': close_date
+        }
+        no_opp_id = sf_cli_target.create_record('Opportunity', no_opp_data)
+        if no_opp_id:
+            dummy_records['Opportunity'] = no_opp_id
+            log(f"  ✓ NO OPPORTUNITY created: {no_opp_id}")
+        else:
+            log("  ✗ Failed to create NO OPPORTUNITY")
+            raise RuntimeError("Failed to create required dummy Opportunity record")
     
     # Create NO QUOTE (requires Name, OpportunityId)
-    print("Creating NO QUOTE dummy record...")
-    no_quote_data = {
-        'Name': 'NO QUOTE',
-        'OpportunityId': no_opp_id
-    }
-    no_quote_id = sf_cli_target.create_record('Quote', no_quote_data)
-    if no_quote_id:
-        dummy_records['Quote'] = no_quote_id
-        print(f"  ✓ NO QUOTE created: {no_quote_id}")
-    else:
-        print("  ✗ Failed to create NO QUOTE")
-        raise RuntimeError("Failed to create required dummy Quote record")
+    if 'Quote' not in dummy_records:
+        log("Creating NO QUOTE dummy record...")
+        no_quote_data = {
+            'Name': 'NO QUOTE',
+            'OpportunityId': dummy_records['Opportunity']
+        }
+        no_quote_id = sf_cli_target.create_record('Quote', no_quote_data)
+        if no_quote_id:
+            dummy_records['Quote'] = no_quote_id
+            log(f"  ✓ NO QUOTE created: {no_quote_id}")
+        else:
+            log("  ✗ Failed to create NO QUOTE")
+            raise RuntimeError("Failed to create required dummy Quote record")
     
     # Create NO ORDER (requires AccountId, EffectiveDate, Status)
-    print("Creating NO ORDER dummy record...")
-    effective_date = date.today().isoformat()
-    no_order_data = {
-        'AccountId': no_account_id,
-        'EffectiveDate': effective_date,
-        'Status': 'Draft'
-    }
-    no_order_id = sf_cli_target.create_record('Order', no_order_data)
-    if no_order_id:
-        dummy_records['Order'] = no_order_id
-        print(f"  ✓ NO ORDER created: {no_order_id}")
-    else:
-        print("  ✗ Failed to create NO ORDER")
-        raise RuntimeError("Failed to create required dummy Order record")
-    
+    if 'Order' not in dummy_records:
+        log("Creating NO ORDER dummy record...")
+        effective_date = date.today().isoformat()
+        no_order_data = {
+            'AccountId': no_account_id,
+            'EffectiveDate': effective_date,
+            'Status': 'Draft'
+        }
+        no_order_id = sf_cli_target.create_record('Order', no_order_data)
+        if no_order_id:
+            dummy_records['Order'] = no_order_id
+            log(f"  ✓ NO ORDER created: {no_order_id}")
+        else:
+            log("  ✗ Failed to create NO ORDER")
+            raise RuntimeError("Failed to create required dummy Order record")
+
+
+def _create_no_case(sf_cli_target, dummy_records, log=print):
+    """Create NO CASE with a single create_record call."""
     # Create NO CASE (requires optional fields only, so minimal data)
-    print("Creating NO CASE dummy record...")
+    log("Creating NO CASE dummy record...")
     no_case_data = {
         'Subject': 'NO CASE'
     }
     no_case_id = sf_cli_target.create_record('Case', no_case_data)
     if no_case_id:
         dummy_records['Case'] = no_case_id
-        print(f"  ✓ NO CASE created: {no_case_id}")
+        log(f"  ✓ NO CASE created: {no_case_id}")
     else:
-        print("  ✗ Failed to create NO CASE")
+        log("  ✗ Failed to create NO CASE")
         raise RuntimeError("Failed to create required dummy Case record")
-    
-    # Note: Product2, Pricebook2, and PricebookEntry are NOT created as dummies
-    # These have complex dependencies and already exist in sandbox
-    # Phase 1 will remove these lookups, Phase 2 will restore them
-    
-    print(f"\n✓ Created {len(dummy_records)} dummy records")
-    return dummy_records
 
 
 
@@ -130,66 +298,37 @@ def delete_all_dummies_except_no_account(sf_cli_target):
     Deletes all dummy records (NO CONTACT, NO OPPORTUNITY, etc.) except NO ACCOUNT.
     Shows detailed error info if deletion fails.
     """
-    from rich.console import Console
-    console = Console()
-
-    # Map of (sobject, field_name, field_value) for querying dummies
-    # Different objects use different fields for identification
-    dummy_queries = [
-        ("Contact", "Name", "NO CONTACT"),        # Name is formula field = FirstName + LastName
-        ("Opportunity", "Name", "NO OPPORTUNITY"),
-        ("Quote", "Name", "NO QUOTE"),
-        ("Case", "Subject", "NO CASE"),           # Case uses Subject, not Name
-    ]
-
-    # Order doesn't have a Name field - find by Account relationship to NO ACCOUNT
-    # We'll handle Order separately by finding orders linked to NO ACCOUNT
-
-    total_deleted = 0
-    total_failed = 0
     console.print("\n[bold yellow]Cleaning up dummy records (except NO ACCOUNT)...[/bold yellow]")
 
-    # Delete standard dummies
-    for sobject, field, value in dummy_queries:
-        query = f"SELECT Id FROM {sobject} WHERE {field} = '{value}'"
-        try:
-            records = sf_cli_target.query_records(query) or []
-        except Exception as e:
-            console.print(f"[red]✗ Error querying {sobject} dummies: {e}[/red]")
-            continue
-        if not records:
-            continue
-        for rec in records:
-            try:
-                deleted = sf_cli_target.delete_record(sobject, rec['Id'])
-                if deleted:
-                    console.print(f"[green]✓ Deleted {sobject} dummy: {rec['Id']} ({value})[/green]")
-                    total_deleted += 1
-                else:
-                    console.print(f"[red]✗ Failed to delete {sobject} dummy: {rec['Id']} ({value}) (API returned False)[/red]")
-                    total_failed += 1
-            except Exception as e:
-                console.print(f"[red]✗ Exception deleting {sobject} dummy: {rec['Id']} ({value}): {e}[/red]")
-                total_failed += 1
+    # Collect every dummy Id first, then delete each object type in one call.
+    # The lookups are independent, so they run concurrently instead of one CLI call after another.
+    def query_dummy_ids(sobject, where_clause):
+        return sf_cli_target.query_records(f"SELECT Id FROM {sobject} WHERE {where_clause}") or []
 
-    # Handle Order separately - find by Account.Name = 'NO ACCOUNT'
-    try:
-        order_query = "SELECT Id FROM Order WHERE Account.Name = 'NO ACCOUNT'"
-        order_records = sf_cli_target.query_records(order_query) or []
-        for rec in order_records:
+    ids_by_type = {}
+    with ThreadPoolExecutor(max_workers=len(DUMMY_CLEANUP_QUERIES)) as executor:
+        futures = [(sobject, executor.submit(query_dummy_ids, sobject, where_clause))
+                   for sobject, where_clause in DUMMY_CLEANUP_QUERIES]
+        for sobject, future in futures:
             try:
-                deleted = sf_cli_target.delete_record('Order', rec['Id'])
-                if deleted:
-                    console.print(f"[green]✓ Deleted Order dummy: {rec['Id']} (NO ORDER)[/green]")
-                    total_deleted += 1
-                else:
-                    console.print(f"[red]✗ Failed to delete Order dummy: {rec['Id']} (API returned False)[/red]")
-                    total_failed += 1
+                records = future.result()
             except Exception as e:
-                console.print(f"[red]✗ Exception deleting Order dummy: {rec['Id']}: {e}[/red]")
-                total_failed += 1
-    except Exception as e:
-        console.print(f"[red]✗ Error querying Order dummies: {e}[/red]")
+                console.print(f"[red]✗ Error querying {sobject} dummies: {e}[/red]")
+                continue
+            if records:
+                ids_by_type[sobject] = [rec['Id'] for rec in records]
+
+    total_deleted = 0
+    total_failed = 0
+    for sobject, ids in ids_by_type.items():
+        # Dummies are throwaway rows, so large batches skip the Recycle Bin
+        outcome = sf_cli_target.delete_records(sobject, ids, hard_delete=True)
+        total_deleted += outcome['deleted']
+        total_failed += outcome['failed']
+        if outcome['failed']:
+            console.print(f"[red]✗ Failed to delete {outcome['failed']} of {len(ids)} {sobject} dummy record(s): {', '.join(ids)}[/red]")
+        else:
+            console.print(f"[green]✓ Deleted {len(ids)} {sobject} dummy record(s)[/green]")
 
     if total_deleted == 0 and total_failed == 0:
         console.print("[dim]No dummy records needed to be deleted.[/dim]")
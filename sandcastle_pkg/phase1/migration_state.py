@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Phase 1 Migration State
+
+Author: Ken Brill
+Version: 1.1.8
+Date: December 24, 2025
+License: MIT License
+
+Holds the production ID -> sandbox ID maps for every object type created in
+Phase 1, so the per-record create functions can share one set of lookup
+mappings instead of building a new dict on every call.
+"""
+
+import functools
+
+
+class MigrationState:
+    """
+    Per-run created_* maps (prod_id -> sandbox_id), one per object type.
+
+    The maps are filled in place as records are created, so the mapping views
+    handed out by mappings / mappings_for() stay current without rebuilding.
+
+    schema_cache optionally maps object type -> insertable field metadata,
+    loaded once per run (see build_schema_cache), so create calls do not go
+    back to load_insertable_fields for every record.
+
+    Usage:
+        state = MigrationState(created_accounts=created_accounts,
+                               schema_cache=build_schema_cache(script_dir))
+        create_quote_phase1(prod_id, state.created_quotes, ..., state=state)
+    """
+
+    # Salesforce object type -> attribute holding its created map
+    OBJECT_ATTRS = {
+        'Account': 'created_accounts',
+        'Contact': 'created_contacts',
+        'Opportunity': 'created_opportunities',
+        'Quote': 'created_quotes',
+        'QuoteLineItem': 'created_qlis',
+        'Order': 'created_orders',
+        'OrderItem': 'created_order_items',
+        'Case': 'created_cases',
+        'Product2': 'created_products',
+        'PricebookEntry': 'created_pbes',
+        'AccountRelationship': 'created_account_relationships'
+    }
+
+    def __init__(self, schema_cache=None, **created_maps):
+        unknown = set(created_maps) - set(self.OBJECT_ATTRS.values())
+        if unknown:
+            raise TypeError(f"Unknown created_* maps: {', '.join(sorted(unknown))}")
+        for attr in self.OBJECT_ATTRS.values():
+            created = created_maps.get(attr)
+            setattr(self, attr, created if created is not None else {})
+        self.schema_cache = schema_cache if schema_cache is not None else {}
+        self._views = {}
+
+    @functools.cached_property
+    def mappings(self):
+        """All created maps keyed by object type (the Phase 2 created_mappings shape)."""
+        return {object_type: getattr(self, attr) for object_type, attr in self.OBJECT_ATTRS.items()}
+
+    def mappings_for(self, *object_types):
+        """
+        Mapping restricted to the given object types, built once per combination.
+
+        Only the listed types are resolved from created records; lookups to any
+        other type fall back to dummies, as in the original per-call dicts.
+        """
+        view = self._views.get(object_types)
+        if view is None:
+            view = {object_type: self.mappings[object_type] for object_type in object_types}
+            self._views[object_types] = view
+        return view
@@ -3,7 +3,7 @@ Phase 2: Update all records with actual lookup relationships.
 Reads CSVs and populates lookups using created_* dictionaries.
 OPTIMIZED: Uses Bulk API 2.0 for batch updates instead of individual API calls.
 """
-from sandcastle_pkg.utils.csv_utils import read_migration_csv
+from sandcastle_pkg.utils.migration_store import iter_migration_records
 #!/usr/bin/env python3
 """
 Lookup Relationship Updates - Phase 2
@@ -16,9 +16,16 @@ License: MIT License
 
 import logging
 from rich.console import Console
+from sandcastle_pkg.utils.record_utils import prefetch_record_type_map
 
 console = Console()
 
+# Fields that cannot be updated after creation (read-only after insert)
+READ_ONLY_AFTER_CREATION = {
+    'QuoteLineItem': frozenset({'QuoteId', 'PricebookEntryId', 'Product2Id'}),
+    'OrderItem': frozenset({'OrderId', 'PricebookEntryId', 'Product2Id'})
+}
+
 
 def update_lookups_phase2(sf_cli_source, sf_cli_target, script_dir, insertable_fields_info, created_mappings, object_type, dummy_records):
     """
@@ -36,113 +43,109 @@ def update_lookups_phase2(sf_cli_source, sf_cli_target, script_dir, insertable_f
     """
     logging.info(f"\n[PHASE 2] Updating {object_type} lookups from CSV...")
     
-    # Fields that cannot be updated after creation (read-only after insert)
-    read_only_after_creation = {
-        'QuoteLineItem': ['QuoteId', 'PricebookEntryId', 'Product2Id'],
-        'OrderItem': ['OrderId', 'PricebookEntryId', 'Product2Id']
-    }
+    read_only_fields = READ_ONLY_AFTER_CREATION.get(object_type, frozenset())
     
-    read_only_fields = read_only_after_creation.get(object_type, [])
+    # Resolve the lookup fields Phase 2 can set once for the whole object, rather
+    # than re-checking every field of every record. Skipped: non-lookups, fields
+    # read-only after creation, and User lookups (users exist in sandbox and were
+    # set correctly in Phase 1).
+    recordtype_fields = []  # mapped by DeveloperName
+    mapped_fields = []  # (field_name, created_dict, dummy_id) mapped through created records
+    for field_name, field_info in insertable_fields_info.items():
+        referenced_object = field_info.get('referenceTo')
+        if (field_info['type'] != 'reference' or not referenced_object or referenced_object == 'User'
+                or field_name in read_only_fields):
+            continue
+        if referenced_object == 'RecordType':
+            recordtype_fields.append(field_name)
+        elif referenced_object in created_mappings:
+            mapped_fields.append((field_name, created_mappings[referenced_object], dummy_records.get(referenced_object)))
     
-    # Read migration CSV
-    migrated_records = read_migration_csv(object_type, script_dir)
-    if not migrated_records:
-        logging.info(f"  No {object_type} records in CSV to update")
+    # Nothing to set means no need to read the Phase 1 rows at all
+    # (Opportunity still restores its bypassed RecordTypeId below)
+    if not recordtype_fields and not mapped_fields and object_type != 'Opportunity':
+        logging.info(f"  No updatable lookup fields on {object_type}, skipping")
         return
     
-    logging.info(f"  Found {len(migrated_records)} {object_type} records to update")
+    # Stream Phase 1 rows (migration CSV and binary handoff log) straight into
+    # bulk_updates rather than loading them all first
+    migrated_records = iter_migration_records(object_type, script_dir)
+    record_count = 0
     
     # OPTIMIZED: Collect all updates first, then batch them
-    bulk_updates = []
+    pending_updates = {}  # sandbox_id -> merged payload, so each record is updated once
     skip_count = 0
     lookup_fields_found = set()
-    recordtype_cache = {}  # Cache for RecordType ID mappings by DeveloperName
+    recordtype_map = None  # prod RecordType ID -> sandbox ID, built on first RecordType lookup
+    unmapped_recordtypes = set()
     
     for record_info in migrated_records:
+        record_count += 1
         sandbox_id = record_info['sandbox_id']
         original_data = record_info['record_data']
         
         # Build update payload with actual lookup IDs
         update_payload = {'Id': sandbox_id}  # Bulk API needs Id in the payload
         
-        # Special handling: Restore RecordTypeId for objects that used bypass in Phase 1
-        if object_type == 'Opportunity' and 'RecordTypeId' in original_data:
-            original_record_type_id = original_data['RecordTypeId']
-            if original_record_type_id and not isinstance(original_record_type_id, dict):
-                update_payload['RecordTypeId'] = original_record_type_id
-        
-        for field_name, field_info in insertable_fields_info.items():
-            if field_info['type'] != 'reference':
-                continue
-            
-            # Skip read-only fields that cannot be updated after creation
-            if field_name in read_only_fields:
-                continue
-            
-            # Skip all User lookups (users exist in sandbox, set correctly in Phase 1)
-            referenced_object = field_info['referenceTo']
-            if referenced_object == 'User':
-                continue
-            
-            # Get the original production lookup ID
+        # Special handling for RecordType: Map by DeveloperName, not by created records
+        for field_name in recordtype_fields:
             prod_lookup_id = original_data.get(field_name)
             if not prod_lookup_id or isinstance(prod_lookup_id, dict):
                 continue
-            
-            referenced_object = field_info['referenceTo']
-            if not referenced_object:
+            if recordtype_map is None:
+                try:
+                    recordtype_map = prefetch_record_type_map(sf_cli_source, sf_cli_target, object_type)
+                except Exception as e:
+                    logging.warning(f"    Could not map {object_type} RecordTypes: {e}")
+                    recordtype_map = {}
+            sandbox_rt_id = recordtype_map.get(prod_lookup_id)
+            if sandbox_rt_id:
+                update_payload[field_name] = sandbox_rt_id
+                lookup_fields_found.add(field_name)
+            elif prod_lookup_id not in unmapped_recordtypes:
+                unmapped_recordtypes.add(prod_lookup_id)
+                logging.warning(f"    RecordType {prod_lookup_id} has no match in sandbox")
+        
+        # Map production IDs to sandbox IDs through the created records
+        for field_name, created_dict, dummy_id in mapped_fields:
+            prod_lookup_id = original_data.get(field_name)
+            if not prod_lookup_id or isinstance(prod_lookup_id, dict):
                 continue
+            sandbox_lookup_id = created_dict.get(prod_lookup_id)
             
-            # Special handling for RecordType: Map by DeveloperName, not by created records
-            if referenced_object == 'RecordType' and prod_lookup_id:
-                # Get RecordType info from production to find DeveloperName
-                if prod_lookup_id not in recordtype_cache:
-                    try:
-                        # Query production RecordType to get DeveloperName
-                        rt_info = sf_cli_source.get_record_type_info_by_id(prod_lookup_id)
-                        if rt_info and 'DeveloperName' in rt_info:
-                            dev_name = rt_info['DeveloperName']
-                            # Find matching RecordType in sandbox by DeveloperName
-                            sandbox_rt_id = sf_cli_target.get_record_type_id(object_type, dev_name)
-                            if sandbox_rt_id:
-                                recordtype_cache[prod_lookup_id] = sandbox_rt_id
-                                logging.info(f"    Mapped RecordType: {dev_name} ({prod_lookup_id} → {sandbox_rt_id})")
-                            else:
-                                recordtype_cache[prod_lookup_id] = None
-                                logging.warning(f"    RecordType '{dev_name}' not found in sandbox")
-                        else:
-                            recordtype_cache[prod_lookup_id] = None
-                    except Exception as e:
-                        logging.warning(f"    Could not map RecordType {prod_lookup_id}: {e}")
-                        recordtype_cache[prod_lookup_id] = None
-                
-                # Use cached mapping
-                if recordtype_cache.get(prod_lookup_id):
-                    update_payload[field_name] = recordtype_cache[prod_lookup_id]
-                    lookup_fields_found.add(field_name)
+            # Skip unmapped lookups, and don't set lookup to dummy record
+            if sandbox_lookup_id is None or sandbox_lookup_id == dummy_id:
                 continue
             
-            # Check if we have the referenced object in our created mappings
-            if referenced_object in created_mappings:
-                created_dict = created_mappings[referenced_object]
-                
-                # Map production ID to sandbox ID
-                if prod_lookup_id in created_dict:
-                    sandbox_lookup_id = created_dict[prod_lookup_id]
-                    
-                    # Don't set lookup to dummy record
-                    if referenced_object in dummy_records and sandbox_lookup_id == dummy_records[referenced_object]:
-                        continue
-                    
-                    update_payload[field_name] = sandbox_lookup_id
-                    lookup_fields_found.add(field_name)
+            update_payload[field_name] = sandbox_lookup_id
+            lookup_fields_found.add(field_name)
+        
+        # Special handling: Restore RecordTypeId for objects that used bypass in Phase 1,
+        # in the same payload as the other lookups (a RecordTypeId mapped above wins)
+        if object_type == 'Opportunity' and 'RecordTypeId' not in update_payload:
+            original_record_type_id = original_data.get('RecordTypeId')
+            if original_record_type_id and not isinstance(original_record_type_id, dict):
+                update_payload['RecordTypeId'] = original_record_type_id
+                lookup_fields_found.add('RecordTypeId')
         
         # Add to bulk updates if we have any lookups to set
         if len(update_payload) > 1:  # More than just Id
-            bulk_updates.append(update_payload)
+            # Rows for the same sandbox record are merged (later rows win)
+            pending = pending_updates.get(sandbox_id)
+            if pending is None:
+                pending_updates[sandbox_id] = update_payload
+            else:
+                pending.update(update_payload)
         else:
             skip_count += 1
     
+    if not record_count:
+        logging.info(f"  No {object_type} records in CSV to update")
+        return
+    
+    logging.info(f"  Found {record_count} {object_type} records to update")
+    bulk_updates = list(pending_updates.values())
+    
     # OPTIMIZED: Execute bulk update instead of individual updates
     update_count = 0
     error_count = 0
@@ -153,28 +156,34 @@ def update_lookups_phase2(sf_cli_source, sf_cli_target, script_dir, insertable_f
         
         try:
             from sandcastle_pkg.utils.bulk_utils import bulk_update_records
-            result = bulk_update_records(sf_cli_target, object_type, bulk_updates)
+            # Every payload key is known, so pass the CSV columns rather than have the
+            # bulk helper rescan and sort the records' keys
+            fieldnames = ['Id'] + sorted(lookup_fields_found)
+            result = bulk_update_records(sf_cli_target, object_type, bulk_updates, fieldnames=fieldnames)
             
             if result and result.get('success'):
                 update_count = len(bulk_updates)
                 logging.info(f"  ✓ Successfully updated {update_count} {object_type} record(s) via Bulk API")
             else:
-                # Bulk failed, fall back to individual updates
-                logging.warning(f"  Bulk update failed, falling back to individual updates...")
-                for update_data in bulk_updates:
+                # Bulk failed, fall back to individual updates for the records of the failed job(s)
+                update_count = (result or {}).get('records_updated', 0)
+                failed_updates = (result or {}).get('failed_records', bulk_updates)
+                logging.warning(f"  Bulk update failed for {len(failed_updates)} record(s), falling back to individual updates...")
+                for update_data in failed_updates:
                     sandbox_id = update_data['Id']
-                    # Create copy without Id for the update call
-                    update_fields = {k: v for k, v in update_data.items() if k != 'Id'}
+                    # update_record ignores the Id key, so the payload goes as-is
                     try:
-                        sf_cli_target.update_record(object_type, sandbox_id, update_fields)
+                        sf_cli_target.update_record(object_type, sandbox_id, update_data)
                         update_count += 1
                     except Exception as e:
                         logging.warning(f"  ✗ Error updating {sandbox_id}: {e}")
                         error_count += 1
 
                         # Try individual field updates if batch fails
-                        if len(update_fields) > 1:
-                            for field_name, field_value in update_fields.items():
+                        if len(update_data) > 2:  # More than Id and one field
+                            for field_name, field_value in update_data.items():
+                                if field_name == 'Id':
+                                    continue
                                 try:
                                     sf_cli_target.update_record(object_type, sandbox_id, {field_name: field_value})
                                 except Exception as field_error:
@@ -184,10 +193,9 @@ def update_lookups_phase2(sf_cli_source, sf_cli_target, script_dir, insertable_f
             logging.warning(f"  Bulk API not available, using individual updates...")
             for update_data in bulk_updates:
                 sandbox_id = update_data['Id']
-                # Create copy without Id for the update call
-                update_fields = {k: v for k, v in update_data.items() if k != 'Id'}
+                # update_record ignores the Id key, so the payload goes as-is
                 try:
-                    sf_cli_target.update_record(object_type, sandbox_id, update_fields)
+                    sf_cli_target.update_record(object_type, sandbox_id, update_data)
                     update_count += 1
                 except Exception as e:
                     logging.warning(f"  ✗ Error updating {sandbox_id}: {e}")
@@ -4,21 +4,50 @@ from .record_utils import (
     check_record_exists,
     replace_lookups_with_dummies,
     load_insertable_fields,
-    filter_record_data
+    filter_record_data,
+    prefetch_all_records,
+    stream_prefetched_records,
+    prefetch_user_existence,
+    prefetch_reference_existence,
+    prefetch_record_type_map,
+    InsertableIndex,
+    build_insertable_index
 )
+from .migration_store import (MigrationStore, save_migration_record, iter_migration_records, clear_migration_store,
+                              flush_migration_store)
 from .csv_utils import write_record_to_csv, read_migration_csv, clear_migration_csvs
+from .soql import soql_escape, soql_literal, soql_in_list
 from .bulk_utils import BulkRecordCreator
-from .picklist_utils import get_valid_picklist_values, prefetch_picklists_for_object
+from .picklist_utils import (get_valid_picklist_values, prefetch_picklists_for_object, prefetch_picklists_for_objects,
+                             clear_picklist_cache, set_picklist_disk_cache)
 
 __all__ = [
     'check_record_exists',
     'replace_lookups_with_dummies',
     'load_insertable_fields',
     'filter_record_data',
+    'prefetch_all_records',
+    'stream_prefetched_records',
+    'prefetch_user_existence',
+    'prefetch_reference_existence',
+    'prefetch_record_type_map',
+    'InsertableIndex',
+    'build_insertable_index',
+    'MigrationStore',
+    'save_migration_record',
+    'iter_migration_records',
+    'clear_migration_store',
+    'flush_migration_store',
     'write_record_to_csv',
     'read_migration_csv',
     'clear_migration_csvs',
+    'soql_escape',
+    'soql_literal',
+    'soql_in_list',
     'BulkRecordCreator',
     'get_valid_picklist_values',
-    'prefetch_picklists_for_object'
+    'prefetch_picklists_for_object',
+    'prefetch_picklists_for_objects',
+    'clear_picklist_cache',
+    'set_picklist_disk_cache'
 ]
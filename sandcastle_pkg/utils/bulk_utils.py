@@ -12,45 +12,183 @@ Instead of creating records one-by-one, batch them and use CSV bulk import.
 """
 
 import csv
+import functools
+import io
 import json
 import logging
+import os
 import subprocess
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from rich.console import Console
+from sandcastle_pkg.cli.salesforce_cli import SF_CLI_ENV
+
+# orjson (optional) parses large Bulk API responses several times faster; its
+# JSONDecodeError subclasses json.JSONDecodeError, so the handlers below catch both
+try:
+    import orjson as _json
+except ImportError:
+    _json = json
+
+# pyarrow (optional) parses Bulk API success files with its multithreaded C reader
+try:
+    import pyarrow.csv as _pa_csv
+except ImportError:
+    _pa_csv = None
 
 logger = logging.getLogger(__name__)
 console = Console()
 
+# CSV copies kept with debug_dump_csv (and sf CLI staging when there is no /dev/shm)
+TMP_BULK_DIR = Path(__file__).parent / 'tmp_bulk'
+# In-memory filesystem for the CSVs staged for the sf CLI fallback (Linux)
+STAGING_DIR = '/dev/shm'
+
+# Embedded line breaks become spaces so every record stays on one CSV line
+_NEWLINES_TO_SPACES = str.maketrans({'\r': ' ', '\n': ' '})
+
+
+def _sanitize_cell(value):
+    """CSV cell value with embedded newlines replaced by spaces (CRLF counts as one)."""
+    if isinstance(value, str) and ('\n' in value or '\r' in value):
+        return value.replace('\r\n', ' ').translate(_NEWLINES_TO_SPACES)
+    return value
+
+
+def _field_names(records):
+    """Union of the keys of every record."""
+    return set().union(*records)
+
+
+def _success_ids(source):
+    """
+    Record IDs from a Bulk API success file, given its path or its CSV bytes: the
+    'sf__Id' column (Bulk API 2.0), else 'Id' (older CLI format); blanks skipped.
+    Only that column is parsed, with pyarrow when installed.
+    """
+    if isinstance(source, bytes):
+        header = source.split(b'\n', 1)[0].decode('utf-8')
+    else:
+        with open(source, 'r', encoding='utf-8', newline='') as f:
+            header = f.readline()
+    header = next(csv.reader([header]), [])
+    id_column = 'sf__Id' if 'sf__Id' in header else 'Id' if 'Id' in header else None
+    if id_column is None:
+        return []
+    
+    if _pa_csv is not None:
+        table = _pa_csv.read_csv(
+            io.BytesIO(source) if isinstance(source, bytes) else source,
+            convert_options=_pa_csv.ConvertOptions(include_columns=[id_column], strings_can_be_null=False,
+                                                   column_types={id_column: 'string'})
+        )
+        return [record_id for record_id in table.column(id_column).to_pylist() if record_id]
+    
+    if isinstance(source, bytes):
+        lines = io.StringIO(source.decode('utf-8'), newline='')
+    else:
+        lines = open(source, 'r', encoding='utf-8', newline='')
+    with lines:
+        reader = csv.reader(lines)
+        index = next(reader).index(id_column)
+        return [row[index] for row in reader if len(row) > index and row[index]]
+
+
+def _bulk_csv_bytes(fieldnames, records):
+    """
+    Bulk API CSV body built in memory in a single pass: CRLF line endings
+    (Salesforce Bulk API requirement), positional rows in fieldnames order,
+    embedded newlines removed, UTF-8 encoded.
+    """
+    buffer = io.BytesIO()
+    text = io.TextIOWrapper(buffer, encoding='utf-8', newline='', write_through=True)
+    writer = csv.writer(text, lineterminator='\r\n')
+    writer.writerow(fieldnames)
+    writer.writerows([_sanitize_cell(record.get(field)) for field in fieldnames] for record in records)
+    text.flush()
+    data = buffer.getvalue()
+    text.detach()
+    return data
+
+
+def _dump_bulk_csv(file_name, data):
+    """Keep a copy of a CSV body in tmp_bulk for troubleshooting (debug_dump_csv)."""
+    TMP_BULK_DIR.mkdir(exist_ok=True)
+    csv_file = TMP_BULK_DIR / file_name
+    csv_file.write_bytes(data)
+    return csv_file
+
+
+def _stage_bulk_csv(suffix, data):
+    """
+    Write a CSV body to a uniquely named temp file for the sf CLI, which only reads
+    files; returns the path, which the caller unlinks. Uses the /dev/shm tmpfs when
+    available, so staging never touches disk.
+    """
+    if os.path.isdir(STAGING_DIR):
+        staging_dir = STAGING_DIR
+    else:
+        TMP_BULK_DIR.mkdir(exist_ok=True)
+        staging_dir = TMP_BULK_DIR
+    with tempfile.NamedTemporaryFile(dir=staging_dir, prefix='sandcastle_', suffix=suffix, delete=False) as f:
+        f.write(data)
+    return Path(f.name)
+
+
+# Records per Bulk API update job, and how many of those jobs run at once
+BULK_UPDATE_CHUNK_SIZE = 10000
+MAX_BULK_UPDATE_WORKERS = 4
+# Fewer records than this are updated one by one rather than through a Bulk job
+MIN_BULK_UPDATE_RECORDS = 2
+
 class BulkRecordCreator:
     """
     Batches record creation operations and executes them in bulk via CSV import.
     This is 2-5x faster than individual record creation.
+    
+    Full batches are flushed asynchronously: the job is submitted right away and
+    a single background thread waits for the jobs in submission order, so the
+    caller keeps batching while Salesforce processes the previous job.
     """
     
-    def __init__(self, sf_cli_target, batch_size: int = 200):
+    def __init__(self, sf_cli_target, batch_size: int = 200, debug_dump_csv: bool = False,
+                 on_created: Optional[Callable[[str, List[Dict[str, Any]], Optional[List[str]]], None]] = None):
         """
         Initialize bulk creator.
         
         Args:
             sf_cli_target: Salesforce CLI wrapper for target org
             batch_size: Number of records to batch before auto-flush (default: 200)
+            debug_dump_csv: Also write each job's CSV to tmp_bulk/ for troubleshooting
+            on_created: Optional callback(sobject, records, created_ids) run as each
+                job finishes, in submission order (e.g. to update created mappings)
         """
         self.sf_cli_target = sf_cli_target
         self.batch_size = batch_size
+        self.debug_dump_csv = debug_dump_csv
+        self.on_created = on_created
         self.batches: Dict[str, List[Dict[str, Any]]] = {}
-        self.temp_dir = Path(__file__).parent / 'tmp_bulk'
-        self.temp_dir.mkdir(exist_ok=True)
+        # sobject -> canonical CSV column order, when the caller supplies one
+        self.fieldnames: Dict[str, List[str]] = {}
+        # (sobject, records, future) for every flush not yet collected
+        self._pending: List[Tuple[str, List[Dict[str, Any]], Future]] = []
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='bulk-create')
     
-    def add_record(self, sobject: str, record_data: Dict[str, Any]) -> None:
+    def add_record(self, sobject: str, record_data: Dict[str, Any], fieldnames: Optional[List[str]] = None) -> None:
         """
         Add a record to the batch queue.
-        Auto-flushes when batch_size is reached.
+        Auto-flushes (without waiting for the job) when batch_size is reached.
         
         Args:
             sobject: Salesforce object type (e.g., 'Account', 'Contact')
             record_data: Dictionary of field values
+            fieldnames: Optional CSV columns covering every record of this sobject;
+                remembered for its later batches, so their keys are not re-scanned and sorted
         """
+        if fieldnames is not None:
+            self.fieldnames[sobject] = fieldnames
         if sobject not in self.batches:
             self.batches[sobject] = []
         
@@ -58,11 +196,39 @@ class BulkRecordCreator:
         
         # Auto-flush if batch is full
         if len(self.batches[sobject]) >= self.batch_size:
-            self.flush(sobject)
+            self.flush_async(sobject)
+    
+    def flush_async(self, sobject: str) -> Future:
+        """
+        Submit the batched records of one object type without waiting for the job.
+        
+        Args:
+            sobject: Object type to flush
+        
+        Returns:
+            Future resolving to the list of created IDs (None on complete failure)
+        """
+        records = self.batches.get(sobject)
+        if not records:
+            future = Future()
+            future.set_result([])
+            return future
+        self.batches[sobject] = []
+        logger.info(f"Bulk creating {len(records)} {sobject} record(s)")
+        
+        try:
+            finish = self._start_bulk_create(sobject, records)
+            future = self._executor.submit(self._finish_bulk_create, sobject, records, finish)
+        except Exception as e:
+            future = Future()
+            future.set_exception(e)
+        self._pending.append((sobject, records, future))
+        return future
     
     def flush(self, sobject: str = None) -> Dict[str, List[str]]:
         """
-        Flush batched records to Salesforce via bulk CSV import.
+        Flush batched records to Salesforce via bulk CSV import and wait for every
+        outstanding job of those object types, including earlier async flushes.
         
         Args:
             sobject: Specific object type to flush (None = flush all)
@@ -75,77 +241,94 @@ class BulkRecordCreator:
         else:
             objects_to_flush = list(self.batches.keys())
         
-        results = {}
-        
         for obj in objects_to_flush:
-            if obj not in self.batches or not self.batches[obj]:
-                continue
-            
-            records = self.batches[obj]
-            logger.info(f"Bulk creating {len(records)} {obj} record(s)")
-            
+            self.flush_async(obj)
+        
+        waiting = [entry for entry in self._pending if sobject is None or entry[0] == sobject]
+        self._pending = [entry for entry in self._pending if not (sobject is None or entry[0] == sobject)]
+        
+        results = {}
+        error = None
+        for obj, records, future in waiting:
             try:
-                created_ids = self._bulk_create(obj, records)
-                results[obj] = created_ids
-                
-                # Clear batch after successful creation
-                self.batches[obj] = []
+                created_ids = future.result()
             except Exception as e:
                 logger.error(f"Bulk creation failed for {obj}: {e}")
-                # Don't clear batch on failure - allow retry
-                raise
+                # Put the records back on failure - allow retry
+                self.batches[obj] = records + self.batches.get(obj, [])
+                error = error or e
+                continue
+            if created_ids is None:
+                results.setdefault(obj, None)
+            else:
+                results[obj] = (results.get(obj) or []) + created_ids
         
+        if error is not None:
+            raise error
         return results
     
-    def _bulk_create(self, sobject: str, records: List[Dict[str, Any]]) -> List[str]:
+    def _finish_bulk_create(self, sobject: str, records: List[Dict[str, Any]],
+                            finish: Callable[[], Optional[List[str]]]) -> Optional[List[str]]:
+        """Wait for one job on the background thread and hand its IDs to on_created."""
+        created_ids = finish()
+        if self.on_created is not None:
+            self.on_created(sobject, records, created_ids)
+        return created_ids
+    
+    def _bulk_create(self, sobject: str, records: List[Dict[str, Any]],
+                     fieldnames: Optional[List[str]] = None) -> List[str]:
         """
         Create records using Bulk API 2.0 via CSV import.
         
         Args:
             sobject: Salesforce object type
             records: List of record dictionaries
+            fieldnames: Optional CSV columns (default: the sobject's from add_record,
+                else the sorted union of the records' keys)
         
         Returns:
             List of created record IDs
         """
-        # Write records to CSV
-        csv_file = self.temp_dir / f'bulk_{sobject}.csv'
-        
-        # Get all unique field names
-        all_fields = set()
-        for record in records:
-            all_fields.update(record.keys())
-        
-        field_list = sorted(all_fields)
-        
-        # Sanitize records: remove embedded newlines from field values
-        sanitized_records = []
-        for record in records:
-            sanitized = {}
-            for key, value in record.items():
-                if isinstance(value, str):
-                    # Replace any newline characters with spaces
-                    sanitized[key] = value.replace('\r\n', ' ').replace('\r', ' ').replace('\n', ' ')
-                else:
-                    sanitized[key] = value
-            sanitized_records.append(sanitized)
-        
-        # Write CSV initially with default line endings
-        with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=field_list)
-            writer.writeheader()
-            writer.writerows(sanitized_records)
-        
-        # Read the file and convert line endings to CRLF (Salesforce Bulk API requirement)
-        with open(csv_file, 'rb') as f:
-            content = f.read()
-        
-        # Replace LF with CRLF, but avoid double CRLF
-        content = content.replace(b'\r\n', b'\n').replace(b'\n', b'\r\n')
-        
-        with open(csv_file, 'wb') as f:
-            f.write(content)
+        return self._start_bulk_create(sobject, records, fieldnames)()
+    
+    def _start_bulk_create(self, sobject: str, records: List[Dict[str, Any]],
+                           fieldnames: Optional[List[str]] = None) -> Callable[[], Optional[List[str]]]:
+        """
+        Submit a create job and return a callable that waits for it and returns the
+        created IDs. REST jobs are submitted here, so Salesforce starts on them at
+        once; the sf CLI import runs entirely inside the returned callable.
+        """
+        # Build the CSV body in memory from the canonical columns, else all unique field names
+        field_list = fieldnames or self.fieldnames.get(sobject) or sorted(_field_names(records))
+        csv_data = _bulk_csv_bytes(field_list, records)
+        if self.debug_dump_csv:
+            _dump_bulk_csv(f'bulk_{sobject}.csv', csv_data)
+        
+        # Submit through the Bulk API REST endpoints when the session is available.
+        # Only a job that never got closed falls back to the CLI; once submitted,
+        # retrying could create the records twice.
+        bulk_api = self.sf_cli_target.bulk_api() if hasattr(self.sf_cli_target, 'bulk_api') else None
+        if bulk_api is not None:
+            try:
+                job_id = bulk_api.submit_job(sobject, 'insert', csv_data)
+            except Exception as e:
+                logger.warning(f"Bulk API REST submit failed, using sf CLI: {e}")
+            else:
+                return functools.partial(self._rest_job_results, bulk_api, sobject, job_id)
         
+        return functools.partial(self._cli_bulk_create, sobject, csv_data)
+    
+    def _cli_bulk_create(self, sobject: str, csv_data: bytes) -> Optional[List[str]]:
+        """Create records with 'sf data import bulk', waiting up to 10 minutes."""
+        # The CLI reads from a file, removed again once the import returns
+        csv_file = _stage_bulk_csv(f'_{sobject}.csv', csv_data)
+        try:
+            return self._run_cli_bulk_import(sobject, csv_file)
+        finally:
+            csv_file.unlink(missing_ok=True)
+    
+    def _run_cli_bulk_import(self, sobject: str, csv_file: Path) -> Optional[List[str]]:
+        """Run 'sf data import bulk' on a staged CSV file and return the created IDs."""
         # Execute bulk import via SF CLI using Bulk API 2.0
         # Note: Use 'sf data import bulk' for Bulk API 2.0
         # Try with --line-ending parameter if supported
@@ -171,7 +354,8 @@ class BulkRecordCreator:
                 text=True,
                 timeout=600,  # 10 minute timeout
                 check=False,
-                cwd=str(logs_dir)  # Run from logs directory
+                cwd=str(logs_dir),  # Run from logs directory
+                env=SF_CLI_ENV
             )
         except subprocess.TimeoutExpired as e:
             raise Exception(f"Bulk create timed out after 10 minutes") from e
@@ -181,7 +365,7 @@ class BulkRecordCreator:
             
             # Try to pretty-print JSON error if possible
             try:
-                error_json = json.loads(error_msg)
+                error_json = _json.loads(error_msg)
                 console.print("[yellow]⚠ Bulk create failed:[/yellow]")
                 console.print_json(data=error_json)
             except (json.JSONDecodeError, TypeError):
@@ -190,7 +374,7 @@ class BulkRecordCreator:
             # Try to extract partial results from failed job
             # The error might include a job ID we can query
             try:
-                response = json.loads(result.stdout) if result.stdout else {}
+                response = _json.loads(result.stdout) if result.stdout else {}
                 job_id = response.get('data', {}).get('jobId')
                 
                 if job_id:
@@ -207,14 +391,15 @@ class BulkRecordCreator:
                         capture_output=True,
                         text=True,
                         timeout=60,
-                        check=False
+                        check=False,
+                        env=SF_CLI_ENV
                     )
                     
                     logger.info(f"Bulk results command returncode: {results_run.returncode}")
                     if results_run.stdout:
                         try:
                             # Try to parse and pretty-print JSON
-                            results_json = json.loads(results_run.stdout)
+                            results_json = _json.loads(results_run.stdout)
                             console.print("[dim]Bulk results:[/dim]")
                             console.print_json(data=results_json)
                         except json.JSONDecodeError:
@@ -224,7 +409,7 @@ class BulkRecordCreator:
                         logger.info(f"Bulk results stderr: {results_run.stderr[:500]}")
                     
                     if results_run.returncode == 0:
-                        results_response = json.loads(results_run.stdout)
+                        results_response = _json.loads(results_run.stdout)
                         logger.info(f"Bulk results response status: {results_response.get('status')}")
                         logger.info(f"Bulk results keys: {list(results_response.keys())}")
                         
@@ -239,18 +424,8 @@ class BulkRecordCreator:
                             if successful_count > 0 and success_file:
                                 logger.info(f"Reading {successful_count} successful ID(s) from {success_file}")
                                 # Read the success CSV file to get IDs
-                                successful_ids = []
                                 try:
-                                    with open(success_file, 'r', encoding='utf-8') as f:
-                                        reader = csv.DictReader(f)
-                                        for row in reader:
-                                            # The success file has an 'sf__Id' column with the created record ID
-                                            # (Salesforce CLI bulk API v2.0 format)
-                                            if 'sf__Id' in row and row['sf__Id']:
-                                                successful_ids.append(row['sf__Id'])
-                                            elif 'Id' in row and row['Id']:
-                                                # Fallback for older format
-                                                successful_ids.append(row['Id'])
+                                    successful_ids = _success_ids(success_file)
                                     
                                     if successful_ids:
                                         logger.info(f"Retrieved {len(successful_ids)} successful IDs from {success_file}")
@@ -272,7 +447,7 @@ class BulkRecordCreator:
         
         # Parse response
         try:
-            response = json.loads(result.stdout)
+            response = _json.loads(result.stdout)
         except json.JSONDecodeError:
             # Fallback to returning empty list if can't parse
             logger.warning(f"Could not parse bulk create response")
@@ -297,9 +472,30 @@ class BulkRecordCreator:
         
         return created_ids
     
+    def _rest_job_results(self, bulk_api, sobject: str, job_id: str) -> Optional[List[str]]:
+        """
+        Wait for a REST-submitted insert job and return the created IDs, like the
+        CLI path: partial successes are returned, None signals complete failure.
+        """
+        try:
+            job = bulk_api.wait_for_job(job_id)
+            created_ids = []
+            if int(job.get('numberRecordsProcessed') or 0) > int(job.get('numberRecordsFailed') or 0):
+                created_ids = _success_ids(bulk_api.successful_results_csv(job_id))
+        except Exception as e:
+            logger.warning(f"Bulk create job {job_id} for {sobject} did not finish cleanly: {e}")
+            return None
+        
+        outcome = _job_outcome(job)
+        if outcome['success']:
+            logger.info(f"✓ Bulk created {len(created_ids)} {sobject} record(s)")
+            return created_ids
+        logger.warning(f"Bulk create failed: {outcome['message']}")
+        return created_ids or None
+    
     def flush_all(self) -> Dict[str, List[str]]:
         """
-        Flush all pending batches to Salesforce.
+        Flush all pending batches to Salesforce and wait for every outstanding job.
         
         Returns:
             Dict mapping sobject to list of created IDs
@@ -322,85 +518,141 @@ class BulkRecordCreator:
             return sum(len(records) for records in self.batches.values())
 
 
-def bulk_update_records(sf_cli_target, sobject: str, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+def _job_outcome(job: Dict[str, Any]) -> Dict[str, Any]:
+    """{'success', 'message'} for a finished Bulk API 2.0 job's info."""
+    failed = int(job.get('numberRecordsFailed') or 0)
+    if job.get('state') == 'JobComplete' and not failed:
+        return {'success': True}
+    message = job.get('errorMessage') or f"job {job.get('id')} {job.get('state')}, {failed} record(s) failed"
+    return {'success': False, 'message': message}
+
+
+def _bulk_update_chunk(sf_cli_target, sobject: str, records: List[Dict[str, Any]], chunk_index: int = 0,
+                       debug_dump_csv: bool = False, fieldnames: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Run one Bulk API 2.0 update job for a slice of records.
+    
+    Returns:
+        Dictionary with 'success' boolean and optional 'message'
+    """
+    # Debug copy name, one per chunk so concurrent jobs never share a file
+    file_name = f'update_{sobject}_{chunk_index}_{len(records)}.csv'
+    csv_file = None
+    
+    try:
+        # Get all field names from records unless the caller fixed them; Id must be first column
+        if fieldnames is None:
+            all_fields = _field_names(records)
+            all_fields.discard('Id')
+            fieldnames = ['Id'] + sorted(all_fields)
+        csv_data = _bulk_csv_bytes(fieldnames, records)
+        if debug_dump_csv:
+            _dump_bulk_csv(file_name, csv_data)
+        
+        # Submit through the Bulk API REST endpoints when the session is available
+        # (updates are idempotent, so any REST error can safely retry via the CLI)
+        bulk_api = sf_cli_target.bulk_api() if hasattr(sf_cli_target, 'bulk_api') else None
+        if bulk_api is not None:
+            try:
+                return _job_outcome(bulk_api.run_job(sobject, 'update', csv_data))
+            except Exception as e:
+                logger.warning(f"Bulk API REST update failed, retrying with sf CLI: {e}")
+        
+        # Execute bulk update via Salesforce CLI (which reads the CSV from a file)
+        csv_file = _stage_bulk_csv(f'_{sobject}_{chunk_index}.csv', csv_data)
+        result = sf_cli_target.bulk_upsert(sobject, str(csv_file), external_id='Id')
+        
+        if result and result.get('status') == 0:
+            return {'success': True}
+        error_msg = result.get('message', 'Unknown error') if result else 'No response from CLI'
+        return {'success': False, 'message': error_msg}
+    
+    except Exception as e:
+        return {'success': False, 'message': str(e)}
+    
+    finally:
+        # Clean up the staged file (debug_dump_csv keeps its own copy)
+        if csv_file is not None:
+            csv_file.unlink(missing_ok=True)
+
+
+def bulk_update_records(sf_cli_target, sobject: str, records: List[Dict[str, Any]],
+                        debug_dump_csv: bool = False, fieldnames: Optional[List[str]] = None) -> Dict[str, Any]:
     """
     Update records in bulk using Bulk API 2.0.
     Each record must have 'Id' field.
     
+    Records are split into jobs of BULK_UPDATE_CHUNK_SIZE that are submitted
+    concurrently (up to MAX_BULK_UPDATE_WORKERS at a time), so one large object
+    is not a single monolithic job. Payloads holding only Id are skipped, and
+    fewer than MIN_BULK_UPDATE_RECORDS records are updated without a Bulk job.
+    
     Args:
         sf_cli_target: Salesforce CLI wrapper for target org
         sobject: Salesforce object type (e.g., 'Account', 'Contact')
         records: List of dictionaries with 'Id' and fields to update
+        debug_dump_csv: Also write each job's CSV to tmp_bulk/ for troubleshooting
+        fieldnames: Optional CSV columns, 'Id' first, covering every record's keys
+            (e.g. from the Phase 2 caller); skips scanning and sorting the records' keys,
+            and keeps the same column order for every job
     
     Returns:
-        Dictionary with 'success' boolean and optional 'message'
+        Dictionary with 'success' boolean (True only if every job succeeded),
+        'records_updated', and on failure 'message' plus 'failed_records' (the
+        records of the failed jobs, so callers can retry just those)
     """
     if not records:
         return {'success': True, 'message': 'No records to update'}
     
+    # Payloads holding nothing but Id have nothing to update
+    records = [record for record in records if len(record) > 1]
+    if not records:
+        return {'success': True, 'records_updated': 0, 'message': 'No fields to update'}
+    
+    # A Bulk job costs seconds of overhead whatever its size, so a lone record
+    # goes through a single record update instead
+    if len(records) < MIN_BULK_UPDATE_RECORDS and hasattr(sf_cli_target, 'update_record'):
+        record = records[0]
+        if sf_cli_target.update_record(sobject, record['Id'], record):
+            return {'success': True, 'records_updated': 1}
+        return {
+            'success': False,
+            'message': f"Update of {sobject} {record['Id']} failed",
+            'records_updated': 0,
+            'failed_records': records
+        }
+    
     logger.info(f"Starting bulk update of {len(records)} {sobject} record(s)...")
     
-    # Create temp directory for CSV
-    temp_dir = Path(__file__).parent / 'tmp_bulk'
-    temp_dir.mkdir(exist_ok=True)
+    chunks = [records[start:start + BULK_UPDATE_CHUNK_SIZE]
+              for start in range(0, len(records), BULK_UPDATE_CHUNK_SIZE)]
+    if len(chunks) == 1:
+        outcomes = [_bulk_update_chunk(sf_cli_target, sobject, chunks[0], debug_dump_csv=debug_dump_csv, fieldnames=fieldnames)]
+    else:
+        logger.info(f"  Splitting into {len(chunks)} bulk job(s) of up to {BULK_UPDATE_CHUNK_SIZE} record(s)")
+        with ThreadPoolExecutor(max_workers=min(MAX_BULK_UPDATE_WORKERS, len(chunks))) as executor:
+            outcomes = list(executor.map(
+                lambda indexed: _bulk_update_chunk(sf_cli_target, sobject, indexed[1], indexed[0], debug_dump_csv, fieldnames),
+                enumerate(chunks)
+            ))
     
-    # Write records to CSV
-    csv_file = temp_dir / f'update_{sobject}_{len(records)}.csv'
+    failed_records = []
+    messages = []
+    for chunk, outcome in zip(chunks, outcomes):
+        if not outcome['success']:
+            failed_records.extend(chunk)
+            messages.append(outcome.get('message', 'Unknown error'))
+    records_updated = len(records) - len(failed_records)
     
-    try:
-        # Get all field names from records
-        all_fields = set()
-        for record in records:
-            all_fields.update(record.keys())
-        
-        # Id must be first column
-        fieldnames = ['Id'] + sorted([f for f in all_fields if f != 'Id'])
-        
-        # Sanitize records: remove embedded newlines from field values
-        sanitized_records = []
-        for record in records:
-            sanitized = {}
-            for key, value in record.items():
-                if isinstance(value, str):
-                    # Replace any newline characters with spaces
-                    sanitized[key] = value.replace('\r\n', ' ').replace('\r', ' ').replace('\n', ' ')
-                else:
-                    sanitized[key] = value
-            sanitized_records.append(sanitized)
-        
-        # Write CSV with LF line endings initially
-        with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-            writer.writeheader()
-            writer.writerows(sanitized_records)
-        
-        # Convert line endings to CRLF (Salesforce Bulk API requirement)
-        with open(csv_file, 'rb') as f:
-            content = f.read()
-        
-        # Replace LF with CRLF, but avoid double CRLF
-        content = content.replace(b'\r\n', b'\n').replace(b'\n', b'\r\n')
-        
-        with open(csv_file, 'wb') as f:
-            f.write(content)
-        
-        # Execute bulk update via Salesforce CLI
-        result = sf_cli_target.bulk_upsert(sobject, str(csv_file), external_id='Id')
-        
-        # Clean up temp file
-        csv_file.unlink()
-        
-        if result and result.get('status') == 0:
-            logger.info(f"✓ Successfully bulk updated {len(records)} {sobject} record(s)")
-            return {'success': True, 'records_updated': len(records)}
-        else:
-            error_msg = result.get('message', 'Unknown error') if result else 'No response from CLI'
-            logger.error(f"✗ Bulk update failed: {error_msg}")
-            return {'success': False, 'message': error_msg}
+    if not failed_records:
+        logger.info(f"✓ Successfully bulk updated {len(records)} {sobject} record(s)")
+        return {'success': True, 'records_updated': records_updated}
     
-    except Exception as e:
-        logger.error(f"✗ Bulk update error: {e}")
-        # Clean up temp file on error
-        if csv_file.exists():
-            csv_file.unlink()
-        return {'success': False, 'message': str(e)}
+    error_msg = '; '.join(messages)
+    logger.error(f"✗ Bulk update failed for {len(failed_records)} of {len(records)} record(s): {error_msg}")
+    return {
+        'success': False,
+        'message': error_msg,
+        'records_updated': records_updated,
+        'failed_records': failed_records
+    }
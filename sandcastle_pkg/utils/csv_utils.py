@@ -1,10 +1,8 @@
 """
 CSV utilities for two-phase migration.
-Saves production record data to CSV during Phase 1, reads it back during Phase 2.
+Deprecated: Phase 1 data now lives in the SQLite migration store (see migration_store.py).
 """
 
-import csv
-import json
 #!/usr/bin/env python3
 """
 CSV Export Utilities
@@ -15,83 +13,33 @@ Date: December 24, 2025
 License: MIT License
 """
 
-import os
+import warnings
+
+from sandcastle_pkg.utils.migration_store import (save_migration_record, iter_migration_records,
+                                                  clear_migration_store)
+
+# Phase 1 data moved from per-object CSVs to migration_data/migration.db; these
+# names are kept so existing callers keep working, and point at the new ones.
+
+
+def _deprecated(old_name, new_name):
+    warnings.warn(f"{old_name}() is deprecated; use sandcastle_pkg.utils.{new_name}()",
+                  DeprecationWarning, stacklevel=3)
+
 
 def write_record_to_csv(object_type, prod_id, sandbox_id, record_data, script_dir):
-    """
-    Writes a record's production data to a CSV file for later lookup population.
-    
-    Args:
-        object_type: Salesforce object type (e.g., 'Account', 'Contact')
-        prod_id: Production org record ID
-        sandbox_id: Sandbox org record ID
-        record_data: Full record data from production (dict)
-        script_dir: Script directory path
-    """
-    csv_dir = os.path.join(script_dir, 'migration_data')
-    os.makedirs(csv_dir, exist_ok=True)
-    
-    csv_path = os.path.join(csv_dir, f'{object_type.lower()}_migration.csv')
-    
-    # Prepare row data
-    row = {
-        'production_id': prod_id,
-        'sandbox_id': sandbox_id,
-        'record_data': json.dumps(record_data)  # Store as JSON string
-    }
-    
-    # Write or append to CSV
-    file_exists = os.path.exists(csv_path)
-    with open(csv_path, 'a', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['production_id', 'sandbox_id', 'record_data']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        
-        if not file_exists:
-            writer.writeheader()
-        
-        writer.writerow(row)
+    """Deprecated alias of save_migration_record()."""
+    _deprecated('write_record_to_csv', 'save_migration_record')
+    save_migration_record(object_type, prod_id, sandbox_id, record_data, script_dir)
 
 
 def read_migration_csv(object_type, script_dir):
-    """
-    Reads all records from a migration CSV file.
-    
-    Args:
-        object_type: Salesforce object type (e.g., 'Account', 'Contact')
-        script_dir: Script directory path
-        
-    Returns:
-        list: List of dicts with keys: production_id, sandbox_id, record_data
-    """
-    csv_path = os.path.join(script_dir, 'migration_data', f'{object_type.lower()}_migration.csv')
-    
-    if not os.path.exists(csv_path):
-        return []
-    
-    records = []
-    with open(csv_path, 'r', newline='', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            records.append({
-                'production_id': row['production_id'],
-                'sandbox_id': row['sandbox_id'],
-                'record_data': json.loads(row['record_data'])
-            })
-    
-    return records
+    """Deprecated: returns list(iter_migration_records(object_type, script_dir))."""
+    _deprecated('read_migration_csv', 'iter_migration_records')
+    return list(iter_migration_records(object_type, script_dir))
 
 
 def clear_migration_csvs(script_dir):
-    """
-    Clears all migration CSV files to start fresh.
-    
-    Args:
-        script_dir: Script directory path
-    """
-    csv_dir = os.path.join(script_dir, 'migration_data')
-    if os.path.exists(csv_dir):
-        for filename in os.listdir(csv_dir):
-            if filename.endswith('_migration.csv'):
-                filepath = os.path.join(csv_dir, filename)
-                os.remove(filepath)
-                print(f"  Cleared {filename}")
+    """Deprecated alias of clear_migration_store()."""
+    _deprecated('clear_migration_csvs', 'clear_migration_store')
+    clear_migration_store(script_dir)
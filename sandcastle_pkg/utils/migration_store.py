@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+SQLite Migration Store
+
+Author: Ken Brill
+Version: 1.1.8
+Date: December 24, 2025
+License: MIT License
+
+Phase 1 rows for every object type live in one SQLite file
+(migration_data/migration.db) keyed by (object, prod_id), instead of one CSV
+per object with no index. The database runs in WAL mode, so Phase 2 readers do
+not block the writer, and rows are inserted in batched transactions.
+record_data is stored as msgpack bytes when msgpack is installed, else JSON.
+
+Phase 1 modules call save_migration_record(); Phase 2 reads an object back with
+iter_migration_records(). Both share one MigrationStore per script_dir.
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+
+# msgpack (optional) stores record_data as compact binary instead of JSON text
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# orjson (optional) serializes and parses record_data several times faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Rows buffered before they are inserted in one transaction
+INSERT_BATCH_SIZE = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mapping (
+    object TEXT NOT NULL COLLATE NOCASE,
+    prod_id TEXT NOT NULL,
+    sandbox_id TEXT,
+    record_data BLOB,
+    PRIMARY KEY (object, prod_id)
+)
+"""
+
+
+def migration_db_path(script_dir):
+    return os.path.join(script_dir, 'migration_data', 'migration.db')
+
+
+def _dumps(record_data):
+    if msgpack is not None:
+        return msgpack.packb(record_data)
+    if orjson is not None:
+        return orjson.dumps(record_data)
+    return json.dumps(record_data).encode('utf-8')
+
+
+def _loads(blob):
+    # record_data is always a dict: JSON starts with '{', a msgpack map never does,
+    # so rows read back correctly whichever encoder wrote them
+    if blob[:1] != b'{':
+        return msgpack.unpackb(blob)
+    if orjson is not None:
+        return orjson.loads(blob)
+    return json.loads(blob)
+
+
+def _connect(db_path):
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(_SCHEMA)
+    conn.commit()
+    return conn
+
+
+class MigrationStore:
+    """
+    Thread-safe writer for migration_data/migration.db. Rows are buffered and
+    inserted INSERT_BATCH_SIZE at a time in one transaction; a later row for
+    the same (object, prod_id) replaces the earlier one.
+
+    Usage:
+        with MigrationStore(script_dir) as store:
+            store.write('Account', prod_id, sandbox_id, record_data)
+        for row in iter_object_records('Account', script_dir):
+            ...
+    """
+
+    def __init__(self, script_dir, batch_size=INSERT_BATCH_SIZE):
+        os.makedirs(os.path.join(script_dir, 'migration_data'), exist_ok=True)
+        self.db_path = migration_db_path(script_dir)
+        self.batch_size = batch_size
+        self._pending = []
+        self._lock = threading.Lock()
+        self._conn = _connect(self.db_path)
+
+    def write(self, object_type, prod_id, sandbox_id, record_data):
+        """Queue one record's production data; inserted with the next batch."""
+        row = (object_type, prod_id, sandbox_id, _dumps(record_data))
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self):
+        """Insert every queued row."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending or self._conn is None:
+            return
+        with self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO mapping VALUES (?, ?, ?, ?)', self._pending)
+        self._pending = []
+
+    def clear(self):
+        """Drop queued rows and delete every stored row."""
+        with self._lock:
+            self._pending = []
+            with self._conn:
+                self._conn.execute('DELETE FROM mapping')
+
+    def close(self):
+        """Insert remaining rows and close the connection."""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._flush_locked()
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def iter_object_records(object_type, script_dir):
+    """
+    Streams one object's rows from migration.db on its own read connection.
+
+    Yields:
+        dict: production_id, sandbox_id, record_data
+    """
+    db_path = migration_db_path(script_dir)
+    if not os.path.exists(db_path):
+        return
+
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute('SELECT prod_id, sandbox_id, record_data FROM mapping WHERE object = ?',
+                              (object_type,))
+        for prod_id, sandbox_id, record_data in cursor:
+            yield {
+                'production_id': prod_id,
+                'sandbox_id': sandbox_id,
+                'record_data': _loads(record_data)
+            }
+    finally:
+        conn.close()
+
+
+# Open migration stores used by save_migration_record, keyed by script_dir
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _migration_store(script_dir):
+    with _stores_lock:
+        store = _stores.get(script_dir)
+        if store is None:
+            store = _stores[script_dir] = MigrationStore(script_dir)
+        return store
+
+
+def save_migration_record(object_type, prod_id, sandbox_id, record_data, script_dir):
+    """
+    Saves a record's production data for Phase 2 lookup population.
+    
+    Rows go to the run's migration store (migration_data/migration.db), keyed by
+    (object, prod_id). They are inserted INSERT_BATCH_SIZE at a time in one
+    transaction, by flush_migration_store(), before the object is read back,
+    and at exit.
+    
+    Args:
+        object_type: Salesforce object type (e.g., 'Account', 'Contact')
+        prod_id: Production org record ID
+        sandbox_id: Sandbox org record ID
+        record_data: Full record data from production (dict)
+        script_dir: Script directory path
+    """
+    _migration_store(script_dir).write(object_type, prod_id, sandbox_id, record_data)
+
+
+def flush_migration_store():
+    """Insert every row buffered by save_migration_record."""
+    with _stores_lock:
+        for store in _stores.values():
+            store.flush()
+
+
+def close_migration_stores():
+    """Flush and close every store opened by save_migration_record."""
+    with _stores_lock:
+        for store in _stores.values():
+            store.close()
+        _stores.clear()
+
+
+atexit.register(close_migration_stores)
+
+
+def iter_migration_records(object_type, script_dir):
+    """
+    Streams an object's Phase 1 records from the migration store, one row at a time.
+    
+    Args:
+        object_type: Salesforce object type (e.g., 'Account', 'Contact')
+        script_dir: Script directory path
+        
+    Yields:
+        dict: production_id, sandbox_id, record_data
+    """
+    # Make sure rows still buffered by save_migration_record are inserted
+    with _stores_lock:
+        store = _stores.get(script_dir)
+    if store is not None:
+        store.flush()
+    yield from iter_object_records(object_type, script_dir)
+
+
+def clear_migration_store(script_dir):
+    """
+    Clears the migration store to start a fresh run.
+    
+    Args:
+        script_dir: Script directory path
+    """
+    # Close open stores first so no buffered rows land after the clear
+    close_migration_stores()
+    
+    if os.path.exists(migration_db_path(script_dir)):
+        with MigrationStore(script_dir) as store:
+            store.clear()
+        print("  Cleared migration.db")
+    
+    data_dir = os.path.join(script_dir, 'migration_data')
+    if os.path.exists(data_dir):
+        # Per-object *_migration.csv / *_migration.bin files written by earlier
+        # versions of the tool; Phase 2 no longer reads them
+        with os.scandir(data_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(('_migration.csv', '_migration.bin')):
+                    os.remove(entry.path)
+                    print(f"  Cleared {entry.name}")
@@ -1,6 +1,13 @@
 import subprocess
+import functools
 import json
-from typing import Set, Dict, Tuple, Optional
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Set, Dict, FrozenSet, List, Tuple, Optional
 #!/usr/bin/env python3
 """
 Picklist Validation Utilities
@@ -12,63 +19,216 @@ License: MIT License
 """
 
 import logging
+from sandcastle_pkg.cli.salesforce_cli import SF_CLI_ENV
+
+# orjson (optional) parses the large describe responses several times faster; its
+# JSONDecodeError subclasses json.JSONDecodeError, so the handlers below catch both
+try:
+    import orjson as _json
+except ImportError:
+    _json = json
+
+# cysimdjson (optional) parses describe output lazily: only the keys read in
+# _describe_fields are materialized, not the rest of every field's metadata
+try:
+    import cysimdjson
+except ImportError:
+    cysimdjson = None
+
+# cysimdjson parsers are reusable but not thread-safe, so one per thread
+_simdjson_local = threading.local()
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Picklist values saved per org and object, so later runs within the TTL skip
+# the 'sf sobject describe' call entirely. Off unless the config sets
+# picklist_disk_cache: the cache is keyed only by org alias, so a refreshed
+# sandbox or edited picklist would otherwise be validated against stale values.
+PICKLIST_CACHE_DIR = Path.home() / '.sandcastle' / 'cache' / 'picklists'
+PICKLIST_CACHE_TTL = 24 * 60 * 60
+_disk_cache_enabled = False
+
 class SalesforceCliError(Exception):
     """Custom exception for Salesforce CLI errors."""
     pass
 
+def _decode_output(output: bytes) -> str:
+    """CLI output as text, for error messages only."""
+    return output.decode('utf-8', errors='replace')
+
+def _describe_fields(stdout: bytes) -> List[Dict[str, Any]]:
+    """
+    The fields of 'sf sobject describe --json' output, parsed straight from the
+    raw bytes (never decoded to str first). With cysimdjson only name,
+    type and (for picklists) picklistValues are extracted; otherwise the full
+    field descriptions are returned. Raises SalesforceCliError on invalid JSON or
+    a non-zero CLI status.
+    """
+    if cysimdjson is None:
+        try:
+            response = _json.loads(stdout)
+        except ValueError as e:
+            raise SalesforceCliError(f"Invalid JSON response from CLI: {_decode_output(stdout)}") from e
+        if response.get('status') != 0:
+            error_msg = response.get('message', 'Unknown error')
+            raise SalesforceCliError(f"SF CLI error: {error_msg}")
+        return response.get('result', {}).get('fields', [])
+    
+    parser = getattr(_simdjson_local, 'parser', None)
+    if parser is None:
+        parser = _simdjson_local.parser = cysimdjson.JSONParser()
+    try:
+        response = parser.parse(stdout)
+    except ValueError as e:
+        raise SalesforceCliError(f"Invalid JSON response from CLI: {_decode_output(stdout)}") from e
+    if response.get('status') != 0:
+        error_msg = response.get('message', 'Unknown error')
+        raise SalesforceCliError(f"SF CLI error: {error_msg}")
+    
+    result_data = response.get('result')
+    if result_data is None or 'fields' not in result_data:
+        return []
+    fields = []
+    for field_desc in result_data['fields']:
+        field_type = field_desc['type']
+        picklist_values = []
+        if field_type == 'picklist' or field_type == 'multipicklist':
+            picklist_values = [{'value': val.get('value'), 'active': val.get('active', True)}
+                               for val in field_desc.get('picklistValues') or ()]
+        fields.append({'name': field_desc['name'], 'type': field_type, 'picklistValues': picklist_values})
+    return fields
+
+def _picklist_value_set(field_desc: Dict[str, Any], active_only: bool) -> Set[str]:
+    """
+    The values of one described picklist field, as a set built in a single
+    comprehension. Values are interned: the same ones recur across fields and objects.
+    """
+    return {sys.intern(val['value']) for val in field_desc.get('picklistValues', ())
+            if not active_only or val.get('active', True)}
+
+@functools.lru_cache(maxsize=4096)
+def _norm(name: str) -> str:
+    """Lowercased cache key part; object and field names are a small fixed set, so this is nearly always a hit."""
+    return name.lower()
+
 class PicklistCache:
-    """Thread-safe cache manager for picklist values."""
+    """
+    Thread-safe cache manager for picklist values.
+    Values are stored as frozensets so validation is a plain membership test
+    and cached entries can be shared between threads without copying.
+    Each value set is stored once, keyed by (sobject, field); whole-object
+    prefetches only add an index of the object's picklist field names.
+    """
     
     def __init__(self):
-        self._cache: Dict[Tuple[str, str], Set[str]] = {}
-        self._object_cache: Dict[str, Dict[str, Set[str]]] = {}  # NEW: Object-level cache
+        self._cache: Dict[Tuple[str, str], FrozenSet[str]] = {}
+        self._object_fields: Dict[str, Tuple[str, ...]] = {}  # sobject -> prefetched picklist field names
+        self._lock = threading.RLock()
+        self._fetch_locks: Dict[str, threading.Lock] = {}
     
-    def get(self, sobject: str, field: str) -> Optional[Set[str]]:
+    def get(self, sobject: str, field: str) -> Optional[FrozenSet[str]]:
         """Retrieve cached picklist values."""
-        return self._cache.get((sobject.lower(), field.lower()))
+        with self._lock:
+            return self._cache.get((_norm(sobject), _norm(field)))
     
     def set(self, sobject: str, field: str, values: Set[str]) -> None:
         """Store picklist values in cache."""
-        self._cache[(sobject.lower(), field.lower())] = values
-    
-    def get_all_for_object(self, sobject: str) -> Optional[Dict[str, Set[str]]]:
-        """Retrieve all cached picklist values for an object."""
-        return self._object_cache.get(sobject.lower())
+        frozen = frozenset(values)
+        with self._lock:
+            self._cache[(_norm(sobject), _norm(field))] = frozen
+    
+    def get_all_for_object(self, sobject: str) -> Optional[Dict[str, FrozenSet[str]]]:
+        """Retrieve all cached picklist values for an object (None if not prefetched)."""
+        sobject_lower = _norm(sobject)
+        with self._lock:
+            fields = self._object_fields.get(sobject_lower)
+            if fields is None:
+                return None
+            return {field: self._cache[(sobject_lower, _norm(field))] for field in fields}
     
     def set_all_for_object(self, sobject: str, fields: Dict[str, Set[str]]) -> None:
         """Store all picklist values for an object."""
-        sobject_lower = sobject.lower()
-        self._object_cache[sobject_lower] = fields
-        # Also populate individual cache entries
-        for field, values in fields.items():
-            self._cache[(sobject_lower, field.lower())] = values
+        sobject_lower = _norm(sobject)
+        frozen = {field: frozenset(values) for field, values in fields.items()}
+        with self._lock:
+            for field, values in frozen.items():
+                self._cache[(sobject_lower, _norm(field))] = values
+            self._object_fields[sobject_lower] = tuple(frozen)
+    
+    def fetch_lock(self, sobject: str) -> threading.Lock:
+        """
+        Per-object lock held while describing an sobject, so concurrent misses
+        for the same object wait for one describe instead of each running their own.
+        """
+        sobject_lower = _norm(sobject)
+        with self._lock:
+            lock = self._fetch_locks.get(sobject_lower)
+            if lock is None:
+                lock = self._fetch_locks[sobject_lower] = threading.Lock()
+            return lock
     
     def clear(self, sobject: str = None, field: str = None) -> None:
         """Clear cache entirely or for specific sobject/field."""
-        if sobject is None:
-            self._cache.clear()
-            self._object_cache.clear()
-        elif field is None:
-            # Clear all fields for this sobject
-            keys_to_remove = [k for k in self._cache.keys() if k[0] == sobject.lower()]
-            for key in keys_to_remove:
-                del self._cache[key]
-            self._object_cache.pop(sobject.lower(), None)
-        else:
-            self._cache.pop((sobject.lower(), field.lower()), None)
+        with self._lock:
+            if sobject is None:
+                self._cache.clear()
+                self._object_fields.clear()
+            elif field is None:
+                # Clear all fields for this sobject
+                keys_to_remove = [k for k in self._cache.keys() if k[0] == _norm(sobject)]
+                for key in keys_to_remove:
+                    del self._cache[key]
+                self._object_fields.pop(_norm(sobject), None)
+            else:
+                self._cache.pop((_norm(sobject), _norm(field)), None)
+                # The object's prefetched view no longer covers every field
+                self._object_fields.pop(_norm(sobject), None)
 
 # Global cache instance
 _picklist_cache = PicklistCache()
 
+def set_picklist_disk_cache(enabled: bool) -> None:
+    """Enable or disable reading and writing the picklist disk cache (disabled by default)."""
+    global _disk_cache_enabled
+    _disk_cache_enabled = bool(enabled)
+
+def _persisted_cache_path(target_org: Optional[str], sobject: str, active_only: bool) -> Path:
+    """Disk cache file for an object's picklists in one org (alias made safe for a file name)."""
+    safe_org = re.sub(r'[^\w.-]', '_', str(target_org or 'default'))
+    return PICKLIST_CACHE_DIR / safe_org / f"{sobject.lower()}.{'active' if active_only else 'all'}.json"
+
+def _load_persisted_picklists(target_org: Optional[str], sobject: str, active_only: bool) -> Optional[Dict[str, Set[str]]]:
+    """Picklist values per field saved within PICKLIST_CACHE_TTL, else None."""
+    if not _disk_cache_enabled:
+        return None
+    cache_path = _persisted_cache_path(target_org, sobject, active_only)
+    try:
+        if time.time() - cache_path.stat().st_mtime >= PICKLIST_CACHE_TTL:
+            return None
+        cached = _json.loads(cache_path.read_bytes())
+        return {field: {sys.intern(value) for value in values} for field, values in cached.items()}
+    except (OSError, ValueError, AttributeError, TypeError):
+        return None
+
+def _persist_picklists(target_org: Optional[str], sobject: str, active_only: bool,
+                       picklists: Dict[str, Set[str]]) -> None:
+    """Save an object's picklist values for later runs; a cache that cannot be written is skipped."""
+    if not _disk_cache_enabled:
+        return
+    cache_path = _persisted_cache_path(target_org, sobject, active_only)
+    payload = _json.dumps({field: sorted(values) for field, values in picklists.items()})
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_bytes(payload.encode('utf-8') if isinstance(payload, str) else payload)
+    except OSError as e:
+        logger.debug(f"Could not save picklist cache {cache_path}: {e}")
+
 def prefetch_picklists_for_object(
     sf_cli_target,
     sobject: str,
     active_only: bool = True
-) -> Dict[str, Set[str]]:
+) -> Dict[str, FrozenSet[str]]:
     """
     Pre-fetch ALL picklist values for an object in a single call.
     OPTIMIZED: Fetches all picklists at once instead of per-field queries.
@@ -84,28 +244,75 @@ def prefetch_picklists_for_object(
     Raises:
         SalesforceCliError: If the CLI command fails
     """
+    return _prefetch_picklists(sf_cli_target.target_org, sobject, active_only)
+
+def _prefetch_picklists(target_org: str, sobject: str, active_only: bool) -> Dict[str, FrozenSet[str]]:
     # Check cache first
     cached = _picklist_cache.get_all_for_object(sobject)
     if cached is not None:
         logger.debug(f"Cache hit for all picklists on {sobject}")
         return cached
     
-    # Fetch from Salesforce
-    try:
-        all_picklists = _fetch_all_picklists_for_object(
-            sf_cli_target.target_org,
-            sobject,
-            active_only
-        )
-    except Exception as e:
-        logger.error(f"Failed to prefetch picklist values for {sobject}: {str(e)}")
-        raise SalesforceCliError(f"Failed to retrieve picklist values: {str(e)}") from e
+    with _picklist_cache.fetch_lock(sobject):
+        # Another thread may have described the object while we waited
+        cached = _picklist_cache.get_all_for_object(sobject)
+        if cached is not None:
+            return cached
+        
+        # Values saved by an earlier run skip the describe
+        persisted = _load_persisted_picklists(target_org, sobject, active_only)
+        if persisted is not None:
+            _picklist_cache.set_all_for_object(sobject, persisted)
+            logger.debug(f"Loaded picklists for {sobject} from the disk cache")
+            return _picklist_cache.get_all_for_object(sobject)
+        
+        # Fetch from Salesforce
+        try:
+            all_picklists = _fetch_all_picklists_for_object(
+                target_org,
+                sobject,
+                active_only
+            )
+        except Exception as e:
+            logger.error(f"Failed to prefetch picklist values for {sobject}: {str(e)}")
+            raise SalesforceCliError(f"Failed to retrieve picklist values: {str(e)}") from e
+        
+        # Cache the result
+        _picklist_cache.set_all_for_object(sobject, all_picklists)
+        _persist_picklists(target_org, sobject, active_only, all_picklists)
+        logger.info(f"Pre-fetched {len(all_picklists)} picklist fields for {sobject}")
     
-    # Cache the result
-    _picklist_cache.set_all_for_object(sobject, all_picklists)
-    logger.info(f"Pre-fetched {len(all_picklists)} picklist fields for {sobject}")
+    return _picklist_cache.get_all_for_object(sobject)
+
+def prefetch_picklists_for_objects(
+    sf_cli_target,
+    sobjects: List[str],
+    active_only: bool = True,
+    max_workers: int = 8
+) -> Dict[str, Dict[str, FrozenSet[str]]]:
+    """
+    Pre-fetch picklist values for several objects at once, describing up to
+    max_workers objects concurrently (each describe is an independent,
+    network-bound CLI call). Objects that fail are logged and left out, so
+    their fields are described again on first use.
     
-    return all_picklists
+    Returns:
+        Dict mapping sobject to its prefetch_picklists_for_object result
+    """
+    sobjects = list(dict.fromkeys(sobjects))
+    if not sobjects:
+        return {}
+    
+    def prefetch(sobject):
+        try:
+            return sobject, prefetch_picklists_for_object(sf_cli_target, sobject, active_only)
+        except SalesforceCliError as e:
+            logger.warning(f"Skipping picklist prefetch for {sobject}: {e}")
+            return sobject, None
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sobjects)))) as executor:
+        results = dict(executor.map(prefetch, sobjects))
+    return {sobject: picklists for sobject, picklists in results.items() if picklists is not None}
 
 def _fetch_all_picklists_for_object(
     target_org: str,
@@ -126,9 +333,9 @@ def _fetch_all_picklists_for_object(
         result = subprocess.run(
             command,
             capture_output=True,
-            text=True,
             timeout=30,
-            check=False
+            check=False,
+            env=SF_CLI_ENV
         )
     except subprocess.TimeoutExpired as e:
         raise SalesforceCliError(f"CLI command timed out after 30 seconds") from e
@@ -139,38 +346,24 @@ def _fetch_all_picklists_for_object(
         ) from e
     
     if result.returncode != 0:
-        error_msg = result.stderr or result.stdout
+        error_msg = _decode_output(result.stderr or result.stdout)
         raise SalesforceCliError(
             f"CLI command failed for {sobject}: {error_msg}"
         )
     
     # Parse JSON response
-    try:
-        response = json.loads(result.stdout)
-    except json.JSONDecodeError as e:
-        raise SalesforceCliError(f"Invalid JSON response from CLI: {result.stdout}") from e
-    
-    if response.get('status') != 0:
-        error_msg = response.get('message', 'Unknown error')
-        raise SalesforceCliError(f"SF CLI error: {error_msg}")
-    
-    result_data = response.get('result', {})
-    fields = result_data.get('fields', [])
+    fields = _describe_fields(result.stdout)
     
     # Extract all picklist fields
     all_picklists = {}
     for field_desc in fields:
-        field_type = field_desc.get('type', '').lower()
-        if field_type in ('picklist', 'multipicklist'):
-            field_name = field_desc.get('name')
-            picklist_values = set()
-            for val in field_desc.get('picklistValues', []):
-                if active_only and not val.get('active', True):
-                    continue
-                picklist_values.add(val['value'])
-            
-            if picklist_values:  # Only store if there are values
-                all_picklists[field_name] = picklist_values
+        # Describe types are canonical lowercase, so no .lower() per field;
+        # most fields are not picklists and stop here
+        field_type = field_desc['type']
+        if field_type != 'picklist' and field_type != 'multipicklist':
+            continue
+        # Empty picklists too, so get_valid_picklist_values does not describe again
+        all_picklists[field_desc['name']] = _picklist_value_set(field_desc, active_only)
     
     return all_picklists
 
@@ -180,7 +373,7 @@ def get_valid_picklist_values(
     field: str,
     use_cache: bool = True,
     active_only: bool = True
-) -> Set[str]:
+) -> FrozenSet[str]:
     """
     Returns a set of valid picklist values for a given sObject and field.
     
@@ -192,147 +385,80 @@ def get_valid_picklist_values(
         active_only: Whether to return only active picklist values (default: True)
     
     Returns:
-        Set of valid picklist values as strings
+        Frozenset of valid picklist values as strings
     
     Raises:
         SalesforceCliError: If the CLI command fails
         ValueError: If the field is not a picklist type
     """
-    # Check cache first
     if use_cache:
-        cached_values = _picklist_cache.get(sobject, field)
-        if cached_values is not None:
-            logger.debug(f"Cache hit for {sobject}.{field}")
-            return cached_values
+        return _get_valid_picklist_values_cached(sf_cli_target.target_org, sobject, field, active_only)
     
-    # Fetch from Salesforce
+    # Describe the object fresh; the memoized lookups are dropped so they pick up the new values
     try:
-        picklist_values = _fetch_picklist_values(
-            sf_cli_target.target_org,
-            sobject,
-            field,
-            active_only
-        )
+        with _picklist_cache.fetch_lock(sobject):
+            all_picklists = _fetch_all_picklists_for_object(sf_cli_target.target_org, sobject, active_only)
+            _picklist_cache.set_all_for_object(sobject, all_picklists)
+            _persist_picklists(sf_cli_target.target_org, sobject, active_only, all_picklists)
     except Exception as e:
         logger.error(f"Failed to fetch picklist values for {sobject}.{field}: {str(e)}")
-        # Cache empty set to avoid repeated failed calls
         _picklist_cache.set(sobject, field, set())
         raise SalesforceCliError(f"Failed to retrieve picklist values: {str(e)}") from e
-    
-    # Cache the result
-    if use_cache:
-        _picklist_cache.set(sobject, field, picklist_values)
-    
-    return picklist_values
+    finally:
+        _get_valid_picklist_values_cached.cache_clear()
+    return _get_valid_picklist_values_cached(sf_cli_target.target_org, sobject, field, active_only)
 
-def _fetch_picklist_values(
+@functools.lru_cache(maxsize=16384)
+def _get_valid_picklist_values_cached(
     target_org: str,
     sobject: str,
     field: str,
     active_only: bool
-) -> Set[str]:
+) -> FrozenSet[str]:
     """
-    Fetch picklist values using SF CLI.
-    
-    OPTIMIZED: Caches ALL picklist fields from the response, not just the requested one.
-    This prevents repeated API calls when multiple fields are validated.
-    
-    Uses 'sf sobject describe' which is the correct modern command.
+    get_valid_picklist_values memoized on its hot signature, so repeat calls
+    during validation skip the cache lock and key normalization entirely.
+    Failures raise and are not memoized; clear_picklist_cache resets it.
     """
-    # Correct SF CLI command - sobject describe (not sobject describe field)
-    command = [
-        'sf', 'sobject', 'describe',
-        '--sobject', sobject,
-        '--target-org', target_org,
-        '--json'
-    ]
-    
-    try:
-        result = subprocess.run(
-            command,
-            capture_output=True,
-            text=True,
-            timeout=30,
-            check=False
-        )
-    except subprocess.TimeoutExpired as e:
-        raise SalesforceCliError(f"CLI command timed out after 30 seconds") from e
-    except FileNotFoundError as e:
-        raise SalesforceCliError(
-            "SF CLI not found. Please install Salesforce CLI: "
-            "https://developer.salesforce.com/tools/salesforcecli"
-        ) from e
-    
-    if result.returncode != 0:
-        error_msg = result.stderr or result.stdout
-        raise SalesforceCliError(
-            f"CLI command failed for {sobject}.{field}: {error_msg}"
-        )
+    cached_values = _picklist_cache.get(sobject, field)
+    if cached_values is not None:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Cache hit for {sobject}.{field}")
+        return cached_values
     
-    # Parse JSON response
+    # On a miss the whole object is described once (or loaded from the disk
+    # cache), which caches every picklist field on it, not just this one
     try:
-        response = json.loads(result.stdout)
-    except json.JSONDecodeError as e:
-        raise SalesforceCliError(f"Invalid JSON response from CLI: {result.stdout}") from e
-    
-    # Extract picklist values for the specific field
-    if response.get('status') != 0:
-        error_msg = response.get('message', 'Unknown error')
-        raise SalesforceCliError(f"SF CLI error: {error_msg}")
-    
-    result_data = response.get('result', {})
-    fields = result_data.get('fields', [])
-    
-    # OPTIMIZATION: Cache ALL picklist fields while we have the metadata
-    # This prevents repeated API calls for the same object
-    all_picklists_in_response = {}
-    field_metadata = None
-    
-    for field_desc in fields:
-        field_name = field_desc.get('name')
-        field_type = field_desc.get('type', '').lower()
-        
-        # Track the requested field
-        if field_name == field:
-            field_metadata = field_desc
-        
-        # Cache all picklist fields we encounter
-        if field_type in ('picklist', 'multipicklist'):
-            picklist_vals = set()
-            for val in field_desc.get('picklistValues', []):
-                if active_only and not val.get('active', True):
-                    continue
-                picklist_vals.add(val['value'])
-            
-            if picklist_vals:  # Only cache non-empty picklists
-                all_picklists_in_response[field_name] = picklist_vals
-                # Cache each field individually
-                _picklist_cache.set(sobject, field_name, picklist_vals)
-    
-    logger.info(f"Cached {len(all_picklists_in_response)} picklist fields for {sobject} (including {field})")
-    
-    if field_metadata is None:
-        raise ValueError(f"Field {field} not found on {sobject}")
-    
-    # Verify it's a picklist field
-    field_type = field_metadata.get('type', '').lower()
-    if field_type not in ('picklist', 'multipicklist'):
-        raise ValueError(
-            f"Field {sobject}.{field} is not a picklist field (type: {field_type})"
-        )
+        _prefetch_picklists(target_org, sobject, active_only)
+        picklist_values = _picklist_cache.get(sobject, field)
+        if picklist_values is None:
+            # Every picklist field on the object is cached, so this one is missing or not a picklist
+            raise ValueError(f"Field {sobject}.{field} not found or is not a picklist field")
+    except Exception as e:
+        logger.error(f"Failed to fetch picklist values for {sobject}.{field}: {str(e)}")
+        # Cache empty set to avoid repeated failed calls
+        _picklist_cache.set(sobject, field, set())
+        if isinstance(e, SalesforceCliError):
+            raise
+        raise SalesforceCliError(f"Failed to retrieve picklist values: {str(e)}") from e
     
-    # Return the values for the requested field
-    picklist_values = all_picklists_in_response.get(field, set())
-    logger.debug(f"Returning {len(picklist_values)} values for {sobject}.{field}")
     return picklist_values
 
 def clear_picklist_cache(sobject: str = None, field: str = None) -> None:
     """
-    Clear the picklist cache.
+    Clear the picklist cache, in memory and on disk (every org's saved values for
+    the object, since they are stored per object).
     
     Args:
         sobject: Optional sobject to clear (clears all if None)
         field: Optional field to clear (requires sobject)
     """
     _picklist_cache.clear(sobject, field)
+    _get_valid_picklist_values_cached.cache_clear()
+    pattern = f"*/{sobject.lower()}.*.json" if sobject else "*/*.json"
+    for cache_path in PICKLIST_CACHE_DIR.glob(pattern):
+        try:
+            cache_path.unlink()
+        except OSError as e:
+            logger.debug(f"Could not remove picklist cache {cache_path}: {e}")
     logger.info(f"Cleared cache for {sobject or 'all objects'}")
\ No newline at end of file
@@ -10,16 +10,72 @@ License: MIT License
 
 import os
 import csv
+import queue
+import logging
+import functools
+import threading
+import contextlib
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Optional, Set
 from rich.console import Console
 from sandcastle_pkg.utils.picklist_utils import get_valid_picklist_values
+from sandcastle_pkg.utils.soql import soql_in_list, soql_literal
 
-console = Console()
+logger = logging.getLogger(__name__)
 
-# Global cache for record existence checks to avoid repeated queries
-_record_existence_cache = {}
+# Per-thread switch for per-record detail output (see quiet_details)
+_output_state = threading.local()
+
+@contextlib.contextmanager
+def quiet_details():
+    """
+    Route the per-record detail messages printed by this module to logging at
+    DEBUG level for the current thread, skipping Rich rendering entirely.
+    """
+    previous = getattr(_output_state, 'quiet', False)
+    _output_state.quiet = True
+    try:
+        yield
+    finally:
+        _output_state.quiet = previous
+
+class _DetailConsole:
+    """
+    Console proxy that logs instead of rendering while quiet_details() is active.
+    Messages take logging-style %s arguments, so nothing is formatted when the
+    message is going to a disabled DEBUG log.
+    """
+
+    def __init__(self, console):
+        self._console = console
+
+    def print(self, message='', *args, **kwargs):
+        if getattr(_output_state, 'quiet', False):
+            logger.debug(message, *args)
+        else:
+            self._console.print(message % args if args else message, **kwargs)
+
+def _print_detail(message, *args):
+    """print() for per-record detail messages (logging-style %s arguments), honouring quiet_details()."""
+    if getattr(_output_state, 'quiet', False):
+        logger.debug(message, *args)
+    else:
+        print(message % args if args else message)
+
+console = _DetailConsole(Console())
+
+# Cache for record existence checks to avoid repeated queries,
+# keyed by (target_org, object_type, record_id) so orgs never share answers
+_record_existence_cache: Dict[tuple, bool] = {}
+
+def _existence_key(sf_cli, object_type, record_id):
+    """Key for _record_existence_cache: the same ID can exist in one org and not another."""
+    return (sf_cli.target_org, object_type, record_id)
 
 # Cache for fallback user ID (queried once per target org)
-_fallback_user_cache = {}
+_fallback_user_cache: Dict[Optional[str], Optional[str]] = {}
 
 def get_fallback_user_id(sf_cli_target):
     """
@@ -64,17 +120,15 @@ def check_record_exists(sf_cli, object_type, record_id):
     Returns:
         bool: True if record exists, False otherwise
     """
-    cache_key = f"{object_type}:{record_id}"
+    cache_key = _existence_key(sf_cli, object_type, record_id)
     
     # Check cache first
     if cache_key in _record_existence_cache:
         return _record_existence_cache[cache_key]
     
-    # Query the org
+    # Query the org (same escaped Id IN query as prefetch_record_existence)
     try:
-        query = f"SELECT Id FROM {object_type} WHERE Id = '{record_id}' LIMIT 1"
-        result = sf_cli.query_records(query)
-        exists = result and len(result) > 0
+        exists = record_id in _existing_ids(sf_cli, object_type, [record_id])
         
         # Cache the result
         _record_existence_cache[cache_key] = exists
@@ -85,7 +139,314 @@ def check_record_exists(sf_cli, object_type, record_id):
         _record_existence_cache[cache_key] = False
         return False
 
-def replace_lookups_with_dummies(record, insertable_fields_info, dummy_records, created_mappings=None, sf_cli_source=None, sf_cli_target=None, sobject_type=None):
+def _existing_ids(sf_cli, object_type, record_ids):
+    """
+    The subset of record_ids found in the org, from one Id IN query. The sf CLI
+    has no bind variables, so the IDs go in as escaped SOQL literals.
+    """
+    query = f"SELECT Id FROM {object_type} WHERE Id IN {soql_in_list(record_ids)}"
+    found = {record['Id'] for record in sf_cli.query_records(query) or []}
+    # The org returns 18-character IDs; match 15-character inputs on their prefix
+    found.update(record_id[:15] for record_id in list(found))
+    return found
+
+# Concurrent existence queries, kept below the org's concurrent API request limit
+EXISTENCE_PREFETCH_WORKERS = 8
+
+def prefetch_record_existence(sf_cli, object_type, record_ids, chunk_size=200,
+                              max_workers=EXISTENCE_PREFETCH_WORKERS):
+    """
+    Fill the check_record_exists cache for many IDs with one Id IN query per
+    chunk_size IDs, instead of one query per record. IDs the query does not
+    return are cached as missing; chunks whose query fails are left uncached,
+    so check_record_exists queries them one by one as before.
+
+    Args:
+        sf_cli: Salesforce CLI instance
+        object_type: Salesforce object type (e.g., 'User')
+        record_ids: Record IDs to check (None, blanks and duplicates are skipped)
+        chunk_size: Number of IDs per IN clause
+        max_workers: Number of chunk queries run concurrently
+    """
+    _prefetch_existence_chunks(sf_cli, _existence_chunks(sf_cli, object_type, record_ids, chunk_size), max_workers)
+
+def _existence_chunks(sf_cli, object_type, record_ids, chunk_size):
+    """(object_type, chunk_ids) for every ID not in the org's existence cache yet."""
+    pending = [record_id for record_id in dict.fromkeys(record_ids)
+               if record_id and isinstance(record_id, str)
+               and _existence_key(sf_cli, object_type, record_id) not in _record_existence_cache]
+    return [(object_type, pending[start:start + chunk_size]) for start in range(0, len(pending), chunk_size)]
+
+def _prefetch_existence_chunks(sf_cli, chunks, max_workers=EXISTENCE_PREFETCH_WORKERS):
+    """Run the chunk queries (independent and network-bound) on up to max_workers threads."""
+    def check_chunk(chunk):
+        object_type, chunk_ids = chunk
+        try:
+            found = _existing_ids(sf_cli, object_type, chunk_ids)
+        except Exception as e:
+            console.print(f"[yellow]Warning: Could not prefetch {object_type} existence: {e}[/yellow]")
+            return
+        for record_id in chunk_ids:
+            _record_existence_cache[_existence_key(sf_cli, object_type, record_id)] = record_id in found
+
+    if len(chunks) <= 1 or max_workers <= 1:
+        for chunk in chunks:
+            check_chunk(chunk)
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+        list(executor.map(check_chunk, chunks))
+
+def prefetch_user_existence(sf_cli_target, owner_ids):
+    """
+    Check every OwnerId of a record batch against the target org's Users up front,
+    so filter_record_data's per-record check_record_exists calls hit the cache.
+    """
+    prefetch_record_existence(sf_cli_target, 'User', owner_ids)
+
+def prefetch_reference_existence(sf_cli_target, records, insertable_fields_info, chunk_size=200,
+                                 max_workers=EXISTENCE_PREFETCH_WORKERS):
+    """
+    Prime the check_record_exists cache for a record batch before filter_record_data
+    runs over it: OwnerIds against Users, and every other lookup value grouped by
+    the object it references. The IN queries for all objects run concurrently.
+
+    Args:
+        sf_cli_target: Target Salesforce CLI instance
+        records: Source records (any iterable of dicts)
+        insertable_fields_info: Field metadata dictionary for the records' object
+        chunk_size: Number of IDs per IN clause
+        max_workers: Number of queries run concurrently
+    """
+    records = list(records)
+    ids_by_object = {'User': [record.get('OwnerId') for record in records]}
+    for field_name, referenced_object in _field_partitions(insertable_fields_info).references.items():
+        if field_name == 'OwnerId':
+            continue
+        ids = ids_by_object.setdefault(referenced_object, [])
+        ids.extend(record[field_name] for record in records if isinstance(record.get(field_name), str))
+    
+    chunks = [chunk for referenced_object, ids in ids_by_object.items()
+              for chunk in _existence_chunks(sf_cli_target, referenced_object, ids, chunk_size)]
+    _prefetch_existence_chunks(sf_cli_target, chunks, max_workers)
+
+def prefetch_all_records(sobject, prod_ids, fields_info, sf_cli_source, chunk_size=200):
+    """
+    Fetch a whole migration set from the source org with chunked SOQL instead of
+    one get_record call per record.
+
+    Args:
+        sobject: Salesforce object type (e.g., 'Contact')
+        prod_ids: Production record IDs to fetch
+        fields_info: Field metadata dictionary (fields to select)
+        sf_cli_source: Source org CLI
+        chunk_size: Number of IDs per IN clause
+
+    Returns:
+        dict: Production ID -> record. IDs that could not be fetched are absent,
+              so callers fall back to get_record for them.
+    """
+    records = {}
+    ids = list(dict.fromkeys(record_id for record_id in prod_ids if record_id))
+    if not ids:
+        return records
+
+    fields_str = _select_list(fields_info)
+    for start in range(0, len(ids), chunk_size):
+        records.update(_fetch_chunk(sobject, ids[start:start + chunk_size], fields_str, sf_cli_source))
+    return records
+
+def stream_prefetched_records(sobject, prod_ids, fields_info, sf_cli_source, chunk_size=200, prefetch_depth=2):
+    """
+    Generator version of prefetch_all_records for large migration sets.
+    A background thread fetches the next chunks while the caller processes the
+    current one, and at most prefetch_depth chunks are held in memory at a time.
+
+    Args:
+        sobject: Salesforce object type (e.g., 'Opportunity')
+        prod_ids: Production record IDs to fetch
+        fields_info: Field metadata dictionary (fields to select)
+        sf_cli_source: Source org CLI
+        chunk_size: Number of IDs per chunk (and per IN clause)
+        prefetch_depth: Number of fetched chunks allowed to wait for the caller
+
+    Yields:
+        tuple: (chunk_ids, records) where records maps production ID -> record.
+               IDs that could not be fetched are absent from records.
+    """
+    ids = list(dict.fromkeys(record_id for record_id in prod_ids if record_id))
+    if not ids:
+        return
+
+    fields_str = _select_list(fields_info)
+    chunks = [ids[start:start + chunk_size] for start in range(0, len(ids), chunk_size)]
+    fetched = queue.Queue(maxsize=prefetch_depth)
+    stop = threading.Event()
+    done = object()
+
+    def producer():
+        for chunk_ids in chunks + [None]:
+            item = done if chunk_ids is None else (chunk_ids, _fetch_chunk(sobject, chunk_ids, fields_str, sf_cli_source))
+            # Give up if the consumer stopped iterating early
+            while not stop.is_set():
+                try:
+                    fetched.put(item, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+            if stop.is_set():
+                return
+
+    worker = threading.Thread(target=producer, name=f'prefetch-{sobject}', daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = fetched.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        stop.set()
+
+def _select_list(fields_info):
+    """SELECT list for prefetch queries: Id plus every field in fields_info."""
+    return ', '.join(['Id'] + [name for name in fields_info.keys() if name != 'Id'])
+
+def _fetch_chunk(sobject, chunk_ids, fields_str, sf_cli_source):
+    """Fetch one chunk of records by Id; returns {} (with a warning) if the query fails."""
+    query = f"SELECT {fields_str} FROM {sobject} WHERE Id IN {soql_in_list(chunk_ids)}"
+    try:
+        return {record['Id']: record for record in sf_cli_source.query_records(query) or []}
+    except Exception as e:
+        console.print(f"[yellow]Warning: Could not prefetch {sobject} records: {e}[/yellow]")
+        return {}
+
+# Marker Salesforce puts in duplicate-value errors that carry the existing record's ID
+DUPLICATE_VALUE_MARKER = 'duplicate value found'
+
+def extract_duplicate_id(error_msg):
+    """
+    Extract the existing record ID from a Salesforce duplicate error message
+    (e.g. "duplicate value found: ... with id: 001XXXXXXXXXXXXXXX").
+
+    Scans the text after each 'with id:' marker by hand instead of running a
+    regex, reading at most 18 alphanumeric characters.
+
+    Args:
+        error_msg: Error message returned by the Salesforce CLI
+
+    Returns:
+        str: 15 or 18 character record ID, or None if not found
+    """
+    marker = 'with id:'
+    length = len(error_msg)
+    pos = error_msg.find(marker)
+    while pos != -1:
+        start = pos + len(marker)
+        while start < length and error_msg[start].isspace():
+            start += 1
+        end = start
+        limit = min(start + 18, length)
+        while end < limit and error_msg[end].isascii() and error_msg[end].isalnum():
+            end += 1
+        if end - start in (15, 18):
+            return error_msg[start:end]
+        pos = error_msg.find(marker, start)
+    return None
+
+# Lookup fields that MUST have a value in Phase 1
+REQUIRED_LOOKUP_FIELDS = frozenset({
+    'AccountId', 'OpportunityId', 'QuoteId', 'OrderId',
+    'AccountFromId', 'AccountToId',  # Required for AccountRelationship
+    'OwnerId',  # Required on most objects
+})
+
+# Common required lookups given a dummy when missing from the record
+COMMON_REQUIRED_LOOKUPS = frozenset({'AccountId', 'OpportunityId', 'QuoteId', 'OrderId'})
+
+# Fields that should never be copied (process/workflow driven fields)
+EXCLUDED_FIELDS = frozenset({
+    'Accept_as_Affiliate__c',  # Requires executive contact - process driven
+    'Force_NetSuite_Sync__c',  # Never sync NetSuite integration field to sandbox
+})
+
+# User lookup fields that should be preserved - only OwnerId can be set
+# CreatedById and LastModifiedById are system-managed and cannot be set
+USER_LOOKUP_FIELDS = frozenset({'OwnerId'})
+
+@dataclass(frozen=True)
+class FieldPartitions:
+    """
+    An object's insertable fields split by how they are handled, so the per-record
+    functions test set membership instead of re-reading each field's type.
+    """
+    references: Dict[str, str]  # lookup field -> referenced object (fields with a referenceTo)
+    picklists: FrozenSet[str]
+    multipicklists: FrozenSet[str]
+    emails: FrozenSet[str]  # fields whose values get the '.invalid' suffix
+
+# Partitions per read-only field metadata mapping, keyed by id(fields_info)
+_field_partitions_cache: Dict[int, tuple] = {}
+
+def _field_partitions(insertable_fields_info: Mapping[str, Mapping[str, Any]]) -> FieldPartitions:
+    """
+    FieldPartitions for a field metadata mapping. Worked out once per
+    load_insertable_fields result; plain dicts, which callers may still change,
+    are partitioned on every call.
+    """
+    cached = _field_partitions_cache.get(id(insertable_fields_info))
+    if cached is not None and cached[0] is insertable_fields_info:
+        return cached[1]
+    by_type: Dict[Any, Set[str]] = {}
+    for field_name, field_info in insertable_fields_info.items():
+        by_type.setdefault(field_info.get('type'), set()).add(field_name)
+    partitions = FieldPartitions(
+        references={field_name: field_info['referenceTo'] for field_name, field_info in insertable_fields_info.items()
+                    if field_info.get('type') == 'reference' and field_info.get('referenceTo')},
+        picklists=frozenset(by_type.get('picklist', ())),
+        multipicklists=frozenset(by_type.get('multipicklist', ())),
+        emails=frozenset(field_name for field_name, field_info in insertable_fields_info.items() if field_info.get('is_email'))
+    )
+    if isinstance(insertable_fields_info, MappingProxyType):
+        # Holding the mapping keeps its id from being reused by another object
+        _field_partitions_cache[id(insertable_fields_info)] = (insertable_fields_info, partitions)
+    return partitions
+
+# RecordType translation tables, keyed by (source_org, target_org, sobject_type)
+_rt_map_cache: Dict[tuple, Dict[str, str]] = {}
+
+def prefetch_record_type_map(sf_cli_source, sf_cli_target, sobject_type):
+    """
+    Build the production -> sandbox RecordTypeId table for one object type.
+    RecordTypes are few and static during a migration, so each org is queried
+    once per object and the two result sets are joined on DeveloperName.
+
+    Args:
+        sf_cli_source: Source org CLI
+        sf_cli_target: Target org CLI
+        sobject_type: Object type (e.g., 'Account')
+
+    Returns:
+        dict: Production RecordTypeId -> sandbox RecordTypeId. RecordTypes with
+              no DeveloperName match in the sandbox are absent.
+    """
+    cache_key = (sf_cli_source.target_org, sf_cli_target.target_org, sobject_type)
+    if cache_key in _rt_map_cache:
+        return _rt_map_cache[cache_key]
+
+    query = f"SELECT Id, DeveloperName FROM RecordType WHERE SobjectType = {soql_literal(sobject_type)}"
+    sandbox_ids = {rt['DeveloperName']: rt['Id'] for rt in sf_cli_target.query_records(query) or []}
+    rt_map = {}
+    for rt in sf_cli_source.query_records(query) or []:
+        sandbox_rt_id = sandbox_ids.get(rt['DeveloperName'])
+        if sandbox_rt_id:
+            # Match 15-character production IDs on their prefix as well
+            rt_map[rt['Id']] = rt_map[rt['Id'][:15]] = sandbox_rt_id
+    return _rt_map_cache.setdefault(cache_key, rt_map)
+
+def replace_lookups_with_dummies(record: Dict[str, Any], insertable_fields_info: Mapping[str, Mapping[str, Any]],
+                                 dummy_records: Dict[str, str], created_mappings: Optional[Dict[str, Dict[str, str]]] = None,
+                                 sf_cli_source: Any = None, sf_cli_target: Any = None, sobject_type: Optional[str] = None,
+                                 in_place: bool = False) -> Dict[str, Any]:
     """
     Replaces lookup fields with appropriate values:
     - Use real sandbox IDs if the referenced record was already created
@@ -101,129 +462,289 @@ def replace_lookups_with_dummies(record, insertable_fields_info, dummy_records,
         sf_cli_source: Source org CLI (for RecordType mapping)
         sf_cli_target: Target org CLI (for RecordType mapping)
         sobject_type: Object type (e.g., 'Account', 'Opportunity') - used to exclude Opportunity from RecordType mapping
+        in_place: Apply the changes to record itself instead of returning a new dict
         
     Returns:
         dict: Record with lookups properly set
     """
-    modified_record = record.copy()
+    # Only a few lookup fields ever change, so collect the edits and copy once at the end
+    changes: Dict[str, Any] = {}
+    deletes: Set[str] = set()
     created_mappings = created_mappings or {}
     
-    for field_name, field_info in insertable_fields_info.items():
-        if field_info['type'] == 'reference' and field_info['referenceTo']:
-            referenced_object = field_info['referenceTo']
-            
-            # If the field exists in the record and has a value, replace it
-            if field_name in modified_record and modified_record[field_name]:
-                prod_lookup_id = modified_record[field_name]
-                
-                # Skip if it's a dict (relationship field)
-                if isinstance(prod_lookup_id, dict):
-                    continue
-                
-                # List of required lookup fields that MUST have a value in Phase 1
-                required_lookups = ['AccountId', 'OpportunityId', 'QuoteId', 'OrderId', 
-                                  'AccountFromId', 'AccountToId',  # Required for AccountRelationship
-                                  'OwnerId']  # Required on most objects
-                
-                # Special handling for RecordType: Map by DeveloperName (except Opportunities)
-                # Opportunities use a bypass RecordTypeId in Phase 1 to avoid triggering flows
-                if referenced_object == 'RecordType' and field_name == 'RecordTypeId':
-                    # Skip RecordType mapping for Opportunities - they use bypass in Phase 1
-                    if sobject_type == 'Opportunity':
-                        print(f"  [SKIP] RecordTypeId for Opportunity - will use bypass value, restore in Phase 2")
-                        del modified_record[field_name]
-                    # For all other objects, map RecordType by DeveloperName
-                    elif sf_cli_source and sf_cli_target and sobject_type:
-                        try:
-                            rt_info = sf_cli_source.get_record_type_info_by_id(prod_lookup_id)
-                            if rt_info and 'DeveloperName' in rt_info:
-                                dev_name = rt_info['DeveloperName']
-                                sandbox_rt_id = sf_cli_target.get_record_type_id(sobject_type, dev_name)
-                                if sandbox_rt_id:
-                                    modified_record[field_name] = sandbox_rt_id
-                                    console.print(f"  [cyan][MAP] RecordType {dev_name}: {prod_lookup_id} → {sandbox_rt_id}[/cyan]")
-                                else:
-                                    print(f"  [WARN] RecordType '{dev_name}' not found in sandbox, removing field")
-                                    del modified_record[field_name]
-                            else:
-                                print(f"  [WARN] Could not get RecordType info for {prod_lookup_id}, removing field")
-                                del modified_record[field_name]
-                        except Exception as e:
-                            print(f"  [ERROR] RecordType mapping failed: {e}, removing field")
-                            del modified_record[field_name]
-                    else:
-                        # No CLI provided, remove RecordType (will use default)
-                        console.print(f"  [yellow][REMOVE] RecordTypeId (no CLI provided), will use default RecordType[/yellow]")
-                        del modified_record[field_name]
-                    continue
-                
-                # Special handling for User lookups
-                # Keep all User lookups from production (users exist in sandbox with same IDs)
-                if referenced_object == 'User':
-                    console.print(f"  [green][KEEP] Keeping User lookup {field_name} = {prod_lookup_id} from production (users exist in sandbox)[/green]")
-                    # Keep the production User lookup as-is
-                # Special handling for OwnerId - keep production value if no mapping available
-                # OwnerId can reference User, Group, or other objects - keep as-is from production
-                elif field_name == 'OwnerId':
-                    console.print(f"  [green][KEEP] Keeping {field_name} = {prod_lookup_id} from production (Owner lookups typically exist in sandbox)[/green]")
-                    # Keep the production OwnerId as-is
-                # For REQUIRED lookups only, try to use mapping or dummy
-                elif field_name in required_lookups:
-                    if referenced_object in created_mappings:
-                        created_dict = created_mappings[referenced_object]
-                        if prod_lookup_id in created_dict:
-                            sandbox_lookup_id = created_dict[prod_lookup_id]
-                            modified_record[field_name] = sandbox_lookup_id
-                            console.print(f"  [cyan][MAP] Using real {field_name}: {prod_lookup_id} → {sandbox_lookup_id}[/cyan]")
-                        elif referenced_object in dummy_records:
-                            # Required field but record not created yet - use dummy
-                            modified_record[field_name] = dummy_records[referenced_object]
-                            print(f"  [DUMMY] Replaced {field_name} ({prod_lookup_id}) with dummy {referenced_object}")
-                        else:
-                            print(f"  [ERROR] Required {field_name} has no mapping or dummy available")
-                    elif referenced_object in dummy_records:
-                        # Required field without mapping - use dummy
-                        modified_record[field_name] = dummy_records[referenced_object]
-                        print(f"  [DUMMY] Replaced {field_name} ({prod_lookup_id}) with dummy {referenced_object}")
+    reference_fields = _field_partitions(insertable_fields_info).references
+    # Only lookups present in the record need work; most insertable fields are not references
+    for field_name, prod_lookup_id in record.items():
+        referenced_object = reference_fields.get(field_name)
+        # If the field exists in the record and has a value, replace it
+        if referenced_object is None or not prod_lookup_id:
+            continue
+        
+        # Skip if it's a dict (relationship field)
+        if isinstance(prod_lookup_id, dict):
+            continue
+        
+        # Special handling for RecordType: Map by DeveloperName (except Opportunities)
+        # Opportunities use a bypass RecordTypeId in Phase 1 to avoid triggering flows
+        if referenced_object == 'RecordType' and field_name == 'RecordTypeId':
+            sandbox_rt_id = None
+            # Skip RecordType mapping for Opportunities - they use bypass in Phase 1
+            if sobject_type == 'Opportunity':
+                _print_detail("  [SKIP] RecordTypeId for Opportunity - will use bypass value, restore in Phase 2")
+            # For all other objects, map RecordType by DeveloperName
+            elif sf_cli_source and sf_cli_target and sobject_type:
+                try:
+                    sandbox_rt_id = prefetch_record_type_map(sf_cli_source, sf_cli_target, sobject_type).get(prod_lookup_id)
+                    if sandbox_rt_id:
+                        console.print("  [cyan][MAP] RecordType: %s → %s[/cyan]", prod_lookup_id, sandbox_rt_id)
                     else:
-                        print(f"  [ERROR] Required {field_name} has no dummy available")
-                # For ALL optional lookups, remove them to avoid lookup filter issues
-                # Phase 2 will restore them with real production values
+                        _print_detail("  [WARN] RecordType %s has no DeveloperName match in sandbox, removing field", prod_lookup_id)
+                except Exception as e:
+                    _print_detail("  [ERROR] RecordType mapping failed: %s, removing field", e)
+            else:
+                # No CLI provided, remove RecordType (will use default)
+                console.print("  [yellow][REMOVE] RecordTypeId (no CLI provided), will use default RecordType[/yellow]")
+            # Every branch without a sandbox RecordType removes the field
+            if sandbox_rt_id:
+                changes[field_name] = sandbox_rt_id
+            else:
+                deletes.add(field_name)
+            continue
+        
+        # Special handling for User lookups
+        # Keep all User lookups from production (users exist in sandbox with same IDs)
+        if referenced_object == 'User':
+            console.print("  [green][KEEP] Keeping User lookup %s = %s from production (users exist in sandbox)[/green]", field_name, prod_lookup_id)
+            # Keep the production User lookup as-is
+        # Special handling for OwnerId - keep production value if no mapping available
+        # OwnerId can reference User, Group, or other objects - keep as-is from production
+        elif field_name == 'OwnerId':
+            console.print("  [green][KEEP] Keeping %s = %s from production (Owner lookups typically exist in sandbox)[/green]", field_name, prod_lookup_id)
+            # Keep the production OwnerId as-is
+        # For REQUIRED lookups only, try to use mapping or dummy
+        elif field_name in REQUIRED_LOOKUP_FIELDS:
+            if referenced_object in created_mappings:
+                created_dict = created_mappings[referenced_object]
+                if prod_lookup_id in created_dict:
+                    sandbox_lookup_id = created_dict[prod_lookup_id]
+                    changes[field_name] = sandbox_lookup_id
+                    console.print("  [cyan][MAP] Using real %s: %s → %s[/cyan]", field_name, prod_lookup_id, sandbox_lookup_id)
+                elif referenced_object in dummy_records:
+                    # Required field but record not created yet - use dummy
+                    changes[field_name] = dummy_records[referenced_object]
+                    _print_detail("  [DUMMY] Replaced %s (%s) with dummy %s", field_name, prod_lookup_id, referenced_object)
                 else:
-                    console.print(f"  [yellow][REMOVE] Removing optional lookup {field_name}, will restore in Phase 2[/yellow]")
-                    del modified_record[field_name]
-            # If the field doesn't exist but is required, add dummy
-            elif field_name not in modified_record and referenced_object in dummy_records:
-                # Common required lookups
-                if field_name in ['AccountId', 'OpportunityId', 'QuoteId', 'OrderId']:
-                    modified_record[field_name] = dummy_records[referenced_object]
-                    print(f"  [DUMMY] Added required {field_name} with dummy {referenced_object}")
+                    _print_detail("  [ERROR] Required %s has no mapping or dummy available", field_name)
+            elif referenced_object in dummy_records:
+                # Required field without mapping - use dummy
+                changes[field_name] = dummy_records[referenced_object]
+                _print_detail("  [DUMMY] Replaced %s (%s) with dummy %s", field_name, prod_lookup_id, referenced_object)
+            else:
+                _print_detail("  [ERROR] Required %s has no dummy available", field_name)
+        # For ALL optional lookups, remove them to avoid lookup filter issues
+        # Phase 2 will restore them with real production values
+        else:
+            console.print("  [yellow][REMOVE] Removing optional lookup %s, will restore in Phase 2[/yellow]", field_name)
+            deletes.add(field_name)
+    
+    # If a common required lookup is missing from the record, add a dummy
+    for field_name in COMMON_REQUIRED_LOOKUPS - record.keys():
+        referenced_object = reference_fields.get(field_name)
+        if referenced_object is not None and referenced_object in dummy_records:
+            changes[field_name] = dummy_records[referenced_object]
+            _print_detail("  [DUMMY] Added required %s with dummy %s", field_name, referenced_object)
     
+    if in_place:
+        for field_name in deletes:
+            record.pop(field_name, None)
+        record.update(changes)
+        return record
+    if not deletes:
+        return {**record, **changes}
+    modified_record = {key: value for key, value in record.items() if key not in deletes}
+    modified_record.update(changes)
     return modified_record
 
+@functools.lru_cache(maxsize=None)
 def load_insertable_fields(object_name, script_dir):
     """
     Loads insertable field names, their types, and reference information
     from the generated CSV file.
-    Returns a dictionary of {field_name: {'type': field_type, 'referenceTo': reference_object}}.
+    Returns a mapping of {field_name: {'type': field_type, 'referenceTo': reference_object,
+    'is_email': bool}}, where is_email marks fields whose values get the '.invalid' suffix.
+    
+    The field CSVs are static for a run, so the result is read once per
+    (object_name, script_dir) and shared between callers as a read-only
+    MappingProxyType (per-field entries too), so no caller can alter the cached
+    copy; use dict(...) first if a modified version is needed.
+    Call load_insertable_fields.cache_clear() after regenerating the field CSVs.
     """
+    return MappingProxyType(_load_insertable_fields_uncached(object_name, script_dir))
+
+def _load_insertable_fields_uncached(object_name, script_dir):
     field_data_path = os.path.join(script_dir, 'fieldData', f'{object_name.lower()}Fields.csv')
     insertable_fields_info = {}
     if os.path.exists(field_data_path):
         with open(field_data_path, 'r', newline='') as csvfile:
-            reader = csv.DictReader(csvfile)
+            # Positional rows: the header is resolved to column indexes once
+            reader = csv.reader(csvfile)
+            header = next(reader, [])
+            name_i, type_i = header.index('Field Name'), header.index('Field Type')
+            ref_i = header.index('Reference To') if 'Reference To' in header else None
             for row in reader:
-                field_name = row['Field Name']
-                field_type = row['Field Type']
-                reference_to = row.get('Reference To', '')
-                insertable_fields_info[field_name] = {
-                    'type': field_type,
-                    'referenceTo': reference_to
-                }
+                if not row:
+                    continue
+                field_name = row[name_i]
+                # Never copied, so left out here rather than skipped per record
+                if field_name == 'attributes' or field_name.endswith('__r'):
+                    continue
+                reference_to = row[ref_i] if ref_i is not None and len(row) > ref_i else ''
+                insertable_fields_info[field_name] = MappingProxyType({
+                    'type': row[type_i],
+                    'referenceTo': reference_to,
+                    # Decided here once, not per record in filter_record_data
+                    'is_email': 'email' in field_name.lower()
+                })
     else:
         print(f"Warning: Field data CSV not found for {object_name} at {field_data_path}.")
     return insertable_fields_info
-def filter_record_data(record, insertable_fields_info, sf_cli_target, sobject_type=None):
+
+@dataclass(frozen=True)
+class InsertableIndex:
+    """
+    Lookup tables derived once per run from an object's insertable field metadata,
+    so per-record filtering does not re-resolve picklist values or field types.
+    """
+    fields: FrozenSet[str]
+    lookup_fields: FrozenSet[str]
+    picklists: Dict[str, FrozenSet[str]]  # picklist/multipicklist field -> valid values
+
+def build_insertable_index(fields_info, sf_cli_target=None, sobject_type=None):
+    """
+    Build an InsertableIndex from field metadata. When a target CLI and object type
+    are given, valid picklist values are resolved once here; fields whose values
+    cannot be retrieved are left out and validated through the normal path.
+
+    Args:
+        fields_info: Field metadata dictionary from load_insertable_fields
+        sf_cli_target: Optional target org CLI (for picklist values)
+        sobject_type: Optional Salesforce object type (for picklist values)
+
+    Returns:
+        InsertableIndex
+    """
+    picklists = {}
+    if sf_cli_target and sobject_type:
+        partitions = _field_partitions(fields_info)
+        for field_name in partitions.picklists | partitions.multipicklists:
+            try:
+                picklists[field_name] = frozenset(get_valid_picklist_values(sf_cli_target, sobject_type, field_name))
+            except Exception:
+                continue
+    return InsertableIndex(
+        fields=frozenset(fields_info),
+        lookup_fields=frozenset(name for name, info in fields_info.items() if info['type'] == 'reference'),
+        picklists=picklists
+    )
+
+def _filter_picklist(filtered_data: Dict[str, Any], field_name: str, value: str,
+                     valid_picklist_values: Callable[[str], Any]) -> None:
+    """Keep a valid picklist value, else replace it ('Other' or a default stage) or drop the field."""
+    try:
+        # Try to get valid picklist values for this field
+        valid_values = valid_picklist_values(field_name)
+        if valid_values and value not in valid_values:
+            # Special handling for required picklist fields
+            if field_name == 'StageName':
+                # StageName is required - use first valid value as default
+                default_stage = next(iter(valid_values)) if valid_values else 'Prospecting'
+                _print_detail("[PICKLIST REPLACEMENT] Field '%s': '%s' is not valid. Using default '%s'.", field_name, value, default_stage)
+                filtered_data[field_name] = default_stage
+            # Prefer 'Other' if available, else remove field (for non-required fields)
+            elif 'Other' in valid_values:
+                _print_detail("[PICKLIST REPLACEMENT] Field '%s': '%s' is not valid. Replacing with 'Other'.", field_name, value)
+                filtered_data[field_name] = 'Other'
+            else:
+                _print_detail("[PICKLIST REMOVAL] Field '%s': '%s' is not valid and no 'Other' value available. Removing field from record.", field_name, value)
+        elif valid_values:
+            # Value is valid
+            filtered_data[field_name] = value
+        else:
+            # Could not get valid values, remove field to be safe (unless it's StageName)
+            if field_name == 'StageName':
+                # For StageName, use the current value if we can't validate
+                _print_detail("[PICKLIST PASSTHROUGH] Field '%s': Could not retrieve valid values. Keeping original value '%s'.", field_name, value)
+                filtered_data[field_name] = value
+            else:
+                # For all other picklists, remove if we can't validate
+                _print_detail("[PICKLIST REMOVAL] Field '%s': Could not retrieve valid picklist values. Removing field to prevent errors.", field_name)
+    except Exception as e:
+        _print_detail("[PICKLIST ERROR] Field '%s': Error retrieving picklist values: %s. Removing field.", field_name, e)
+
+def _filter_multipicklist(filtered_data: Dict[str, Any], field_name: str, value: str,
+                          valid_picklist_values: Callable[[str], Any]) -> None:
+    """Keep the valid values of a semicolon-separated multipicklist value, within 255 characters."""
+    try:
+        valid_values = valid_picklist_values(field_name)
+        if valid_values:
+            # One pass over the semicolon-separated values: drop invalid ones and
+            # keep valid ones while they fit the multipicklist limit (255 chars)
+            kept_values: List[str] = []
+            invalid_values: List[str] = []
+            kept_length = 0
+            valid_count = 0
+            valid_length = 0
+            for v in value.split(';'):
+                v = v.strip()
+                if v not in valid_values:
+                    invalid_values.append(v)
+                    continue
+                # Account for semicolon separator
+                valid_length += len(v) + (1 if valid_count else 0)
+                valid_count += 1
+                if valid_count == len(kept_values) + 1:
+                    needed_length = len(v) + (1 if kept_values else 0)
+                    if kept_length + needed_length <= 255:
+                        kept_values.append(v)
+                        kept_length += needed_length
+
+            if valid_count:
+                result_value = ';'.join(kept_values)
+                if len(kept_values) < valid_count:
+                    _print_detail("[MULTIPICKLIST TRUNCATE] Field '%s': Value too long (%s chars). Truncated to %s chars. Kept %s/%s values.", field_name, valid_length, kept_length, len(kept_values), valid_count)
+
+                filtered_data[field_name] = result_value
+                if invalid_values:
+                    _print_detail("[MULTIPICKLIST FILTER] Field '%s': Removed invalid values %s. Kept: %s valid values.", field_name, invalid_values, valid_count)
+            else:
+                _print_detail("[MULTIPICKLIST REMOVAL] Field '%s': No valid values found in '%s'. Removing field from record.", field_name, value)
+        else:
+            # If we can't get valid values, remove the field to be safe
+            _print_detail("[MULTIPICKLIST REMOVAL] Field '%s': Could not retrieve valid picklist values. Removing field to prevent errors.", field_name)
+    except Exception as e:
+        _print_detail("[MULTIPICKLIST ERROR] Field '%s': Error retrieving picklist values: %s. Removing field.", field_name, e)
+
+def _filter_boolean(filtered_data: Dict[str, Any], field_name: str, value: str,
+                    valid_picklist_values: Callable[[str], Any]) -> None:
+    """Convert the strings 'True'/'False' to booleans; drop any other string."""
+    if value == 'True':
+        filtered_data[field_name] = True
+    elif value == 'False':
+        filtered_data[field_name] = False
+    else:
+        # Invalid boolean string, skip field
+        _print_detail("[BOOLEAN ERROR] Field '%s': Invalid boolean string '%s'. Removing field.", field_name, value)
+
+# Per-type handling of string values in filter_record_data; other types are copied as-is
+_STRING_FIELD_HANDLERS = {
+    'picklist': _filter_picklist,
+    'multipicklist': _filter_multipicklist,
+    'boolean': _filter_boolean,
+}
+
+def filter_record_data(record: Dict[str, Any], insertable_fields_info: Mapping[str, Mapping[str, Any]],
+                       sf_cli_target: Any, sobject_type: Optional[str] = None,
+                       index: Optional['InsertableIndex'] = None) -> Dict[str, Any]:
     """
     Filters a Salesforce record to include only insertable fields and handles special cases.
     For lookup fields, it checks if the referenced record exists in the target sandbox.
@@ -234,160 +755,66 @@ def filter_record_data(record, insertable_fields_info, sf_cli_target, sobject_ty
         sf_cli_target: Target Salesforce CLI instance
         sobject_type: The Salesforce object type (e.g., 'Account', 'Contact'). If not provided, 
                       will try to extract from record attributes.
+        index: Optional InsertableIndex for the object (precomputed field set and picklist values)
     """
     # Determine the sobject type
     if not sobject_type:
         sobject_type = record.get('attributes', {}).get('type') or record.get('sobjectType')
     
-    # Fields that should never be copied (process/workflow driven fields)
-    excluded_fields = {
-        'Accept_as_Affiliate__c',  # Requires executive contact - process driven
-        'Force_NetSuite_Sync__c',  # Never sync NetSuite integration field to sandbox
-    }
-    
-    # User lookup fields that should be preserved - only OwnerId can be set
-    # CreatedById and LastModifiedById are system-managed and cannot be set
-    user_lookup_fields = {'OwnerId'}
+    def valid_picklist_values(field_name: str) -> Any:
+        if index is not None and field_name in index.picklists:
+            return index.picklists[field_name]
+        # Repeat lookups are served by get_valid_picklist_values' own memoization
+        return get_valid_picklist_values(sf_cli_target, sobject_type, field_name) if sobject_type else set()
 
     # Get fallback user ID dynamically (cached after first query)
     fallback_user_id = get_fallback_user_id(sf_cli_target)
 
-    filtered_data = {}
+    email_fields = _field_partitions(insertable_fields_info).emails
+    filtered_data: Dict[str, Any] = {}
     for field_name, value in record.items():
+        # Most skipped fields (system, relationship, 'attributes') are simply not in
+        # the insertable list, so one hash lookup rejects them before anything else
+        field_type_info = insertable_fields_info.get(field_name)
+        if field_type_info is None and field_name not in USER_LOOKUP_FIELDS:
+            continue
+        
         # Preserve OwnerId only if the user exists in sandbox, otherwise use fallback
-        if field_name in user_lookup_fields and value and not isinstance(value, dict):
+        if field_name in USER_LOOKUP_FIELDS and value and not isinstance(value, dict):
             # Check if the user exists in the sandbox
             if check_record_exists(sf_cli_target, 'User', value):
                 filtered_data[field_name] = value
-                console.print(f"  [green][PRESERVE] {field_name} = {value} (User exists in sandbox)[/green]")
+                console.print("  [green][PRESERVE] %s = %s (User exists in sandbox)[/green]", field_name, value)
             elif fallback_user_id:
                 filtered_data[field_name] = fallback_user_id
-                console.print(f"  [yellow][FALLBACK] {field_name} = {fallback_user_id} (Original user {value} not found in sandbox)[/yellow]")
+                console.print("  [yellow][FALLBACK] %s = %s (Original user %s not found in sandbox)[/yellow]", field_name, fallback_user_id, value)
             else:
                 # No fallback available, skip the field and let Salesforce use default
-                console.print(f"  [yellow][SKIP] {field_name} - Original user {value} not found and no fallback available[/yellow]")
+                console.print("  [yellow][SKIP] %s - Original user %s not found and no fallback available[/yellow]", field_name, value)
             continue
         
-        # Exclude system fields, relationship fields, process fields, and fields not in our insertable list
-        if (field_name == 'attributes' or 
-            field_name.endswith('__r') or 
-            field_name in excluded_fields or
-            field_name not in insertable_fields_info):
-            continue
-        field_type_info = insertable_fields_info.get(field_name)
-        if not field_type_info:
+        # Exclude process fields (and an OwnerId that is not insertable)
+        if not field_type_info or field_name in EXCLUDED_FIELDS:
             continue
         field_type = field_type_info['type']
 
-        # Handle lookup fields
+        # Handle lookup fields (cached; see prefetch_reference_existence)
         if field_type == 'reference':
             referenced_object = field_type_info['referenceTo']
-            if referenced_object and value:
-                query =\
-                    f"SELECT Id FROM {referenced_object} WHERE Id = '{value}' LIMIT 1"
-                existing_referenced_record = sf_cli_target.query_records(query)
-                if existing_referenced_record and len(existing_referenced_record) > 0:
-                    filtered_data[field_name] = value
-                # Skip lookup if referenced record doesn't exist in target sandbox
+            if referenced_object and value and check_record_exists(sf_cli_target, referenced_object, value):
+                filtered_data[field_name] = value
+            # Skip lookup if referenced record doesn't exist in target sandbox
             continue
+        # Nested relationship values carry the ID to insert
         if isinstance(value, dict) and 'Id' in value:
-            if field_name == 'RecordTypeId':
-                filtered_data[field_name] = value['Id']
-            elif field_name == 'OwnerId':
-                filtered_data[field_name] = value['Id']
-            else:
-                filtered_data[field_name] = value['Id']
+            filtered_data[field_name] = value['Id']
         elif value is not None:
             # If this is an email field, append '.invalid' to the value
-            if 'email' in field_name.lower() and isinstance(value, str) and not value.endswith('.invalid'):
+            if field_name in email_fields and isinstance(value, str) and not value.endswith('.invalid'):
                 filtered_data[field_name] = value + '.invalid'
-            # Handle picklist fields: check if value is valid, else set to 'Other' or remove
-            elif field_type == 'picklist' and isinstance(value, str):
-                try:
-                    # Try to get valid picklist values for this field
-                    valid_values = get_valid_picklist_values(sf_cli_target, sobject_type, field_name) if sobject_type else set()
-                    if valid_values and value not in valid_values:
-                        # Special handling for required picklist fields
-                        if field_name == 'StageName':
-                            # StageName is required - use first valid value as default
-                            default_stage = next(iter(valid_values)) if valid_values else 'Prospecting'
-                            print(f"[PICKLIST REPLACEMENT] Field '{field_name}': '{value}' is not valid. Using default '{default_stage}'.")
-                            filtered_data[field_name] = default_stage
-                        # Prefer 'Other' if available, else remove field (for non-required fields)
-                        elif 'Other' in valid_values:
-                            print(f"[PICKLIST REPLACEMENT] Field '{field_name}': '{value}' is not valid. Replacing with 'Other'.")
-                            filtered_data[field_name] = 'Other'
-                        else:
-                            print(f"[PICKLIST REMOVAL] Field '{field_name}': '{value}' is not valid and no 'Other' value available. Removing field from record.")
-                            continue
-                    elif valid_values:
-                        # Value is valid
-                        filtered_data[field_name] = value
-                    else:
-                        # Could not get valid values, remove field to be safe (unless it's StageName)
-                        if field_name == 'StageName':
-                            # For StageName, use the current value if we can't validate
-                            print(f"[PICKLIST PASSTHROUGH] Field '{field_name}': Could not retrieve valid values. Keeping original value '{value}'.")
-                            filtered_data[field_name] = value
-                        else:
-                            # For all other picklists, remove if we can't validate
-                            print(f"[PICKLIST REMOVAL] Field '{field_name}': Could not retrieve valid picklist values. Removing field to prevent errors.")
-                            continue
-                except Exception as e:
-                    print(f"[PICKLIST ERROR] Field '{field_name}': Error retrieving picklist values: {str(e)}. Removing field.")
-                    continue
-            # Handle multi-select picklist fields (semicolon-separated values)
-            elif field_type == 'multipicklist' and isinstance(value, str):
-                try:
-                    valid_values = get_valid_picklist_values(sf_cli_target, sobject_type, field_name) if sobject_type else set()
-                    if valid_values:
-                        # Split by semicolon, filter valid values
-                        selected_values = [v.strip() for v in value.split(';')]
-                        valid_selected = [v for v in selected_values if v in valid_values]
-                        
-                        if valid_selected:
-                            result_value = ';'.join(valid_selected)
-                            
-                            # Check if the result exceeds typical multipicklist field limit (255 chars)
-                            if len(result_value) > 255:
-                                # Truncate by removing values from the end until it fits
-                                truncated_values = []
-                                current_length = 0
-                                for v in valid_selected:
-                                    # Account for semicolon separator
-                                    needed_length = len(v) + (1 if truncated_values else 0)
-                                    if current_length + needed_length <= 255:
-                                        truncated_values.append(v)
-                                        current_length += needed_length
-                                    else:
-                                        break
-                                result_value = ';'.join(truncated_values)
-                                print(f"[MULTIPICKLIST TRUNCATE] Field '{field_name}': Value too long ({len(';'.join(valid_selected))} chars). Truncated to {len(result_value)} chars. Kept {len(truncated_values)}/{len(valid_selected)} values.")
-                            
-                            filtered_data[field_name] = result_value
-                            invalid_values = [v for v in selected_values if v not in valid_values]
-                            if invalid_values:
-                                print(f"[MULTIPICKLIST FILTER] Field '{field_name}': Removed invalid values {invalid_values}. Kept: {len(valid_selected)} valid values.")
-                        else:
-                            print(f"[MULTIPICKLIST REMOVAL] Field '{field_name}': No valid values found in '{value}'. Removing field from record.")
-                            continue
-                    else:
-                        # If we can't get valid values, remove the field to be safe
-                        print(f"[MULTIPICKLIST REMOVAL] Field '{field_name}': Could not retrieve valid picklist values. Removing field to prevent errors.")
-                        continue
-                except Exception as e:
-                    print(f"[MULTIPICKLIST ERROR] Field '{field_name}': Error retrieving picklist values: {str(e)}. Removing field.")
-                    continue
-            # Handle boolean fields - convert string 'True'/'False' to actual booleans
-            elif field_type == 'boolean' and isinstance(value, str):
-                if value == 'True':
-                    filtered_data[field_name] = True
-                elif value == 'False':
-                    filtered_data[field_name] = False
-                else:
-                    # Invalid boolean string, skip field
-                    print(f"[BOOLEAN ERROR] Field '{field_name}': Invalid boolean string '{value}'. Removing field.")
-                    continue
+            # Picklist, multipicklist and boolean strings get their own handler
+            elif isinstance(value, str) and (handler := _STRING_FIELD_HANDLERS.get(field_type)):
+                handler(filtered_data, field_name, value, valid_picklist_values)
             else:
                 filtered_data[field_name] = value
     return filtered_data
\ No newline at end of file
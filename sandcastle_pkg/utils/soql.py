@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+SOQL Literal Helpers
+
+Author: Ken Brill
+Version: 1.1.8
+Date: December 24, 2025
+License: MIT License
+
+The sf CLI takes SOQL as plain text, with no bind variables, so string values
+are escaped here in one place instead of with ad-hoc .replace() calls.
+"""
+
+# SOQL string escape sequences, applied in a single str.translate pass
+_SOQL_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    "'": "\\'",
+    '"': '\\"',
+    '\n': '\\n',
+    '\r': '\\r',
+    '\t': '\\t',
+    '\b': '\\b',
+    '\f': '\\f',
+})
+
+
+def soql_escape(value):
+    """Escape a value for use inside a quoted SOQL string literal."""
+    return str(value).translate(_SOQL_ESCAPES)
+
+
+def soql_literal(value):
+    """Quoted SOQL string literal, e.g. O'Brien -> 'O\\'Brien'."""
+    return f"'{soql_escape(value)}'"
+
+
+def soql_in_list(values):
+    """Parenthesised SOQL IN list, e.g. ['a', 'b'] -> ('a','b')."""
+    return '(' + ','.join(soql_literal(value) for value in values) + ')'